@@ -1,9 +1,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cache
+from app.core.database import get_async_db
 from app.core.security import decode_token
-from app.models.mysql.models import User
+from app.core.user_cache import user_cache, token_expiry
+from app.models.mysql.models import User, UserRole
 from typing import Optional
 
 security = HTTPBearer()
@@ -11,7 +14,7 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user from JWT token"""
     token = credentials.credentials
@@ -37,7 +40,14 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    cached_user = await user_cache.get(user_id)
+    if cached_user is not None:
+        # Attach the cached snapshot to this session without a SELECT
+        return await db.merge(cached_user, load=False)
+    
+    # Taken before the SELECT, so a change committed meanwhile invalidates it
+    stamp = await cache.stamp()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,6 +60,7 @@ async def get_current_user(
             detail="Inactive user"
         )
     
+    user_cache.set(user, token_expiry(payload), stamp)
     return user
 
 
@@ -75,3 +86,15 @@ async def get_current_verified_user(
             detail="Email not verified"
         )
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """Get current user, who must be an admin"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
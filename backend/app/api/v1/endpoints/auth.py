@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import verify_password_async, get_password_hash_async, create_access_token, create_refresh_token, decode_token
 from app.models.mysql.models import User, Profile
 from app.schemas.schemas import UserCreate, UserLogin, UserResponse, Token
 from datetime import timedelta
@@ -10,11 +11,11 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -22,7 +23,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    existing_username = db.query(User).filter(User.username == user_data.username).first()
+    existing_username = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,7 +31,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -39,13 +40,13 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create user profile
     profile = Profile(user_id=new_user.id)
     db.add(profile)
-    db.commit()
+    await db.commit()
     
     # TODO: Send verification email
     
@@ -53,13 +54,18 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user and return JWT tokens"""
     
     # Find user by email
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+    user = await db.scalar(select(User).where(User.email == user_credentials.email))
     
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+    if user:
+        is_valid, new_hash = await verify_password_async(user_credentials.password, user.password_hash)
+    else:
+        is_valid, new_hash = False, None
+    
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -72,6 +78,11 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user account"
         )
     
+    # Upgrade hashes created with an older work factor
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    
     # Create access and refresh tokens
     access_token = create_access_token(data={"sub": user.id})
     refresh_token = create_refresh_token(data={"sub": user.id})
@@ -84,7 +95,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async_db)):
     """Refresh access token using refresh token"""
     
     payload = decode_token(refresh_token)
@@ -96,7 +107,7 @@ async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -116,7 +127,7 @@ async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
 
 
 @router.post("/verify-email")
-async def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_async_db)):
     """Verify user email with token"""
     
     payload = decode_token(token)
@@ -128,7 +139,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     
     if not user:
         raise HTTPException(
@@ -137,6 +148,6 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         )
     
     user.is_verified = True
-    db.commit()
+    await db.commit()
     
     return {"message": "Email verified successfully"}
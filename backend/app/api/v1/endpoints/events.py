@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_async_db
+from app.core.pagination import keyset_paginate, set_next_cursor
+from app.core.search import apply_search
+from app.core.cache import cache, cached
+from app.core.counters import increment_counters
 from app.models.mysql.models import User
 from app.models.mysql.enhanced_models import (
     Event, EventAttendee, EventType, RSVPStatus
@@ -18,7 +24,7 @@ router = APIRouter()
 async def create_event(
     event_data: EventCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new event."""
     event = Event(
@@ -26,68 +32,85 @@ async def create_event(
         organizer_id=current_user.id
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
 @router.get("/", response_model=List[EventResponse])
 async def list_events(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     event_type: Optional[EventType] = None,
     is_virtual: Optional[bool] = None,
     search: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     is_active: bool = True,
-    sort_by: str = Query("start_time", regex="^(start_time|created_at|current_attendees)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|start_time|created_at|current_attendees)$"),
     order: str = Query("asc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all events with filters.
     
+    Pagination: pass the X-Next-Cursor response header back as `cursor`
+    to fetch the next page by keyset instead of `skip`.
+    
     Filters:
     - event_type: Filter by event type
     - is_virtual: Filter virtual/in-person events
-    - search: Search in title and description
+    - search: Full-text search in title and description, ranked by relevance
     - start_date, end_date: Filter by date range
     """
-    query = db.query(Event).filter(Event.is_active == is_active)
+    query = select(Event).where(Event.is_active == is_active)
     
     if event_type:
-        query = query.filter(Event.event_type == event_type)
+        query = query.where(Event.event_type == event_type)
     if is_virtual is not None:
-        query = query.filter(Event.is_virtual == is_virtual)
+        query = query.where(Event.is_virtual == is_virtual)
+    relevance = None
     if search:
-        query = query.filter(
-            (Event.title.ilike(f"%{search}%")) | 
-            (Event.description.ilike(f"%{search}%"))
-        )
+        query, relevance = apply_search(query, Event, search)
     if start_date:
-        query = query.filter(Event.start_time >= start_date)
+        query = query.where(Event.start_time >= start_date)
     if end_date:
-        query = query.filter(Event.end_time <= end_date)
+        query = query.where(Event.end_time <= end_date)
     
-    # Sorting
-    sort_column = getattr(Event, sort_by)
-    if order == "desc":
-        query = query.order_by(sort_column.desc())
+    # Sorting and pagination; searches default to best match first
+    if sort_by in (None, "relevance"):
+        sort_by = "relevance" if relevance is not None else "start_time"
+    if sort_by == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available for relevance ordering"
+            )
+        # Best match first, regardless of `order`
+        query = query.order_by(relevance.desc(), Event.id)
     else:
-        query = query.order_by(sort_column.asc())
+        query = keyset_paginate(query, getattr(Event, sort_by), Event.id, sort_by, order, cursor)
     
-    events = query.offset(skip).limit(limit).all()
+    # `skip` is kept for compatibility; a cursor seeks instead
+    if not cursor:
+        query = query.offset(skip)
+    
+    events = (await db.scalars(query.limit(limit))).all()
+    if sort_by != "relevance":
+        set_next_cursor(response, events, sort_by, order, limit)
     return events
 
 
 @router.get("/{event_id}", response_model=EventResponse)
+@cached("event:{event_id}", EventResponse, tags=["event:{event_id}"])
 async def get_event(
     event_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific event by ID."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.scalar(select(Event).where(Event.id == event_id))
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,10 +124,10 @@ async def update_event(
     event_id: str,
     event_data: EventUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an event (only by organizer)."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.scalar(select(Event).where(Event.id == event_id))
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,11 +140,23 @@ async def update_event(
             detail="Not authorized to update this event"
         )
     
-    for field, value in event_data.dict(exclude_unset=True).items():
+    updates = event_data.dict(exclude_unset=True)
+    for field, value in updates.items():
         setattr(event, field, value)
     
-    db.commit()
-    db.refresh(event)
+    if "max_attendees" in updates:
+        # Seats added by raising (or removing) the limit go to the waitlist first
+        await db.flush()
+        current, limit = (await db.execute(
+            select(Event.current_attendees, Event.max_attendees).where(Event.id == event_id).with_for_update()
+        )).one()
+        promoted = await _promote_waitlist(db, event_id, None if limit is None else limit - current)
+        if promoted:
+            await increment_counters(db, Event, event_id, {"current_attendees": promoted})
+    
+    await db.commit()
+    await cache.invalidate_tags(f"event:{event_id}")
+    await db.refresh(event)
     return event
 
 
@@ -129,10 +164,10 @@ async def update_event(
 async def delete_event(
     event_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an event (only by organizer)."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.scalar(select(Event).where(Event.id == event_id))
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -145,84 +180,184 @@ async def delete_event(
             detail="Not authorized to delete this event"
         )
     
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
+    await cache.invalidate_tags(f"event:{event_id}")
     return None
 
 
+async def _promote_waitlist(db: AsyncSession, event_id: str, seats: Optional[int]) -> int:
+    """
+    Move up to `seats` people (all when None) from the head of the
+    waitlist to GOING. The caller accounts for the seats. Returns how
+    many were promoted.
+    """
+    if seats is not None and seats <= 0:
+        return 0
+    query = (
+        select(EventAttendee.user_id)
+        .where(EventAttendee.event_id == event_id, EventAttendee.rsvp_status == RSVPStatus.WAITLISTED)
+        .order_by(EventAttendee.waitlist_position)
+        .limit(seats)
+        # Concurrent releases promote different people
+        .with_for_update(skip_locked=True)
+    )
+    user_ids = (await db.scalars(query)).all()
+    if not user_ids:
+        return 0
+    result = await db.execute(
+        update(EventAttendee)
+        .where(
+            EventAttendee.event_id == event_id,
+            EventAttendee.user_id.in_(user_ids),
+            EventAttendee.rsvp_status == RSVPStatus.WAITLISTED
+        )
+        .values(rsvp_status=RSVPStatus.GOING, waitlist_position=None)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
 @router.post("/{event_id}/rsvp", status_code=status.HTTP_200_OK)
 async def rsvp_event(
     event_id: str,
     rsvp_data: EventRSVPCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """RSVP to an event."""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
+    """
+    RSVP to an event.
+    
+    A GOING RSVP reserves a seat with a conditional increment of the
+    attendee count, so a full event is never overbooked. When no seat is
+    left the RSVP joins the waitlist instead (rsvp_status "waitlisted"),
+    and whenever someone switches away from GOING the first person on the
+    waitlist takes their seat.
+    """
+    new_status = RSVPStatus(rsvp_data.rsvp_status.value)
+    attendee_key = (EventAttendee.event_id == event_id, EventAttendee.user_id == current_user.id)
+    old_status = await db.scalar(select(EventAttendee.rsvp_status).where(*attendee_key))
+    values = {"rsvp_status": new_status, "waitlist_position": None}
+    counts = None
+    
+    if new_status == RSVPStatus.GOING and old_status in (RSVPStatus.GOING, RSVPStatus.WAITLISTED):
+        # Already holding a seat or a place in the queue
+        values = None
+    elif old_status is not None:
+        # Conditional on the status read above, so a concurrent RSVP by the
+        # same user can't release or reserve the same seat twice
+        changed = await db.execute(
+            update(EventAttendee).where(*attendee_key, EventAttendee.rsvp_status == old_status).values(values)
+            .execution_options(synchronize_session=False)
         )
+        if not changed.rowcount:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="RSVP changed by another request, please retry"
+            )
     
-    # Check if event is full
-    if event.max_attendees and event.current_attendees >= event.max_attendees:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Event is full"
+    if values is not None and new_status == RSVPStatus.GOING:
+        counts = await increment_counters(
+            db, Event, event_id, {"current_attendees": 1},
+            condition=(Event.max_attendees == None) | (Event.current_attendees < Event.max_attendees)
         )
+        if counts is None:
+            # Full (or missing): take the next waitlist position instead
+            sequence = await increment_counters(db, Event, event_id, {"waitlist_sequence": 1})
+            if sequence is None:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Event not found"
+                )
+            values = {"rsvp_status": RSVPStatus.WAITLISTED, "waitlist_position": sequence["waitlist_sequence"]}
+            if old_status is not None:
+                await db.execute(
+                    update(EventAttendee).where(*attendee_key).values(values)
+                    .execution_options(synchronize_session=False)
+                )
+    elif values is not None and old_status == RSVPStatus.GOING:
+        # Hand the seat to the head of the waitlist, or give it back
+        if not await _promote_waitlist(db, event_id, 1):
+            counts = await increment_counters(db, Event, event_id, {"current_attendees": -1})
     
-    # Check existing RSVP
-    existing_rsvp = db.query(EventAttendee).filter(
-        EventAttendee.event_id == event_id,
-        EventAttendee.user_id == current_user.id
-    ).first()
+    if values is not None and old_status is None:
+        try:
+            await db.execute(insert(EventAttendee).values(event_id=event_id, user_id=current_user.id, **values))
+        except IntegrityError:
+            # Unknown event, or a concurrent first RSVP by the same user;
+            # rolling back also returns any seat reserved above
+            await db.rollback()
+            exists = await db.scalar(select(Event.id).where(Event.id == event_id))
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT if exists else status.HTTP_404_NOT_FOUND,
+                detail="RSVP changed by another request, please retry" if exists else "Event not found"
+            )
     
-    if existing_rsvp:
-        # Update RSVP
-        old_status = existing_rsvp.rsvp_status
-        existing_rsvp.rsvp_status = rsvp_data.rsvp_status
-        
-        # Update attendee count
-        if old_status == RSVPStatus.GOING and rsvp_data.rsvp_status != RSVPStatus.GOING:
-            event.current_attendees -= 1
-        elif old_status != RSVPStatus.GOING and rsvp_data.rsvp_status == RSVPStatus.GOING:
-            event.current_attendees += 1
+    if counts is None:
+        # Counter unchanged by this request (or changed by a promotion)
+        current_attendees = await db.scalar(select(Event.current_attendees).where(Event.id == event_id))
+        if current_attendees is None:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
     else:
-        # Create new RSVP
-        new_rsvp = EventAttendee(
-            event_id=event_id,
-            user_id=current_user.id,
-            rsvp_status=rsvp_data.rsvp_status
-        )
-        db.add(new_rsvp)
-        
-        if rsvp_data.rsvp_status == RSVPStatus.GOING:
-            event.current_attendees += 1
+        current_attendees = counts["current_attendees"]
+    await db.commit()
+    await cache.invalidate_tags(f"event:{event_id}")
     
-    db.commit()
-    return {
+    result = {
         "message": "RSVP updated",
-        "rsvp_status": rsvp_data.rsvp_status,
-        "current_attendees": event.current_attendees
+        "rsvp_status": values["rsvp_status"] if values else old_status,
+        "current_attendees": current_attendees,
     }
+    if result["rsvp_status"] == RSVPStatus.WAITLISTED:
+        position = values["waitlist_position"] if values else await db.scalar(
+            select(EventAttendee.waitlist_position).where(*attendee_key)
+        )
+        if position is not None:
+            # Place in the queue, counting only people still waiting
+            result["waitlist_position"] = await db.scalar(
+                select(func.count()).select_from(EventAttendee).where(
+                    EventAttendee.event_id == event_id,
+                    EventAttendee.rsvp_status == RSVPStatus.WAITLISTED,
+                    EventAttendee.waitlist_position <= position
+                )
+            )
+    return result
 
 
 @router.get("/{event_id}/attendees")
 async def get_event_attendees(
     event_id: str,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
     rsvp_status: Optional[RSVPStatus] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all attendees for an event."""
-    query = db.query(EventAttendee).filter(EventAttendee.event_id == event_id)
+    """
+    Get all attendees for an event, in RSVP order.
+    
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    """
+    query = select(EventAttendee).where(EventAttendee.event_id == event_id)
     
     if rsvp_status:
-        query = query.filter(EventAttendee.rsvp_status == rsvp_status)
+        query = query.where(EventAttendee.rsvp_status == rsvp_status)
+    
+    query = keyset_paginate(
+        query, EventAttendee.created_at, EventAttendee.user_id, "created_at", "asc", cursor
+    )
+    if not cursor:
+        query = query.offset(skip)
     
-    attendees = query.offset(skip).limit(limit).all()
+    attendees = (await db.scalars(query.limit(limit))).all()
+    set_next_cursor(response, attendees, "created_at", "asc", limit, id_attr="user_id")
     return attendees
 
 
@@ -231,21 +366,21 @@ async def get_my_events(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all events I'm attending."""
     # Get event IDs where user is attending
-    event_ids = db.query(EventAttendee.event_id).filter(
+    event_ids = (await db.execute(select(EventAttendee.event_id).where(
         EventAttendee.user_id == current_user.id,
         EventAttendee.rsvp_status == RSVPStatus.GOING
-    ).all()
+    ))).all()
     
     event_ids = [e[0] for e in event_ids]
     
-    events = db.query(Event).filter(
+    events = (await db.scalars(select(Event).where(
         Event.id.in_(event_ids),
         Event.is_active == True
-    ).order_by(Event.start_time.asc()).offset(skip).limit(limit).all()
+    ).order_by(Event.start_time.asc()).offset(skip).limit(limit))).all()
     
     return events
 
@@ -255,11 +390,11 @@ async def get_my_organized_events(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all events I'm organizing."""
-    events = db.query(Event).filter(
+    events = (await db.scalars(select(Event).where(
         Event.organizer_id == current_user.id
-    ).order_by(Event.start_time.desc()).offset(skip).limit(limit).all()
+    ).order_by(Event.start_time.desc()).offset(skip).limit(limit))).all()
     
     return events
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_async_db
+from app.core.pagination import keyset_paginate, set_next_cursor
+from app.core.search import apply_search
+from app.core.cache import cache, cached
+from app.core.counters import counter_buffer
 from app.models.mysql.models import User
 from app.models.mysql.enhanced_models import (
     JobPosting, JobApplication, Resume, JobType, JobLocation, ApplicationStatus
@@ -22,7 +27,7 @@ router = APIRouter()
 async def create_job_posting(
     job_data: JobPostingCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new job posting.
@@ -33,15 +38,17 @@ async def create_job_posting(
         posted_by=current_user.id
     )
     db.add(job)
-    db.commit()
-    db.refresh(job)
+    await db.commit()
+    await db.refresh(job)
     return job
 
 
 @router.get("/", response_model=List[JobPostingResponse])
 async def list_jobs(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     job_type: Optional[JobType] = None,
     location_type: Optional[JobLocation] = None,
     location: Optional[str] = None,
@@ -51,78 +58,98 @@ async def list_jobs(
     max_salary: Optional[int] = None,
     experience_max: Optional[int] = None,
     is_active: bool = True,
-    sort_by: str = Query("created_at", regex="^(created_at|views|applications_count)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|created_at|views|applications_count)$"),
     order: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all job postings with filters.
     
+    Pagination: pass the X-Next-Cursor response header back as `cursor`
+    to fetch the next page by keyset instead of `skip`.
+    
     Filters:
     - job_type: Filter by job type (internship, full_time, etc.)
     - location_type: Filter by location type (remote, onsite, hybrid)
     - location: Filter by location
     - company: Filter by company name
-    - search: Search in title and description
+    - search: Full-text search in title and description, ranked by relevance
     - min_salary, max_salary: Salary range filter
     - experience_max: Maximum years of experience required
     """
-    query = db.query(JobPosting).filter(JobPosting.is_active == is_active)
+    query = select(JobPosting).where(JobPosting.is_active == is_active)
     
     # Apply filters
     if job_type:
-        query = query.filter(JobPosting.job_type == job_type)
+        query = query.where(JobPosting.job_type == job_type)
     if location_type:
-        query = query.filter(JobPosting.location_type == location_type)
+        query = query.where(JobPosting.location_type == location_type)
     if location:
-        query = query.filter(JobPosting.location.ilike(f"%{location}%"))
+        query = query.where(JobPosting.location.ilike(f"%{location}%"))
     if company:
-        query = query.filter(JobPosting.company.ilike(f"%{company}%"))
+        query = query.where(JobPosting.company.ilike(f"%{company}%"))
+    relevance = None
     if search:
-        query = query.filter(
-            (JobPosting.title.ilike(f"%{search}%")) | 
-            (JobPosting.description.ilike(f"%{search}%"))
-        )
+        query, relevance = apply_search(query, JobPosting, search)
     if min_salary is not None:
-        query = query.filter(JobPosting.salary_min >= min_salary)
+        query = query.where(JobPosting.salary_min >= min_salary)
     if max_salary is not None:
-        query = query.filter(JobPosting.salary_max <= max_salary)
+        query = query.where(JobPosting.salary_max <= max_salary)
     if experience_max is not None:
-        query = query.filter(JobPosting.experience_max <= experience_max)
+        query = query.where(JobPosting.experience_max <= experience_max)
     
     # Filter out expired jobs
-    query = query.filter(
+    query = query.where(
         (JobPosting.expires_at == None) | (JobPosting.expires_at > datetime.utcnow())
     )
     
-    # Sorting
-    sort_column = getattr(JobPosting, sort_by)
-    if order == "desc":
-        query = query.order_by(sort_column.desc())
+    # Sorting and pagination; searches default to best match first
+    if sort_by in (None, "relevance"):
+        sort_by = "relevance" if relevance is not None else "created_at"
+    if sort_by == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available for relevance ordering"
+            )
+        # Best match first, regardless of `order`
+        query = query.order_by(relevance.desc(), JobPosting.id)
     else:
-        query = query.order_by(sort_column.asc())
+        query = keyset_paginate(query, getattr(JobPosting, sort_by), JobPosting.id, sort_by, order, cursor)
+    
+    # `skip` is kept for compatibility; a cursor seeks instead
+    if not cursor:
+        query = query.offset(skip)
     
-    jobs = query.offset(skip).limit(limit).all()
+    jobs = (await db.scalars(query.limit(limit))).all()
+    if sort_by != "relevance":
+        set_next_cursor(response, jobs, sort_by, order, limit)
     return jobs
 
 
 @router.get("/{job_id}", response_model=JobPostingResponse)
 async def get_job(
     job_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific job posting by ID."""
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
+    job = await _cached_job(job_id, db)
+    
+    # Counted on cache hits too; buffered and written in batches by the
+    # counter flush task
+    counter_buffer.increment(JobPosting, job.id)
+    
+    return job
+
+
+@cached("job:{job_id}", JobPostingResponse, tags=["job:{job_id}"])
+async def _cached_job(job_id: str, db: AsyncSession):
+    job = await db.scalar(select(JobPosting).where(JobPosting.id == job_id))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job posting not found"
         )
-    
-    # Increment views
-    job.views += 1
-    db.commit()
-    
     return job
 
 
@@ -131,10 +158,10 @@ async def update_job(
     job_id: str,
     job_data: JobPostingUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a job posting (only by poster)."""
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
+    job = await db.scalar(select(JobPosting).where(JobPosting.id == job_id))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -150,8 +177,9 @@ async def update_job(
     for field, value in job_data.dict(exclude_unset=True).items():
         setattr(job, field, value)
     
-    db.commit()
-    db.refresh(job)
+    await db.commit()
+    await cache.invalidate_tags(f"job:{job_id}")
+    await db.refresh(job)
     return job
 
 
@@ -159,10 +187,10 @@ async def update_job(
 async def delete_job(
     job_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a job posting (only by poster)."""
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
+    job = await db.scalar(select(JobPosting).where(JobPosting.id == job_id))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -175,8 +203,9 @@ async def delete_job(
             detail="Not authorized to delete this job posting"
         )
     
-    db.delete(job)
-    db.commit()
+    await db.delete(job)
+    await db.commit()
+    await cache.invalidate_tags(f"job:{job_id}")
     return None
 
 
@@ -187,14 +216,14 @@ async def apply_for_job(
     job_id: str,
     application_data: JobApplicationCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Apply for a job posting."""
     # Check if job exists and is active
-    job = db.query(JobPosting).filter(
+    job = await db.scalar(select(JobPosting).where(
         JobPosting.id == job_id,
         JobPosting.is_active == True
-    ).first()
+    ))
     
     if not job:
         raise HTTPException(
@@ -203,10 +232,10 @@ async def apply_for_job(
         )
     
     # Check if already applied
-    existing_application = db.query(JobApplication).filter(
+    existing_application = await db.scalar(select(JobApplication).where(
         JobApplication.job_id == job_id,
         JobApplication.user_id == current_user.id
-    ).first()
+    ))
     
     if existing_application:
         raise HTTPException(
@@ -225,8 +254,9 @@ async def apply_for_job(
     # Increment applications count
     job.applications_count += 1
     
-    db.commit()
-    db.refresh(application)
+    await db.commit()
+    await cache.invalidate_tags(f"job:{job_id}")
+    await db.refresh(application)
     return application
 
 
@@ -236,15 +266,15 @@ async def get_my_applications(
     limit: int = Query(20, ge=1, le=100),
     status_filter: Optional[ApplicationStatus] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all my job applications."""
-    query = db.query(JobApplication).filter(JobApplication.user_id == current_user.id)
+    query = select(JobApplication).where(JobApplication.user_id == current_user.id)
     
     if status_filter:
-        query = query.filter(JobApplication.status == status_filter)
+        query = query.where(JobApplication.status == status_filter)
     
-    applications = query.order_by(JobApplication.applied_at.desc()).offset(skip).limit(limit).all()
+    applications = (await db.scalars(query.order_by(JobApplication.applied_at.desc()).offset(skip).limit(limit))).all()
     return applications
 
 
@@ -255,10 +285,10 @@ async def get_job_applications(
     limit: int = Query(20, ge=1, le=100),
     status_filter: Optional[ApplicationStatus] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all applications for a job (only by job poster)."""
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
+    job = await db.scalar(select(JobPosting).where(JobPosting.id == job_id))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -271,12 +301,12 @@ async def get_job_applications(
             detail="Not authorized to view applications"
         )
     
-    query = db.query(JobApplication).filter(JobApplication.job_id == job_id)
+    query = select(JobApplication).where(JobApplication.job_id == job_id)
     
     if status_filter:
-        query = query.filter(JobApplication.status == status_filter)
+        query = query.where(JobApplication.status == status_filter)
     
-    applications = query.order_by(JobApplication.applied_at.desc()).offset(skip).limit(limit).all()
+    applications = (await db.scalars(query.order_by(JobApplication.applied_at.desc()).offset(skip).limit(limit))).all()
     return applications
 
 
@@ -286,10 +316,10 @@ async def update_application_status(
     new_status: ApplicationStatus,
     notes: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update application status (only by job poster)."""
-    application = db.query(JobApplication).filter(JobApplication.id == application_id).first()
+    application = await db.scalar(select(JobApplication).where(JobApplication.id == application_id))
     if not application:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -297,7 +327,7 @@ async def update_application_status(
         )
     
     # Check if user is the job poster
-    job = db.query(JobPosting).filter(JobPosting.id == application.job_id).first()
+    job = await db.scalar(select(JobPosting).where(JobPosting.id == application.job_id))
     if job.posted_by != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -308,8 +338,8 @@ async def update_application_status(
     if notes:
         application.notes = notes
     
-    db.commit()
-    db.refresh(application)
+    await db.commit()
+    await db.refresh(application)
     return application
 
 
@@ -319,35 +349,35 @@ async def update_application_status(
 async def upload_resume(
     resume_data: ResumeCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a new resume."""
     # If setting as primary, unset other primary resumes
     if resume_data.is_primary:
-        db.query(Resume).filter(
+        await db.execute(update(Resume).where(
             Resume.user_id == current_user.id,
             Resume.is_primary == True
-        ).update({"is_primary": False})
+        ).values(is_primary=False))
     
     resume = Resume(
         **resume_data.dict(),
         user_id=current_user.id
     )
     db.add(resume)
-    db.commit()
-    db.refresh(resume)
+    await db.commit()
+    await db.refresh(resume)
     return resume
 
 
 @router.get("/resumes/me", response_model=List[ResumeResponse])
 async def get_my_resumes(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all my resumes."""
-    resumes = db.query(Resume).filter(
+    resumes = (await db.scalars(select(Resume).where(
         Resume.user_id == current_user.id
-    ).order_by(Resume.is_primary.desc(), Resume.created_at.desc()).all()
+    ).order_by(Resume.is_primary.desc(), Resume.created_at.desc()))).all()
     return resumes
 
 
@@ -355,13 +385,13 @@ async def get_my_resumes(
 async def delete_resume(
     resume_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a resume."""
-    resume = db.query(Resume).filter(
+    resume = await db.scalar(select(Resume).where(
         Resume.id == resume_id,
         Resume.user_id == current_user.id
-    ).first()
+    ))
     
     if not resume:
         raise HTTPException(
@@ -369,6 +399,6 @@ async def delete_resume(
             detail="Resume not found"
         )
     
-    db.delete(resume)
-    db.commit()
+    await db.delete(resume)
+    await db.commit()
     return None
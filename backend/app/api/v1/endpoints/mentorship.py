@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_async_db
 from app.models.mysql.models import User
 from app.models.mysql.enhanced_models import (
     MentorProfile, Mentorship, MentorshipSession, MentorshipStatus, SessionStatus
@@ -21,13 +22,13 @@ router = APIRouter()
 async def become_mentor(
     mentor_data: MentorProfileCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register as a mentor."""
     # Check if already a mentor
-    existing = db.query(MentorProfile).filter(
+    existing = await db.scalar(select(MentorProfile).where(
         MentorProfile.user_id == current_user.id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(
@@ -40,8 +41,8 @@ async def become_mentor(
         **mentor_data.dict()
     )
     db.add(mentor_profile)
-    db.commit()
-    db.refresh(mentor_profile)
+    await db.commit()
+    await db.refresh(mentor_profile)
     return mentor_profile
 
 
@@ -55,7 +56,7 @@ async def list_mentors(
     is_active: bool = True,
     sort_by: str = Query("rating", regex="^(rating|total_sessions|created_at)$"),
     order: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all mentors with filters.
@@ -65,18 +66,18 @@ async def list_mentors(
     - min_rating: Minimum rating
     - max_rate: Maximum hourly rate
     """
-    query = db.query(MentorProfile).filter(MentorProfile.is_active == is_active)
+    query = select(MentorProfile).where(MentorProfile.is_active == is_active)
     
     # Filter by available mentors (not at max capacity)
-    query = query.filter(MentorProfile.current_mentees < MentorProfile.max_mentees)
+    query = query.where(MentorProfile.current_mentees < MentorProfile.max_mentees)
     
     if expertise:
         # Search in JSON array
-        query = query.filter(MentorProfile.expertise.contains([expertise]))
+        query = query.where(MentorProfile.expertise.contains([expertise]))
     if min_rating is not None:
-        query = query.filter(MentorProfile.rating >= min_rating)
+        query = query.where(MentorProfile.rating >= min_rating)
     if max_rate is not None:
-        query = query.filter(MentorProfile.hourly_rate <= max_rate)
+        query = query.where(MentorProfile.hourly_rate <= max_rate)
     
     # Sorting
     sort_column = getattr(MentorProfile, sort_by)
@@ -85,17 +86,17 @@ async def list_mentors(
     else:
         query = query.order_by(sort_column.asc())
     
-    mentors = query.offset(skip).limit(limit).all()
+    mentors = (await db.scalars(query.offset(skip).limit(limit))).all()
     return mentors
 
 
 @router.get("/mentors/{user_id}", response_model=MentorProfileResponse)
 async def get_mentor_profile(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific mentor profile."""
-    mentor = db.query(MentorProfile).filter(MentorProfile.user_id == user_id).first()
+    mentor = await db.scalar(select(MentorProfile).where(MentorProfile.user_id == user_id))
     if not mentor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -108,12 +109,12 @@ async def get_mentor_profile(
 async def update_mentor_profile(
     mentor_data: MentorProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update my mentor profile."""
-    mentor = db.query(MentorProfile).filter(
+    mentor = await db.scalar(select(MentorProfile).where(
         MentorProfile.user_id == current_user.id
-    ).first()
+    ))
     
     if not mentor:
         raise HTTPException(
@@ -124,8 +125,8 @@ async def update_mentor_profile(
     for field, value in mentor_data.dict(exclude_unset=True).items():
         setattr(mentor, field, value)
     
-    db.commit()
-    db.refresh(mentor)
+    await db.commit()
+    await db.refresh(mentor)
     return mentor
 
 
@@ -135,14 +136,14 @@ async def update_mentor_profile(
 async def request_mentorship(
     request_data: MentorshipRequestCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Request mentorship from a mentor."""
     # Check if mentor exists and is active
-    mentor = db.query(MentorProfile).filter(
+    mentor = await db.scalar(select(MentorProfile).where(
         MentorProfile.user_id == request_data.mentor_id,
         MentorProfile.is_active == True
-    ).first()
+    ))
     
     if not mentor:
         raise HTTPException(
@@ -158,11 +159,11 @@ async def request_mentorship(
         )
     
     # Check if already requested
-    existing = db.query(Mentorship).filter(
+    existing = await db.scalar(select(Mentorship).where(
         Mentorship.mentee_id == current_user.id,
         Mentorship.mentor_id == request_data.mentor_id,
         Mentorship.status.in_([MentorshipStatus.PENDING, MentorshipStatus.ACTIVE])
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(
@@ -177,8 +178,8 @@ async def request_mentorship(
         goals=request_data.goals
     )
     db.add(mentorship)
-    db.commit()
-    db.refresh(mentorship)
+    await db.commit()
+    await db.refresh(mentorship)
     return mentorship
 
 
@@ -187,18 +188,18 @@ async def get_my_mentorships(
     status_filter: Optional[MentorshipStatus] = None,
     as_mentor: bool = False,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all my mentorships (as mentee or mentor)."""
     if as_mentor:
-        query = db.query(Mentorship).filter(Mentorship.mentor_id == current_user.id)
+        query = select(Mentorship).where(Mentorship.mentor_id == current_user.id)
     else:
-        query = db.query(Mentorship).filter(Mentorship.mentee_id == current_user.id)
+        query = select(Mentorship).where(Mentorship.mentee_id == current_user.id)
     
     if status_filter:
-        query = query.filter(Mentorship.status == status_filter)
+        query = query.where(Mentorship.status == status_filter)
     
-    mentorships = query.order_by(Mentorship.created_at.desc()).all()
+    mentorships = (await db.scalars(query.order_by(Mentorship.created_at.desc()))).all()
     return mentorships
 
 
@@ -207,10 +208,10 @@ async def update_mentorship_status(
     mentorship_id: str,
     new_status: MentorshipStatus,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update mentorship status (accept/reject by mentor, cancel by either party)."""
-    mentorship = db.query(Mentorship).filter(Mentorship.id == mentorship_id).first()
+    mentorship = await db.scalar(select(Mentorship).where(Mentorship.id == mentorship_id))
     if not mentorship:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -236,23 +237,23 @@ async def update_mentorship_status(
             )
         
         # Update mentor's mentee count
-        mentor = db.query(MentorProfile).filter(
+        mentor = await db.scalar(select(MentorProfile).where(
             MentorProfile.user_id == mentorship.mentor_id
-        ).first()
+        ))
         mentor.current_mentees += 1
     
     # Handle completion or cancellation
     if new_status in [MentorshipStatus.COMPLETED, MentorshipStatus.CANCELLED]:
         if mentorship.status == MentorshipStatus.ACTIVE:
             # Decrease mentor's mentee count
-            mentor = db.query(MentorProfile).filter(
+            mentor = await db.scalar(select(MentorProfile).where(
                 MentorProfile.user_id == mentorship.mentor_id
-            ).first()
+            ))
             mentor.current_mentees -= 1
     
     mentorship.status = new_status
-    db.commit()
-    db.refresh(mentorship)
+    await db.commit()
+    await db.refresh(mentorship)
     return mentorship
 
 
@@ -262,14 +263,14 @@ async def update_mentorship_status(
 async def schedule_session(
     session_data: SessionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Schedule a mentorship session."""
     # Check if mentorship exists and is active
-    mentorship = db.query(Mentorship).filter(
+    mentorship = await db.scalar(select(Mentorship).where(
         Mentorship.id == session_data.mentorship_id,
         Mentorship.status == MentorshipStatus.ACTIVE
-    ).first()
+    ))
     
     if not mentorship:
         raise HTTPException(
@@ -288,8 +289,8 @@ async def schedule_session(
         **session_data.dict()
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
@@ -299,25 +300,25 @@ async def get_my_sessions(
     limit: int = Query(20, ge=1, le=100),
     status_filter: Optional[SessionStatus] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all my mentorship sessions."""
     # Get all mentorships where user is involved
-    mentorship_ids = db.query(Mentorship.id).filter(
+    mentorship_ids = (await db.execute(select(Mentorship.id).where(
         (Mentorship.mentee_id == current_user.id) | 
         (Mentorship.mentor_id == current_user.id)
-    ).all()
+    ))).all()
     
     mentorship_ids = [m[0] for m in mentorship_ids]
     
-    query = db.query(MentorshipSession).filter(
+    query = select(MentorshipSession).where(
         MentorshipSession.mentorship_id.in_(mentorship_ids)
     )
     
     if status_filter:
-        query = query.filter(MentorshipSession.status == status_filter)
+        query = query.where(MentorshipSession.status == status_filter)
     
-    sessions = query.order_by(MentorshipSession.scheduled_at.desc()).offset(skip).limit(limit).all()
+    sessions = (await db.scalars(query.order_by(MentorshipSession.scheduled_at.desc()).offset(skip).limit(limit))).all()
     return sessions
 
 
@@ -326,12 +327,12 @@ async def update_session(
     session_id: str,
     session_data: SessionUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a mentorship session."""
-    session = db.query(MentorshipSession).filter(
+    session = await db.scalar(select(MentorshipSession).where(
         MentorshipSession.id == session_id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(
@@ -340,9 +341,9 @@ async def update_session(
         )
     
     # Check if user is part of the mentorship
-    mentorship = db.query(Mentorship).filter(
+    mentorship = await db.scalar(select(Mentorship).where(
         Mentorship.id == session.mentorship_id
-    ).first()
+    ))
     
     if current_user.id not in [mentorship.mentee_id, mentorship.mentor_id]:
         raise HTTPException(
@@ -355,9 +356,9 @@ async def update_session(
     
     # Update mentor stats if session is completed with rating
     if session_data.status == SessionStatus.COMPLETED and session_data.rating:
-        mentor = db.query(MentorProfile).filter(
+        mentor = await db.scalar(select(MentorProfile).where(
             MentorProfile.user_id == mentorship.mentor_id
-        ).first()
+        ))
         
         # Update total sessions
         mentor.total_sessions += 1
@@ -368,8 +369,8 @@ async def update_session(
         else:
             mentor.rating = (mentor.rating * (mentor.total_sessions - 1) + session_data.rating) / mentor.total_sessions
     
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
@@ -377,12 +378,12 @@ async def update_session(
 async def cancel_session(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel a mentorship session."""
-    session = db.query(MentorshipSession).filter(
+    session = await db.scalar(select(MentorshipSession).where(
         MentorshipSession.id == session_id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(
@@ -391,9 +392,9 @@ async def cancel_session(
         )
     
     # Check if user is part of the mentorship
-    mentorship = db.query(Mentorship).filter(
+    mentorship = await db.scalar(select(Mentorship).where(
         Mentorship.id == session.mentorship_id
-    ).first()
+    ))
     
     if current_user.id not in [mentorship.mentee_id, mentorship.mentor_id]:
         raise HTTPException(
@@ -402,5 +403,5 @@ async def cancel_session(
         )
     
     session.status = SessionStatus.CANCELLED
-    db.commit()
+    await db.commit()
     return None
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_async_db
+from app.core.pagination import keyset_paginate, set_next_cursor
+from app.core.search import apply_search
+from app.core.cache import cache, cached
+from app.core.counters import counter_buffer, increment_counters, lock_row
 from app.models.mysql.models import User
 from app.models.mysql.enhanced_models import (
     Project, ProjectCollaborator, ProjectComment, ProjectLike
@@ -18,7 +24,7 @@ router = APIRouter()
 async def create_project(
     project_data: ProjectCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new project showcase."""
     project = Project(
@@ -26,75 +32,97 @@ async def create_project(
         user_id=current_user.id
     )
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
     return project
 
 
 @router.get("/", response_model=List[ProjectResponse])
 async def list_projects(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
     tech_stack: Optional[str] = None,
     is_featured: Optional[bool] = None,
-    sort_by: str = Query("created_at", regex="^(created_at|likes|views)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|created_at|likes|views)$"),
     order: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all projects with filters.
     
+    Pagination: pass the X-Next-Cursor response header back as `cursor`
+    to fetch the next page by keyset instead of `skip`.
+    
     Filters:
     - category: Filter by project category
-    - search: Search in title and description
+    - search: Full-text search in title and description, ranked by relevance
     - tech_stack: Filter by technology
     - is_featured: Show only featured projects
     """
-    query = db.query(Project).filter(Project.is_active == True)
+    query = select(Project).where(Project.is_active == True)
     
     if category:
-        query = query.filter(Project.category == category)
+        query = query.where(Project.category == category)
+    relevance = None
     if search:
-        query = query.filter(
-            (Project.title.ilike(f"%{search}%")) | 
-            (Project.description.ilike(f"%{search}%"))
-        )
+        query, relevance = apply_search(query, Project, search)
     if tech_stack:
         # Search in JSON array
-        query = query.filter(Project.tech_stack.contains([tech_stack]))
+        query = query.where(Project.tech_stack.contains([tech_stack]))
     if is_featured is not None:
-        query = query.filter(Project.is_featured == is_featured)
+        query = query.where(Project.is_featured == is_featured)
     
-    # Sorting
-    sort_column = getattr(Project, sort_by)
-    if order == "desc":
-        query = query.order_by(sort_column.desc())
+    # Sorting and pagination; searches default to best match first
+    if sort_by in (None, "relevance"):
+        sort_by = "relevance" if relevance is not None else "created_at"
+    if sort_by == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available for relevance ordering"
+            )
+        # Best match first, regardless of `order`
+        query = query.order_by(relevance.desc(), Project.id)
     else:
-        query = query.order_by(sort_column.asc())
+        query = keyset_paginate(query, getattr(Project, sort_by), Project.id, sort_by, order, cursor)
+    
+    # `skip` is kept for compatibility; a cursor seeks instead
+    if not cursor:
+        query = query.offset(skip)
     
-    projects = query.offset(skip).limit(limit).all()
+    projects = (await db.scalars(query.limit(limit))).all()
+    if sort_by != "relevance":
+        set_next_cursor(response, projects, sort_by, order, limit)
     return projects
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific project by ID."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await _cached_project(project_id, db)
+    
+    # Counted on cache hits too; buffered and written in batches by the
+    # counter flush task
+    counter_buffer.increment(Project, project.id)
+    
+    return project
+
+
+@cached("project:{project_id}", ProjectResponse, tags=["project:{project_id}"])
+async def _cached_project(project_id: str, db: AsyncSession):
+    project = await db.scalar(select(Project).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
-    
-    # Increment views
-    project.views += 1
-    db.commit()
-    
     return project
 
 
@@ -103,10 +131,10 @@ async def update_project(
     project_id: str,
     project_data: ProjectUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a project (only by owner or collaborators)."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.scalar(select(Project).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -114,10 +142,10 @@ async def update_project(
         )
     
     # Check if user is owner or collaborator
-    is_collaborator = db.query(ProjectCollaborator).filter(
+    is_collaborator = await db.scalar(select(ProjectCollaborator).where(
         ProjectCollaborator.project_id == project_id,
         ProjectCollaborator.user_id == current_user.id
-    ).first()
+    ))
     
     if project.user_id != current_user.id and not is_collaborator:
         raise HTTPException(
@@ -128,8 +156,9 @@ async def update_project(
     for field, value in project_data.dict(exclude_unset=True).items():
         setattr(project, field, value)
     
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await cache.invalidate_tags(f"project:{project_id}")
+    await db.refresh(project)
     return project
 
 
@@ -137,10 +166,10 @@ async def update_project(
 async def delete_project(
     project_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a project (only by owner)."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.scalar(select(Project).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,8 +182,9 @@ async def delete_project(
             detail="Not authorized to delete this project"
         )
     
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
+    await cache.invalidate_tags(f"project:{project_id}")
     return None
 
 
@@ -162,39 +192,42 @@ async def delete_project(
 async def like_project(
     project_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Like or unlike a project."""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    """
+    Like or unlike a project.
+
+    The like row is deleted or inserted by primary key and the counter is
+    adjusted in the same transaction with an atomic UPDATE, so concurrent
+    clicks never lose a count. The project row is locked first, so
+    concurrent likes of one project queue instead of deadlocking.
+    """
+    if not await lock_row(db, Project, project_id):
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
-    
-    # Check if already liked
-    existing_like = db.query(ProjectLike).filter(
+    unliked = await db.execute(delete(ProjectLike).where(
         ProjectLike.project_id == project_id,
         ProjectLike.user_id == current_user.id
-    ).first()
-    
-    if existing_like:
-        # Unlike
-        db.delete(existing_like)
-        project.likes -= 1
-        message = "Project unliked"
-    else:
-        # Like
-        new_like = ProjectLike(
-            project_id=project_id,
-            user_id=current_user.id
-        )
-        db.add(new_like)
-        project.likes += 1
-        message = "Project liked"
+    ))
+    if unliked.rowcount:
+        counts = await increment_counters(db, Project, project_id, {"likes": -1})
+        await db.commit()
+        await cache.invalidate_tags(f"project:{project_id}")
+        return {"message": "Project unliked", "likes": counts["likes"]}
     
-    db.commit()
-    return {"message": message, "likes": project.likes}
+    counts = await increment_counters(db, Project, project_id, {"likes": 1})
+    try:
+        await db.execute(insert(ProjectLike).values(project_id=project_id, user_id=current_user.id))
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request from the same user liked it first
+        await db.rollback()
+        counts = {"likes": await db.scalar(select(Project.likes).where(Project.id == project_id))}
+    await cache.invalidate_tags(f"project:{project_id}")
+    return {"message": "Project liked", "likes": counts["likes"]}
 
 
 @router.post("/{project_id}/comments", response_model=ProjectCommentResponse, status_code=status.HTTP_201_CREATED)
@@ -202,10 +235,10 @@ async def add_comment(
     project_id: str,
     comment_data: ProjectCommentCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a comment to a project."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.scalar(select(Project).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -218,8 +251,8 @@ async def add_comment(
         **comment_data.dict()
     )
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment)
     return comment
 
 
@@ -228,12 +261,12 @@ async def get_comments(
     project_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all comments for a project."""
-    comments = db.query(ProjectComment).filter(
+    comments = (await db.scalars(select(ProjectComment).where(
         ProjectComment.project_id == project_id
-    ).order_by(ProjectComment.created_at.desc()).offset(skip).limit(limit).all()
+    ).order_by(ProjectComment.created_at.desc()).offset(skip).limit(limit))).all()
     
     return comments
 
@@ -244,10 +277,10 @@ async def add_collaborator(
     user_id: str,
     role: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a collaborator to a project (only by owner)."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.scalar(select(Project).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -261,7 +294,7 @@ async def add_collaborator(
         )
     
     # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -269,10 +302,10 @@ async def add_collaborator(
         )
     
     # Check if already a collaborator
-    existing = db.query(ProjectCollaborator).filter(
+    existing = await db.scalar(select(ProjectCollaborator).where(
         ProjectCollaborator.project_id == project_id,
         ProjectCollaborator.user_id == user_id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(
@@ -286,7 +319,7 @@ async def add_collaborator(
         role=role
     )
     db.add(collaborator)
-    db.commit()
+    await db.commit()
     
     return {"message": "Collaborator added successfully"}
 
@@ -296,10 +329,10 @@ async def remove_collaborator(
     project_id: str,
     user_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove a collaborator from a project (only by owner)."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.scalar(select(Project).where(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -312,10 +345,10 @@ async def remove_collaborator(
             detail="Only project owner can remove collaborators"
         )
     
-    collaborator = db.query(ProjectCollaborator).filter(
+    collaborator = await db.scalar(select(ProjectCollaborator).where(
         ProjectCollaborator.project_id == project_id,
         ProjectCollaborator.user_id == user_id
-    ).first()
+    ))
     
     if not collaborator:
         raise HTTPException(
@@ -323,8 +356,8 @@ async def remove_collaborator(
             detail="Collaborator not found"
         )
     
-    db.delete(collaborator)
-    db.commit()
+    await db.delete(collaborator)
+    await db.commit()
     return None
 
 
@@ -333,12 +366,12 @@ async def get_user_projects(
     user_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all projects by a specific user."""
-    projects = db.query(Project).filter(
+    projects = (await db.scalars(select(Project).where(
         Project.user_id == user_id,
         Project.is_active == True
-    ).order_by(Project.created_at.desc()).offset(skip).limit(limit).all()
+    ).order_by(Project.created_at.desc()).offset(skip).limit(limit))).all()
     
     return projects
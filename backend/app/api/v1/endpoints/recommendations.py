@@ -0,0 +1,177 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, List, Optional
+import asyncio
+import time
+from app.api.deps import get_current_active_user, get_current_admin_user, get_async_db
+from app.core.config import settings
+from app.ml.inference import HybridRecommender
+from app.ml.serving import (
+    POPULAR_LOADERS, model_holder, popular_pool, result_cache, run_with_budget, serving_metrics
+)
+from app.models.mysql.models import User
+from app.models.mysql.enhanced_models import Project, Event, PrecomputedRecommendation
+from app.schemas.schemas import UserResponse
+from app.schemas.enhanced_schemas import ProjectResponse, EventResponse
+
+router = APIRouter()
+
+RECOMMENDATION_SOURCE_HEADER = "X-Recommendation-Source"
+
+
+async def _recommend(
+    kind: str,
+    recommender: HybridRecommender,
+    version: Optional[str],
+    model,
+    user_id: str,
+    limit: int,
+    response: Response,
+    db: AsyncSession
+) -> List[str]:
+    """
+    Recommended IDs for a user: cached result, else the precomputed row
+    for the served model, else the model within the latency budget, else
+    the popular pool. `recommender` and `version` come from one
+    model_holder.get_versioned() call, so a swap mid-request can't file
+    one model's results under another's version.
+    """
+    start = time.perf_counter()
+    ready = model_holder.is_ready(recommender)
+    # Keyed by version so results from a replaced model are never served
+    key = (kind, user_id, limit, version)
+    source = "cache"
+    ids = result_cache.get(key)
+
+    if ids is None:
+        precomputed = await db.get(PrecomputedRecommendation, (user_id, kind))
+        if precomputed is not None and (
+            precomputed.model_version == version or not ready
+        ):
+            source = "precomputed"
+            ids = precomputed.item_ids[:limit]
+            result_cache.set(key, ids)
+
+    if ids is None:
+        candidates = [
+            item_id for item_id in await popular_pool.get(kind, lambda: POPULAR_LOADERS[kind](db))
+            if item_id != user_id
+        ]
+        source = "popular"
+        ids = candidates[:limit]
+        if ready:
+            try:
+                ids = await run_with_budget(model, candidates)
+                source = "model"
+                result_cache.set(key, ids)
+            except asyncio.TimeoutError:
+                pass
+
+    serving_metrics.record(kind, source, time.perf_counter() - start)
+    response.headers[RECOMMENDATION_SOURCE_HEADER] = source
+    return ids
+
+
+async def _load_in_order(db: AsyncSession, model_class, ids: List[str]) -> list:
+    """Fetch rows by ID in one query, keeping the order of `ids`"""
+    if not ids:
+        return []
+    rows = (await db.scalars(select(model_class).where(model_class.id.in_(ids)))).all()
+    by_id = {row.id: row for row in rows}
+    return [by_id[row_id] for row_id in ids if row_id in by_id]
+
+
+@router.get("/projects", response_model=List[ProjectResponse])
+async def recommend_projects(
+    response: Response,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recommended projects for the current user.
+
+    The X-Recommendation-Source header tells whether the result came from
+    the cache, the precomputed table, the model or the popular-items fallback.
+    """
+    recommender, version = model_holder.get_versioned()
+    ids = await _recommend(
+        "projects", recommender, version,
+        lambda candidates: recommender.recommend(current_user.id, candidate_items=candidates, n=limit),
+        current_user.id, limit, response, db
+    )
+    projects = await _load_in_order(db, Project, ids)
+    return [project for project in projects if project.is_active]
+
+
+@router.get("/projects/{project_id}/similar", response_model=List[ProjectResponse])
+async def similar_projects(
+    project_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """People who interacted with this project also interacted with these."""
+    recommender = model_holder.get()
+    ids = []
+    if model_holder.is_ready(recommender):
+        try:
+            similar = await run_with_budget(recommender.collaborative_filter.get_similar_items, project_id, limit)
+            ids = [item_id for item_id, _ in similar]
+        except asyncio.TimeoutError:
+            pass
+    projects = await _load_in_order(db, Project, ids)
+    return [project for project in projects if project.is_active]
+
+
+@router.get("/events", response_model=List[EventResponse])
+async def recommend_events(
+    response: Response,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Recommended upcoming events for the current user."""
+    recommender, version = model_holder.get_versioned()
+    ids = await _recommend(
+        "events", recommender, version,
+        lambda candidates: recommender.recommend(current_user.id, candidate_items=candidates, n=limit),
+        current_user.id, limit, response, db
+    )
+    events = await _load_in_order(db, Event, ids)
+    return [event for event in events if event.is_active]
+
+
+@router.get("/users", response_model=List[UserResponse])
+async def recommend_users(
+    response: Response,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Users with similar activity to the current user."""
+    recommender, version = model_holder.get_versioned()
+
+    def similar_users(candidates: List[str]) -> List[str]:
+        similar = [
+            user_id for user_id, _ in
+            recommender.collaborative_filter.get_similar_users(current_user.id, n=limit)
+        ]
+        # Top up with popular users when there are few similar ones
+        return (similar + [user_id for user_id in candidates if user_id not in similar])[:limit]
+
+    ids = await _recommend("users", recommender, version, similar_users, current_user.id, limit, response, db)
+    users = await _load_in_order(db, User, ids)
+    return [user for user in users if user.is_active]
+
+
+@router.get("/metrics")
+async def recommendation_metrics(admin: User = Depends(get_current_admin_user)):
+    """Cache hit rate, fallback counts and latency percentiles per recommendation kind (admins only)."""
+    recommender, version = model_holder.get_versioned()
+    return {
+        "model_ready": model_holder.is_ready(recommender),
+        "model_version": version,
+        "latency_budget_ms": settings.ML_LATENCY_BUDGET_MS,
+        "kinds": serving_metrics.snapshot(),
+    }
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_async_db
+from app.core.pagination import keyset_paginate, set_next_cursor
+from app.core.search import apply_search
+from app.core.counters import counter_buffer, increment_counters, lock_row
 from app.models.mysql.models import User
 from app.models.mysql.enhanced_models import (
     Resource, ResourceVote, ResourceCategory
@@ -18,7 +23,7 @@ router = APIRouter()
 async def create_resource(
     resource_data: ResourceCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new resource.
@@ -29,79 +34,94 @@ async def create_resource(
         user_id=current_user.id
     )
     db.add(resource)
-    db.commit()
-    db.refresh(resource)
+    await db.commit()
+    await db.refresh(resource)
     return resource
 
 
 @router.get("/", response_model=List[ResourceResponse])
 async def list_resources(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     category: Optional[ResourceCategory] = None,
     subject: Optional[str] = None,
     semester: Optional[int] = None,
     university: Optional[str] = None,
     search: Optional[str] = None,
-    sort_by: str = Query("created_at", regex="^(created_at|upvotes|downloads|views)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|created_at|upvotes|downloads|views)$"),
     order: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all resources with optional filters.
     
+    Pagination: pass the X-Next-Cursor response header back as `cursor`
+    to fetch the next page by keyset instead of `skip`.
+    
     Filters:
     - category: Filter by resource category
     - subject: Filter by subject
     - semester: Filter by semester
     - university: Filter by university
-    - search: Search in title and description
-    - sort_by: Sort by field (created_at, upvotes, downloads, views)
+    - search: Full-text search in title and description, ranked by relevance
+    - sort_by: Sort by field (relevance, created_at, upvotes, downloads, views)
     - order: Sort order (asc, desc)
     """
-    query = db.query(Resource).filter(Resource.is_active == True)
+    query = select(Resource).where(Resource.is_active == True)
     
     if category:
-        query = query.filter(Resource.category == category)
+        query = query.where(Resource.category == category)
     if subject:
-        query = query.filter(Resource.subject.ilike(f"%{subject}%"))
+        query = query.where(Resource.subject.ilike(f"%{subject}%"))
     if semester:
-        query = query.filter(Resource.semester == semester)
+        query = query.where(Resource.semester == semester)
     if university:
-        query = query.filter(Resource.university.ilike(f"%{university}%"))
+        query = query.where(Resource.university.ilike(f"%{university}%"))
+    relevance = None
     if search:
-        query = query.filter(
-            (Resource.title.ilike(f"%{search}%")) | 
-            (Resource.description.ilike(f"%{search}%"))
-        )
+        query, relevance = apply_search(query, Resource, search)
     
-    # Sorting
-    sort_column = getattr(Resource, sort_by)
-    if order == "desc":
-        query = query.order_by(sort_column.desc())
+    # Sorting and pagination; searches default to best match first
+    if sort_by in (None, "relevance"):
+        sort_by = "relevance" if relevance is not None else "created_at"
+    if sort_by == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available for relevance ordering"
+            )
+        # Best match first, regardless of `order`
+        query = query.order_by(relevance.desc(), Resource.id)
     else:
-        query = query.order_by(sort_column.asc())
+        query = keyset_paginate(query, getattr(Resource, sort_by), Resource.id, sort_by, order, cursor)
+    
+    # `skip` is kept for compatibility; a cursor seeks instead
+    if not cursor:
+        query = query.offset(skip)
     
-    resources = query.offset(skip).limit(limit).all()
+    resources = (await db.scalars(query.limit(limit))).all()
+    if sort_by != "relevance":
+        set_next_cursor(response, resources, sort_by, order, limit)
     return resources
 
 
 @router.get("/{resource_id}", response_model=ResourceResponse)
 async def get_resource(
     resource_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific resource by ID."""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = await db.scalar(select(Resource).where(Resource.id == resource_id))
     if not resource:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Resource not found"
         )
     
-    # Increment views
-    resource.views += 1
-    db.commit()
+    # Buffered; written in batches by the counter flush task
+    counter_buffer.increment(Resource, resource.id)
     
     return resource
 
@@ -111,10 +131,10 @@ async def update_resource(
     resource_id: str,
     resource_data: ResourceUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a resource (only by owner)."""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = await db.scalar(select(Resource).where(Resource.id == resource_id))
     if not resource:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,8 +150,8 @@ async def update_resource(
     for field, value in resource_data.dict(exclude_unset=True).items():
         setattr(resource, field, value)
     
-    db.commit()
-    db.refresh(resource)
+    await db.commit()
+    await db.refresh(resource)
     return resource
 
 
@@ -139,10 +159,10 @@ async def update_resource(
 async def delete_resource(
     resource_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a resource (only by owner)."""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = await db.scalar(select(Resource).where(Resource.id == resource_id))
     if not resource:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,8 +175,8 @@ async def delete_resource(
             detail="Not authorized to delete this resource"
         )
     
-    db.delete(resource)
-    db.commit()
+    await db.delete(resource)
+    await db.commit()
     return None
 
 
@@ -165,64 +185,65 @@ async def vote_resource(
     resource_id: str,
     vote_data: ResourceVoteCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Upvote or downvote a resource."""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
-    if not resource:
+    """
+    Upvote or downvote a resource.
+
+    Repeating the same vote removes it; the opposite vote switches it. The
+    vote row is changed by primary key and the counters with one atomic
+    UPDATE, so concurrent votes never lose a count. The resource row is
+    locked first, so concurrent votes on one resource queue instead of
+    deadlocking.
+    """
+    vote_type = vote_data.vote_type
+    other_type = "downvote" if vote_type == "upvote" else "upvote"
+    counter = {"upvote": "upvotes", "downvote": "downvotes"}
+    vote_key = (ResourceVote.resource_id == resource_id, ResourceVote.user_id == current_user.id)
+    # Both counters are returned, so both are in the UPDATE
+    increments = {"upvotes": 0, "downvotes": 0}
+    new_vote = False
+    
+    if not await lock_row(db, Resource, resource_id):
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Resource not found"
         )
-    
-    # Check if user already voted
-    existing_vote = db.query(ResourceVote).filter(
-        ResourceVote.resource_id == resource_id,
-        ResourceVote.user_id == current_user.id
-    ).first()
-    
-    if existing_vote:
-        # Update vote if different
-        if existing_vote.vote_type != vote_data.vote_type:
-            # Remove old vote count
-            if existing_vote.vote_type == "upvote":
-                resource.upvotes -= 1
-            else:
-                resource.downvotes -= 1
-            
-            # Add new vote count
-            if vote_data.vote_type == "upvote":
-                resource.upvotes += 1
-            else:
-                resource.downvotes += 1
-            
-            existing_vote.vote_type = vote_data.vote_type
-        else:
-            # Remove vote if same
-            if vote_data.vote_type == "upvote":
-                resource.upvotes -= 1
-            else:
-                resource.downvotes -= 1
-            db.delete(existing_vote)
+    removed = await db.execute(delete(ResourceVote).where(*vote_key, ResourceVote.vote_type == vote_type))
+    if removed.rowcount:
+        increments[counter[vote_type]] -= 1
     else:
-        # Create new vote
-        new_vote = ResourceVote(
-            resource_id=resource_id,
-            user_id=current_user.id,
-            vote_type=vote_data.vote_type
+        switched = await db.execute(
+            update(ResourceVote)
+            .where(*vote_key, ResourceVote.vote_type == other_type)
+            .values(vote_type=vote_type)
+            .execution_options(synchronize_session=False)
         )
-        db.add(new_vote)
-        
-        if vote_data.vote_type == "upvote":
-            resource.upvotes += 1
+        increments[counter[vote_type]] += 1
+        if switched.rowcount:
+            increments[counter[other_type]] -= 1
         else:
-            resource.downvotes += 1
+            new_vote = True
+    
+    counts = await increment_counters(db, Resource, resource_id, increments)
+    try:
+        if new_vote:
+            await db.execute(insert(ResourceVote).values(
+                resource_id=resource_id, user_id=current_user.id, vote_type=vote_type
+            ))
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request from the same user voted first
+        await db.rollback()
+        counts = (await db.execute(
+            select(Resource.upvotes, Resource.downvotes).where(Resource.id == resource_id)
+        )).mappings().one()
     
-    db.commit()
     return {
         "message": "Vote recorded",
-        "upvotes": resource.upvotes,
-        "downvotes": resource.downvotes
+        "upvotes": counts["upvotes"],
+        "downvotes": counts["downvotes"]
     }
 
 
@@ -230,24 +251,23 @@ async def vote_resource(
 async def download_resource(
     resource_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Track resource download."""
-    resource = db.query(Resource).filter(Resource.id == resource_id).first()
+    resource = await db.scalar(select(Resource).where(Resource.id == resource_id))
     if not resource:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Resource not found"
         )
     
-    # Increment download count
-    resource.downloads += 1
-    db.commit()
+    # Buffered like views; report the count including pending increments
+    counter_buffer.increment(Resource, resource.id, "downloads")
     
     return {
         "message": "Download tracked",
         "download_url": resource.file_url,
-        "downloads": resource.downloads
+        "downloads": resource.downloads + counter_buffer.pending(Resource, resource.id, "downloads")
     }
 
 
@@ -256,12 +276,12 @@ async def get_user_resources(
     user_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all resources uploaded by a specific user."""
-    resources = db.query(Resource).filter(
+    resources = (await db.scalars(select(Resource).where(
         Resource.user_id == user_id,
         Resource.is_active == True
-    ).order_by(Resource.created_at.desc()).offset(skip).limit(limit).all()
+    ).order_by(Resource.created_at.desc()).offset(skip).limit(limit))).all()
     
     return resources
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.api.deps import get_current_user, get_current_active_user
+from app.core.cache import cache, cached
+from app.core.user_cache import user_cache
 from app.models.mysql.models import User, Profile, Skill, UserSkill, Interest, UserInterest
 from app.schemas.schemas import (
     UserResponse, UserUpdate, ProfileResponse, ProfileUpdate,
@@ -22,13 +25,13 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 async def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user information"""
     
     if user_update.email and user_update.email != current_user.email:
         # Check if new email is already taken
-        existing = db.query(User).filter(User.email == user_update.email).first()
+        existing = await db.scalar(select(User).where(User.email == user_update.email))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -40,15 +43,16 @@ async def update_current_user(
     if user_update.full_name is not None:
         current_user.full_name = user_update.full_name
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    user_cache.invalidate(current_user.id)
+    await db.refresh(current_user)
     return current_user
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_by_id(user_id: str, db: Session = Depends(get_db)):
+async def get_user_by_id(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -58,9 +62,10 @@ async def get_user_by_id(user_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}/profile", response_model=ProfileResponse)
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
+@cached("profile:{user_id}", ProfileResponse, tags=["user:{user_id}"])
+async def get_user_profile(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get user profile"""
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+    profile = await db.scalar(select(Profile).where(Profile.user_id == user_id))
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -73,11 +78,11 @@ async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
 async def update_user_profile(
     profile_update: ProfileUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile"""
     
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = await db.scalar(select(Profile).where(Profile.user_id == current_user.id))
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -88,8 +93,9 @@ async def update_user_profile(
     for field, value in update_data.items():
         setattr(profile, field, value)
     
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
+    await cache.invalidate_tags(f"user:{current_user.id}")
+    await db.refresh(profile)
     return profile
 
 
@@ -97,12 +103,12 @@ async def update_user_profile(
 async def add_user_skill(
     skill_data: UserSkillCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add skill to current user"""
     
     # Check if skill exists
-    skill = db.query(Skill).filter(Skill.id == skill_data.skill_id).first()
+    skill = await db.scalar(select(Skill).where(Skill.id == skill_data.skill_id))
     if not skill:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,10 +116,10 @@ async def add_user_skill(
         )
     
     # Check if user already has this skill
-    existing = db.query(UserSkill).filter(
+    existing = await db.scalar(select(UserSkill).where(
         UserSkill.user_id == current_user.id,
         UserSkill.skill_id == skill_data.skill_id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(
@@ -128,7 +134,7 @@ async def add_user_skill(
     )
     
     db.add(user_skill)
-    db.commit()
+    await db.commit()
     
     return {"message": "Skill added successfully"}
 
@@ -137,14 +143,14 @@ async def add_user_skill(
 async def remove_user_skill(
     skill_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove skill from current user"""
     
-    user_skill = db.query(UserSkill).filter(
+    user_skill = await db.scalar(select(UserSkill).where(
         UserSkill.user_id == current_user.id,
         UserSkill.skill_id == skill_id
-    ).first()
+    ))
     
     if not user_skill:
         raise HTTPException(
@@ -152,21 +158,21 @@ async def remove_user_skill(
             detail="Skill not found"
         )
     
-    db.delete(user_skill)
-    db.commit()
+    await db.delete(user_skill)
+    await db.commit()
     
     return None
 
 
 @router.get("/skills", response_model=List[SkillResponse])
-async def get_all_skills(db: Session = Depends(get_db)):
+async def get_all_skills(db: AsyncSession = Depends(get_async_db)):
     """Get all available skills"""
-    skills = db.query(Skill).all()
+    skills = (await db.scalars(select(Skill))).all()
     return skills
 
 
 @router.get("/interests", response_model=List[InterestResponse])
-async def get_all_interests(db: Session = Depends(get_db)):
+async def get_all_interests(db: AsyncSession = Depends(get_async_db)):
     """Get all available interests"""
-    interests = db.query(Interest).all()
+    interests = (await db.scalars(select(Interest))).all()
     return interests
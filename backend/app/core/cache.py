@@ -0,0 +1,362 @@
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+import asyncio
+import inspect
+import json
+import time
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class _LoadAbandoned(Exception):
+    """The caller running a shared load was cancelled before it finished"""
+
+
+class MemoryBackend:
+    """In-process LRU of serialized values with per-entry expiry.
+
+    Each worker process has its own copy, so an invalidation only reaches
+    the process that made it; other workers serve their copy until it
+    expires. Use the Redis backend when that matters.
+
+    Tag invalidation times are an LRU too, of at most `max_tags` tags. A
+    forgotten tag reads as invalidated at the newest time forgotten, which
+    can only turn entries older than that into misses, never revive them.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 10000, max_tags: Optional[int] = None):
+        self.max_size = max_size
+        self.max_tags = max_tags or max_size
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        # Tag -> clock value of its last invalidation
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = 0
+        self._forgotten = 0
+        self._lock = Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if missing (or expired); True if this call set it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return False
+            self._entries[key] = (value, time.time() + ttl)
+            return True
+
+    async def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    async def clock(self) -> int:
+        with self._lock:
+            return self._clock
+
+    async def invalidated_at(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._invalidated.get(tag, self._forgotten) for tag in tags]
+
+    async def bump(self, tags: List[str]):
+        with self._lock:
+            self._clock += 1
+            for tag in tags:
+                self._invalidated[tag] = self._clock
+                self._invalidated.move_to_end(tag)
+            while len(self._invalidated) > self.max_tags:
+                _, invalidated_at = self._invalidated.popitem(last=False)
+                self._forgotten = max(self._forgotten, invalidated_at)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Shared cache in Redis; every worker sees the same entries and invalidations"""
+
+    name = "redis"
+
+    # Advance the clock and stamp every tag with it, atomically
+    BUMP_SCRIPT = """
+    local now = redis.call('INCR', KEYS[1])
+    for i = 2, #KEYS do
+        redis.call('SET', KEYS[i], now)
+    end
+    return now
+    """
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        # Imported here so the in-process backend works without the package
+        from redis import asyncio as aioredis
+
+        self.prefix = prefix
+        self.client = aioredis.from_url(url)
+        self._bump = self.client.register_script(self.BUMP_SCRIPT)
+
+    async def ping(self):
+        await self.client.ping()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self.client.set(self.prefix + key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clock(self) -> int:
+        return int(await self.client.get(f"{self.prefix}clock") or 0)
+
+    async def invalidated_at(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, tags: List[str]):
+        await self._bump(keys=[f"{self.prefix}clock"] + [f"{self.prefix}tag:{tag}" for tag in tags])
+
+    async def close(self):
+        await self.client.aclose()
+
+
+@lru_cache(maxsize=None)
+def _adapter(value_type) -> TypeAdapter:
+    return TypeAdapter(value_type)
+
+
+class Cache:
+    """Typed read-through cache over a pluggable backend.
+
+    Values are validated and serialized with pydantic, so `get` returns
+    the same type that was stored (e.g. a response schema) whichever
+    backend holds it. Entries can carry tags; the backend keeps a clock
+    that every tag invalidation advances, and an entry whose load started
+    before the last invalidation of one of its tags reads as a miss.
+    `get_or_load` lets one caller per key run the loader while concurrent
+    callers wait for its result (across processes with Redis), so an
+    expired hot key doesn't send a burst of identical queries to MySQL.
+    Backend errors are logged and treated as misses, never raised.
+    """
+
+    def __init__(self, backend, ttl: int = 60, lock_ttl: float = 5.0, wait_interval: float = 0.05):
+        self.backend = backend
+        self.ttl = ttl
+        # How long a loader may hold a key before others load it themselves
+        self.lock_ttl = lock_ttl
+        self.wait_interval = wait_interval
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def connect(self, backend: str = settings.CACHE_BACKEND, url: str = settings.REDIS_URL):
+        """Switch to Redis when configured and reachable; otherwise stay in-process"""
+        if backend == "memory" or not url:
+            return
+        try:
+            redis_backend = RedisBackend(url)
+            await redis_backend.ping()
+        except Exception as exc:
+            if backend == "redis":
+                raise
+            print(f"⚠️  Redis unavailable ({exc}), using the in-process cache")
+            return
+        await self.backend.close()
+        self.backend = redis_backend
+
+    async def close(self):
+        await self.backend.close()
+
+    async def _call(self, operation: str, *args, default=None):
+        try:
+            return await getattr(self.backend, operation)(*args)
+        except Exception as exc:
+            print(f"⚠️  Cache {operation} failed: {exc}")
+            return default
+
+    async def get(self, key: str, value_type: Type[T]) -> Optional[T]:
+        """Cached value for `key` validated as `value_type`, or None"""
+        raw = await self._call("get", key)
+        if raw is None:
+            return None
+        header, _, payload = raw.partition(b"\n")
+        header = json.loads(header)
+        if not await self.is_fresh(header["tags"], header["at"]):
+            return None
+        return _adapter(value_type).validate_json(payload)
+
+    async def stamp(self) -> Optional[int]:
+        """Current invalidation clock, to pass to `is_fresh` later; None on backend errors"""
+        return await self._call("clock", default=None)
+
+    async def is_fresh(self, tags: Iterable[str], stamp: Optional[int]) -> bool:
+        """Whether none of `tags` has been invalidated since `stamp` was taken"""
+        tags = list(tags)
+        if not tags:
+            return True
+        if stamp is None:
+            return False
+        invalidated_at = await self._call("invalidated_at", tags, default=None)
+        return invalidated_at is not None and max(invalidated_at) <= stamp
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        value_type: Optional[Type] = None,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = ()
+    ):
+        """Store `value` (serialized as `value_type`, default its own type) under `key`"""
+        tags = list(tags)
+        await self._store(key, value, value_type, ttl, tags, await self._stamp(tags))
+
+    async def _stamp(self, tags: List[str]) -> Optional[int]:
+        return await self.stamp() if tags else 0
+
+    async def _store(self, key, value, value_type, ttl, tags: List[str], stamp: Optional[int]):
+        if stamp is None:
+            return
+        payload = _adapter(value_type or type(value)).dump_json(value)
+        header = json.dumps({"at": stamp, "tags": tags}).encode()
+        await self._call("set", key, header + b"\n" + payload, ttl or self.ttl)
+
+    async def get_or_load(
+        self,
+        key: str,
+        value_type: Type[T],
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = ()
+    ) -> T:
+        """Cached value, or the loader's result (validated as `value_type`) after caching it"""
+        value = await self.get(key, value_type)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        # Same process: share the in-flight load. If the caller running it
+        # is cancelled, one of the waiters takes over instead of all of
+        # them failing with the cancellation.
+        while True:
+            pending = self._loading.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except _LoadAbandoned:
+                continue
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await self._load(key, value_type, loader, ttl, tags)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.set_exception(_LoadAbandoned())
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Waiters get the exception; don't warn about it going unretrieved
+            future.exception()
+            raise
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+    async def _load(self, key, value_type, loader, ttl, tags):
+        # Other processes: wait briefly for whoever holds the load lock
+        lock_key = f"lock:{key}"
+        locked = await self._call("add", lock_key, b"1", self.lock_ttl, default=False)
+        if not locked:
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.wait_interval)
+                value = await self.get(key, value_type)
+                if value is not None:
+                    return value
+                if await self._call("get", lock_key) is None:
+                    # The holder failed without storing a value
+                    break
+        try:
+            # Clock from before the load: an invalidation while it runs
+            # leaves the stored value already stale rather than fresh-looking
+            tags = list(tags)
+            stamp = await self._stamp(tags)
+            value = _adapter(value_type).validate_python(await loader(), from_attributes=True)
+            await self._store(key, value, value_type, ttl, tags, stamp)
+            return value
+        finally:
+            if locked:
+                await self._call("delete", lock_key)
+
+    async def invalidate(self, *keys: str):
+        await self._call("delete", *keys)
+
+    async def invalidate_tags(self, *tags: str):
+        """Make every entry stored under any of `tags` a miss"""
+        await self._call("bump", list(tags))
+
+
+cache = Cache(MemoryBackend(max_size=settings.CACHE_SIZE), ttl=settings.CACHE_TTL)
+
+
+def cached(key: str, value_type: Type, tags: Iterable[str] = (), ttl: Optional[float] = None):
+    """Cache an async function's result through `cache`.
+
+    `key` and `tags` are format strings over the function's arguments,
+    e.g. @cached("event:{event_id}", EventResponse, tags=["event:{event_id}"]).
+    The result is converted to `value_type` (ORM rows via from_attributes),
+    and exceptions such as a 404 HTTPException are not cached. Works on
+    FastAPI endpoints, whose signature is preserved.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            return await cache.get_or_load(
+                key.format(**arguments),
+                value_type,
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                tags=[tag.format(**arguments) for tag in tags]
+            )
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import secrets
 
 
@@ -16,6 +16,15 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # pending hashes beyond the workers before returning 503
+    
+    # Authenticated-user cache
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 300  # seconds, capped by the token's own expiry; also the staleness bound across workers without Redis
+    
     # Database - MySQL
     DATABASE_URL: str = "sqlite:///./techkatta.db"  # Default to SQLite for easy local dev
     
@@ -23,9 +32,18 @@ class Settings(BaseSettings):
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "techkatta"
     
+    # Write-behind view/download counters
+    COUNTER_FLUSH_INTERVAL: float = 5.0  # seconds
+    COUNTER_FLUSH_BATCH_SIZE: int = 500
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Read-through cache for entity endpoints
+    CACHE_BACKEND: str = "auto"  # "redis", "memory" or "auto" (Redis when REDIS_URL answers)
+    CACHE_TTL: int = 60  # seconds
+    CACHE_SIZE: int = 10000  # entries kept by the in-process backend
+    
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -48,6 +66,18 @@ class Settings(BaseSettings):
     # ML Model
     ML_MODEL_PATH: str = "./ml/models"
     ML_CACHE_TTL: int = 3600
+    ML_CACHE_SIZE: int = 50000  # per-user recommendation results kept in memory
+    ML_LATENCY_BUDGET_MS: int = 200  # model time allowed before serving popular items
+    ML_INFERENCE_WORKERS: int = 2
+    ML_POPULAR_TTL: int = 300  # seconds between popular-item refreshes
+    ML_CANDIDATE_POOL_SIZE: int = 500  # popular items the model re-ranks
+    ML_PRECOMPUTE_TOP_N: int = 50  # recommendations stored per user by the batch job
+    ML_PRECOMPUTE_CHUNK_SIZE: int = 1000
+    ML_CF_STRATEGY: str = "user"  # "user" (user-user), "item" (item-item) or "als" (matrix factorization)
+    ML_DECAY_HALF_LIFE_DAYS: Optional[float] = 90.0  # interaction weight halves every N days; None disables
+    ML_MODEL_POLL_INTERVAL: int = 30  # seconds between workers' checks for a newly published model; 0 disables
+    ML_MODEL_KEEP_VERSIONS: int = 3  # model versions kept on disk by the trainer
+    ML_TRAINING_WINDOW_DAYS: int = 365  # interactions the trainer loads
     
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
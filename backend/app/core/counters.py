@@ -0,0 +1,166 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import asyncio
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+
+class CounterBuffer:
+    """Write-behind buffer for hot counters such as views and downloads.
+
+    Increments are coalesced in memory per (model, column, id) and written
+    periodically as one `UPDATE ... SET col = col + CASE id ... END` per
+    model/column, so read endpoints never take a row lock.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, batch_size: int = 500):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._counts: Dict[Tuple[type, str, str], int] = defaultdict(int)
+        self._lock = Lock()
+        self._task = None
+
+    def increment(self, model, object_id: str, column: str = "views", amount: int = 1):
+        """Buffer an increment of `model.column` for one row"""
+        with self._lock:
+            self._counts[(model, column, object_id)] += amount
+
+    def pending(self, model, object_id: str, column: str = "views") -> int:
+        """Increments buffered for a row but not yet written"""
+        with self._lock:
+            return self._counts.get((model, column, object_id), 0)
+
+    def _drain(self) -> Dict[Tuple[type, str, str], int]:
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        return counts
+
+    def _restore(self, counts: Dict[Tuple[type, str, str], int]):
+        with self._lock:
+            for key, amount in counts.items():
+                self._counts[key] += amount
+
+    async def flush(self):
+        """Write all buffered increments to the database"""
+        counts = self._drain()
+        if not counts:
+            return
+
+        grouped: Dict[Tuple[type, str], Dict[str, int]] = defaultdict(dict)
+        for (model, column, object_id), amount in counts.items():
+            grouped[(model, column)][object_id] = amount
+
+        try:
+            async with AsyncSessionLocal() as db:
+                for (model, column), amounts in grouped.items():
+                    ids = list(amounts)
+                    for start in range(0, len(ids), self.batch_size):
+                        batch = {object_id: amounts[object_id] for object_id in ids[start:start + self.batch_size]}
+                        counter = getattr(model, column)
+                        values = {counter: counter + case(batch, value=model.id, else_=0)}
+                        # Counters aren't edits, so leave updated_at alone
+                        if hasattr(model, "updated_at"):
+                            values[model.updated_at] = model.updated_at
+                        await db.execute(
+                            update(model)
+                            .where(model.id.in_(batch))
+                            .values(values)
+                            .execution_options(synchronize_session=False)
+                        )
+                await db.commit()
+        except Exception as exc:
+            # Keep the increments for the next attempt rather than losing them
+            self._restore(counts)
+            print(f"⚠️  Counter flush failed: {exc}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flush and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+async def increment_counters(
+    db: AsyncSession,
+    model,
+    object_id: str,
+    increments: Dict[str, int],
+    condition=None
+) -> Optional[Dict[str, int]]:
+    """Add `increments` to counter columns of one row in a single UPDATE.
+
+    The new values come back from the statement itself where the database
+    allows it (RETURNING, or MySQL's LAST_INSERT_ID(expr) for a single
+    column), so there's no read-modify-write and no lost updates under
+    concurrent requests. An optional `condition` makes the increment
+    conditional, e.g. on remaining capacity. Returns None when the row
+    doesn't exist or doesn't meet the condition. Doesn't commit, so the
+    caller can pair it with its own writes.
+    """
+    columns = [getattr(model, column) for column in increments]
+    values = {column: column + amount for column, amount in zip(columns, increments.values())}
+    # Counters aren't edits, so leave updated_at alone
+    if hasattr(model, "updated_at"):
+        values[model.updated_at] = model.updated_at
+    statement = update(model).where(model.id == object_id).execution_options(synchronize_session=False)
+    if condition is not None:
+        statement = statement.where(condition)
+    dialect = db.get_bind().dialect
+
+    if dialect.update_returning:
+        row = (await db.execute(statement.values(values).returning(*columns))).first()
+        return None if row is None else dict(zip(increments, row))
+
+    if dialect.name == "mysql" and len(columns) == 1:
+        # The value passed to LAST_INSERT_ID() is reported back as the
+        # statement's insert id, saving a SELECT
+        column, amount = columns[0], next(iter(increments.values()))
+        values[column] = func.last_insert_id(column + amount)
+        result = await db.execute(statement.values(values))
+        return {next(iter(increments)): result.lastrowid} if result.rowcount else None
+
+    result = await db.execute(statement.values(values))
+    if not result.rowcount:
+        return None
+    # The row is locked by the UPDATE until commit, so this reads our own write
+    row = (await db.execute(select(*columns).where(model.id == object_id))).first()
+    return dict(zip(increments, row))
+
+
+async def lock_row(db: AsyncSession, model, object_id: str) -> bool:
+    """Lock one row until commit (SELECT ... FOR UPDATE); False if it doesn't exist.
+
+    Toggles that delete-or-insert a child row (likes, votes) take the
+    parent's lock first, so concurrent toggles on the same parent queue on
+    it. Otherwise a DELETE of a missing child key takes an InnoDB gap lock,
+    and two first-time toggles deadlock between that and the parent's row
+    lock taken by the counter UPDATE.
+    """
+    locked = await db.scalar(select(model.id).where(model.id == object_id).with_for_update())
+    return locked is not None
+
+
+counter_buffer = CounterBuffer(
+    flush_interval=settings.COUNTER_FLUSH_INTERVAL,
+    batch_size=settings.COUNTER_FLUSH_BATCH_SIZE
+)
@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.functions import now
 from motor.motor_asyncio import AsyncIOMotorClient
 from typing import AsyncGenerator
 from app.core.config import settings
@@ -43,6 +46,15 @@ else:
         echo=settings.DEBUG
     )
 
+# SQLite stores timestamps as text and CURRENT_TIMESTAMP has no fractional
+# seconds, while values bound from Python carry microseconds. Render now()
+# in the Python format too, so server defaults and bound values compare and
+# sort correctly as text (e.g. keyset pagination on created_at).
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -56,6 +68,60 @@ def get_db():
         db.close()
 
 
+# Async engine used by the API handlers so queries don't block the event loop.
+# Mirrors the sync engine above, swapping in the asyncio driver for the dialect.
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver"""
+    if url.startswith("mysql+pymysql://"):
+        return url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+    if url.startswith("mysql://"):
+        return url.replace("mysql://", "mysql+aiomysql://", 1)
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql://") or url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+
+async_db_url = get_async_database_url(engine.url.render_as_string(hide_password=False))
+
+if async_db_url.startswith("sqlite"):
+    async_engine = create_async_engine(
+        async_db_url,
+        connect_args={"check_same_thread": False},
+        echo=settings.DEBUG
+    )
+elif async_db_url.startswith("mysql"):
+    async_engine = create_async_engine(
+        async_db_url,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        echo=settings.DEBUG
+    )
+else:
+    async_engine = create_async_engine(
+        async_db_url,
+        pool_pre_ping=True,
+        echo=settings.DEBUG
+    )
+
+# expire_on_commit=False: handlers keep reading ORM attributes after commit,
+# and an expired attribute can't be lazily reloaded outside an await.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for getting an async MySQL database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # MongoDB Database
 class MongoDB:
     client: AsyncIOMotorClient = None
@@ -0,0 +1,152 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A cursor is an opaque, URL-safe token holding the sort key and id of the
+last row of the previous page. The next page seeks past that row with
+`(sort_column, id) < (value, id)` (or `>` when ascending), which an index
+on (sort_column, id) answers with a range scan, so deep pages cost the
+same as the first and don't shift when new rows are inserted. The sort
+columns of the list endpoints are NOT NULL and have such indexes; on a
+nullable column NULLs come after all others in both directions, at the
+cost of the index.
+"""
+from datetime import datetime
+from typing import Any, Optional, Sequence
+import base64
+import json
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, func, inspect, literal, or_, tuple_, update
+
+from app.core.database import engine
+from app.models.mysql.enhanced_models import Event, EventAttendee, JobPosting, Project, Resource
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Models whose keyset pagination indexes ensure_sort_indexes maintains
+PAGINATED_MODELS = (JobPosting, Project, Resource, Event, EventAttendee)
+
+# Stand-in for NULL timestamps in rows written before created_at was NOT
+# NULL; the earliest MySQL TIMESTAMP, so they still sort last when newest
+# first, as NULLs did
+NULL_TIMESTAMP_BACKFILL = datetime(1970, 1, 1, 0, 0, 1)
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, row_id: str) -> str:
+    """Build an opaque cursor for the row (value, row_id)"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort_by, "o": order, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str, sort_column) -> tuple:
+    """Decode a cursor into (value, row_id), checking it matches the current sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, row_id = payload["v"], payload["id"]
+        if payload["s"] != sort_by or payload["o"] != order:
+            raise ValueError("cursor was issued for a different sort")
+        if value is not None and sort_column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+    except (ValueError, KeyError, TypeError, NotImplementedError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return value, row_id
+
+
+def keyset_paginate(query, sort_column, id_column, sort_by: str, order: str, cursor: Optional[str] = None):
+    """
+    Order `query` by (sort_column, id_column) and, if a cursor is given,
+    seek past the row it points at. For a NOT NULL sort column this is a
+    plain row-value comparison an index on (sort_column, id_column) can
+    seek to. A nullable column gets its NULLs last in either direction
+    (spelled `IS NULL` first since MySQL has no NULLS LAST), which no
+    index serves.
+    """
+    if not sort_column.nullable:
+        key = tuple_(sort_column, id_column)
+        if order == "desc":
+            query = query.order_by(sort_column.desc(), id_column.desc())
+        else:
+            query = query.order_by(sort_column.asc(), id_column.asc())
+        if cursor:
+            value, row_id = decode_cursor(cursor, sort_by, order, sort_column)
+            if value is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            seek = tuple_(_bind(value, sort_column), _bind(row_id, id_column))
+            query = query.where(key < seek if order == "desc" else key > seek)
+        return query
+
+    if order == "desc":
+        query = query.order_by(sort_column.is_(None), sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.is_(None), sort_column.asc(), id_column.asc())
+
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_by, order, sort_column)
+        past_id = id_column < row_id if order == "desc" else id_column > row_id
+        if value is None:
+            # Already in the trailing NULL block: only its remaining rows
+            query = query.where(and_(sort_column.is_(None), past_id))
+        else:
+            query = query.where(or_(
+                sort_column < value if order == "desc" else sort_column > value,
+                and_(sort_column == value, past_id),
+                sort_column.is_(None)
+            ))
+    return query
+
+
+def _bind(value, column):
+    # Typed like the column, so e.g. a datetime is bound in its stored format
+    return literal(value, column.type)
+
+
+def set_next_cursor(response: Response, rows: Sequence, sort_by: str, order: str, limit: int, id_attr: str = "id"):
+    """Expose the cursor for the page after `rows` in the X-Next-Cursor header"""
+    if len(rows) < limit:
+        return
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+        sort_by, order, getattr(last, sort_by), getattr(last, id_attr)
+    )
+
+
+def ensure_sort_indexes(bind=engine):
+    """
+    Create the (sort column, id) indexes of PAGINATED_MODELS on tables that
+    predate them; create_all only builds missing tables. Safe to run on
+    every startup. When an index is first created, the NULLs older versions
+    left in its now NOT NULL sort column are backfilled (counters to 0,
+    timestamps to NULL_TIMESTAMP_BACKFILL), and on SQLite timestamps stored
+    without microseconds are rewritten with them, so all of them compare
+    correctly as text.
+    """
+    with bind.begin() as conn:
+        for model in PAGINATED_MODELS:
+            table = model.__table__
+            existing = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                # Keyset indexes end with the primary key tie-breaker
+                if index.name in existing or not list(index.columns)[-1].primary_key:
+                    continue
+                for column in index.columns:
+                    if column.primary_key or column.nullable:
+                        continue
+                    is_timestamp = column.type.python_type is datetime
+                    fill = NULL_TIMESTAMP_BACKFILL if is_timestamp else 0
+                    conn.execute(update(table).where(column.is_(None)).values({column: fill}))
+                    if is_timestamp and conn.dialect.name == "sqlite":
+                        conn.execute(
+                            update(table)
+                            .where(func.length(column) == 19)
+                            .values({column: func.strftime("%Y-%m-%d %H:%M:%f000", column)})
+                        )
+                index.create(conn)
@@ -0,0 +1,182 @@
+"""
+Full-text search over the title/description of listings.
+
+MySQL uses an InnoDB FULLTEXT index with MATCH ... AGAINST in boolean mode.
+SQLite (the local-dev default) uses an FTS5 external-content table kept in
+sync by triggers. Both indexes are maintained by the database itself on
+insert, update and delete, so no application code has to remember to
+reindex. Other databases fall back to the old ILIKE filter.
+"""
+from typing import Dict, List, Optional, Tuple
+import re
+
+from sqlalchemy import column, func, literal_column, or_, table, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import engine
+from app.models.mysql.enhanced_models import JobPosting, Project, Resource, Event
+
+# Model -> columns covered by the search index
+SEARCH_COLUMNS: Dict[type, Tuple[str, ...]] = {
+    JobPosting: ("title", "description"),
+    Project: ("title", "description"),
+    Resource: ("title", "description"),
+    Event: ("title", "description"),
+}
+
+# bm25 column weights for SQLite, title matches count more than body matches
+SQLITE_COLUMN_WEIGHTS = (10.0, 1.0)
+
+# InnoDB ignores shorter tokens (innodb_ft_min_token_size)
+MYSQL_MIN_TOKEN_SIZE = 3
+
+_fts_available = True
+
+
+def _fts_table_name(model) -> str:
+    return f"{model.__tablename__}_fts"
+
+
+def _tokens(search: str) -> List[str]:
+    return re.findall(r"\w+", search.lower())
+
+
+def _sqlite_ddl(model) -> List[str]:
+    base = model.__tablename__
+    fts = _fts_table_name(model)
+    cols = SEARCH_COLUMNS[model]
+    col_list = ", ".join(cols)
+    new_values = ", ".join(f"new.{c}" for c in cols)
+    old_values = ", ".join(f"old.{c}" for c in cols)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{col_list}, content='{base}', content_rowid='rowid', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {base} BEGIN "
+        f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.rowid, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {base} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON {base} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.rowid, {new_values}); END",
+    ]
+
+
+def ensure_search_indexes(bind=engine):
+    """
+    Create the full-text indexes if they don't exist yet.
+
+    Safe to run on every startup. SQLite FTS tables are rebuilt from the
+    existing rows when newly created, or when they don't index as many
+    rows as their base table (e.g. one created empty over existing data).
+    """
+    global _fts_available
+    dialect = bind.dialect.name
+
+    with bind.begin() as conn:
+        for model in SEARCH_COLUMNS:
+            if dialect == "sqlite":
+                fts = _fts_table_name(model)
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": fts}
+                ).first()
+                try:
+                    for statement in _sqlite_ddl(model):
+                        conn.execute(text(statement))
+                except OperationalError:
+                    # SQLite built without FTS5
+                    _fts_available = False
+                    print("⚠️  SQLite FTS5 unavailable, search falls back to ILIKE")
+                    return
+                if not exists or not _fts_in_sync(conn, model):
+                    _rebuild(conn, model)
+            elif dialect == "mysql":
+                index_name = f"ft_{model.__tablename__}_search"
+                exists = conn.execute(
+                    text(
+                        "SELECT 1 FROM information_schema.statistics "
+                        "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+                    ),
+                    {"table": model.__tablename__, "index": index_name}
+                ).first()
+                if not exists:
+                    conn.execute(text(
+                        f"ALTER TABLE {model.__tablename__} "
+                        f"ADD FULLTEXT INDEX {index_name} ({', '.join(SEARCH_COLUMNS[model])})"
+                    ))
+
+
+def _fts_in_sync(conn, model) -> bool:
+    # One docsize row per indexed row
+    indexed = conn.execute(text(f"SELECT count(*) FROM {_fts_table_name(model)}_docsize")).scalar()
+    rows = conn.execute(text(f"SELECT count(*) FROM {model.__tablename__}")).scalar()
+    return indexed == rows
+
+
+def _rebuild(conn, model):
+    fts = _fts_table_name(model)
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def rebuild_search_index(model, bind=engine):
+    """
+    Rebuild a SQLite FTS table from its base table. Startup does this when
+    the row counts differ; run it by hand after anything that changes rows
+    without changing their number, e.g. VACUUM renumbering rowids:
+
+        python -m app.core.search
+    """
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        _rebuild(conn, model)
+
+
+def _ilike(query, model, search: str):
+    return query.where(or_(*(
+        getattr(model, name).ilike(f"%{search}%") for name in SEARCH_COLUMNS[model]
+    )))
+
+
+def apply_search(query, model, search: str):
+    """
+    Restrict a select() on `model` to rows matching `search`.
+
+    Returns (query, relevance). `relevance` is a SQL expression where higher
+    means a better match, or None when the ILIKE fallback was used.
+    Every word is matched as a prefix, so partially typed terms still hit.
+    """
+    dialect = engine.dialect.name
+    tokens = _tokens(search)
+
+    if dialect == "sqlite" and _fts_available and tokens:
+        fts = _fts_table_name(model)
+        fts_table = table(fts, column("rowid"))
+        fts_query = " ".join(f'"{token}"*' for token in tokens)
+        query = query.join(
+            fts_table,
+            fts_table.c.rowid == literal_column(f"{model.__tablename__}.rowid")
+        ).where(literal_column(fts).op("MATCH")(fts_query))
+        # bm25() is "lower is better"
+        relevance = -func.bm25(literal_column(fts), *SQLITE_COLUMN_WEIGHTS)
+        return query, relevance
+
+    if dialect == "mysql":
+        tokens = [token for token in tokens if len(token) >= MYSQL_MIN_TOKEN_SIZE]
+        if tokens:
+            against = " ".join(f"+{token}*" for token in tokens)
+            relevance = match(
+                *(getattr(model, name) for name in SEARCH_COLUMNS[model]),
+                against=against
+            ).in_boolean_mode()
+            return query.where(relevance), relevance
+
+    return _ilike(query, model, search), None
+
+
+if __name__ == "__main__":
+    ensure_search_indexes()
+    for searchable in SEARCH_COLUMNS:
+        rebuild_search_index(searchable)
+        print(f"✅ Rebuilt search index for {searchable.__tablename__}")
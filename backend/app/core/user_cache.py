@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import List, Optional, Set, Tuple
+import asyncio
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.mysql.models import User
+
+
+class UserCache:
+    """Bounded LRU cache of authenticated users, keyed by the token `sub`.
+
+    Entries hold detached snapshots of the User row, so a hit can be merged
+    into the request session without a SELECT. Each entry expires at the
+    earlier of the cache TTL and the `exp` of the token that populated it.
+
+    Snapshots live in each worker, but invalidations are shared through
+    the entity cache's tags (`user_tags`): an entry records the cache clock
+    from before its SELECT and is dropped once one of its tags has been
+    invalidated since, by any worker when the cache runs on Redis. With
+    the in-process cache backend, other workers only drop it on expiry.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: int = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[User, float, int]]" = OrderedDict()
+        self._lock = Lock()
+
+    async def get(self, user_id: str) -> Optional[User]:
+        """Return the cached snapshot for a user, or None if missing/expired/invalidated"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at, stamp = entry
+            if expires_at <= time.time():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        if not await cache.is_fresh(user_tags(user_id), stamp):
+            self.invalidate(user_id)
+            return None
+        return user
+
+    def set(self, user: User, token_exp: Optional[float] = None, stamp: Optional[int] = None):
+        """Cache a detached snapshot of an active user, read after `cache.stamp()` returned `stamp`"""
+        if stamp is None:
+            # Without a stamp there is no telling whether it was invalidated
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+
+        snapshot = User(**{
+            column.key: getattr(user, column.key)
+            for column in User.__table__.columns
+        })
+        make_transient_to_detached(snapshot)
+
+        with self._lock:
+            self._entries[user.id] = (snapshot, expires_at, stamp)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """Drop a user from the cache"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL
+)
+
+
+def user_tags(user_id: str) -> List[str]:
+    """Cache tags whose invalidation drops a user's cached snapshot"""
+    return ["users", f"user:{user_id}"]
+
+
+def token_expiry(payload: dict) -> Optional[float]:
+    """Extract the `exp` claim of a decoded token as a unix timestamp"""
+    exp = payload.get("exp")
+    if isinstance(exp, datetime):
+        return exp.timestamp()
+    if exp is not None:
+        return float(exp)
+    return None
+
+
+# Any change to a user (profile edits, is_active flips, email verification)
+# must not be served stale from the cache. Changes are dropped from this
+# worker's cache when flushed, and their tags are invalidated for every
+# worker once the transaction commits. ORM bulk update()/delete() statements
+# on User can't say which users they touched, so they invalidate them all.
+# Statements run straight on a Connection, bypassing the Session, are not
+# seen; those are bounded only by the TTL.
+_PENDING_TAGS = "user_cache_tags"
+_invalidations: Set[asyncio.Task] = set()
+
+
+def _invalidate_on_commit(session: Optional[Session], tags: List[str]):
+    if session is not None:
+        session.info.setdefault(_PENDING_TAGS, set()).update(tags)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    _invalidate_on_commit(object_session(target), [f"user:{target.id}"])
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        user_cache.clear()
+        _invalidate_on_commit(orm_execute_state.session, ["users"])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_invalidations(session):
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if not tags:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync scripts outside the server: no shared cache to tell
+        return
+    task = loop.create_task(cache.invalidate_tags(*tags))
+    _invalidations.add(task)
+    task.add_done_callback(_invalidations.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_TAGS, None)
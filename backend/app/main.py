@@ -1,11 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import mongodb, Base, engine
+from app.core.database import mongodb, Base, engine, async_engine
+from app.core.cache import cache
+from app.core.counters import counter_buffer
+from app.core.search import ensure_search_indexes
+from app.core.pagination import NEXT_CURSOR_HEADER, ensure_sort_indexes
+from app.ml.serving import model_holder
 from app.api.v1.api import api_router
+from app.api.v1.endpoints.recommendations import RECOMMENDATION_SOURCE_HEADER
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+ensure_search_indexes(engine)
+ensure_sort_indexes(engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -22,6 +30,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, RECOMMENDATION_SOURCE_HEADER],
 )
 
 
@@ -31,12 +40,28 @@ async def startup_db_client():
     mongodb.connect_db()
     print("✅ Connected to MongoDB")
     print(f"✅ MySQL tables created/verified")
+    counter_buffer.start()
+    await cache.connect()
+    print(f"✅ Entity cache: {cache.backend.name}")
+    try:
+        if model_holder.load_latest(settings.ML_MODEL_PATH):
+            print(f"✅ Loaded recommendation model {model_holder.version}")
+        else:
+            print("⚠️  No recommendation model found, serving popular items")
+    except Exception as exc:
+        print(f"⚠️  Could not load recommendation model: {exc}")
+    # Picks up versions published by the trainer (python -m app.ml.train)
+    model_holder.start(settings.ML_MODEL_POLL_INTERVAL)
 
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close MongoDB connection on shutdown"""
     mongodb.close_db()
+    await counter_buffer.stop()
+    await model_holder.stop()
+    await cache.close()
+    await async_engine.dispose()
     print("❌ Disconnected from MongoDB")
 
 
@@ -0,0 +1,242 @@
+"""
+Approximate nearest neighbours for cosine similarity.
+
+RandomProjectionLSH hashes every row with several tables of random
+hyperplanes (SimHash): rows pointing in similar directions land in the
+same bucket with high probability. A query only re-ranks the rows that
+share a bucket with it in some table, so its cost depends on bucket
+sizes rather than on the total number of rows.
+
+Run `python -m app.ml.ann` to measure recall@K against exact search.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from typing import Dict, Optional, Tuple
+import argparse
+import time
+
+
+class RandomProjectionLSH:
+    """Random-projection LSH index over the rows of a sparse matrix"""
+
+    def __init__(
+        self,
+        n_tables: int = 8,
+        n_bits: int = 12,
+        n_probes: int = 4,
+        max_bucket_size: int = 256,
+        seed: int = 0
+    ):
+        # More tables raise recall, more bits shrink buckets (faster, lower recall)
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        # Extra buckets probed per table, flipping the query's least certain bits
+        self.n_probes = n_probes
+        # Candidates taken from one bucket per table; large buckets are sampled
+        self.max_bucket_size = max_bucket_size
+        self.seed = seed
+        self.vectors = None
+        self.planes = None
+        self.order = None
+        self.sorted_codes = None
+
+    def fit(self, vectors) -> 'RandomProjectionLSH':
+        """Index the rows of `vectors` (users x items)"""
+        rng = np.random.default_rng(self.seed)
+        self.vectors = normalize(sparse.csr_matrix(vectors, dtype=np.float32), norm='l2', axis=1)
+        self.planes = rng.standard_normal(
+            (self.n_tables, self.vectors.shape[1], self.n_bits)
+        ).astype(np.float32)
+
+        codes, _ = self._codes(self.vectors)
+        # Random tie-break so a truncated bucket is a random sample of it
+        tie_break = rng.random(self.vectors.shape[0])
+        self.order = np.stack([np.lexsort((tie_break, table_codes)) for table_codes in codes])
+        self.sorted_codes = np.take_along_axis(codes, self.order, axis=1)
+        return self
+
+    def _codes(self, vectors) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bucket code of each row in each table, (n_tables, n_rows), and the
+        bits ordered from least to most certain, (n_tables, n_rows, n_bits)
+        """
+        powers = np.left_shift(1, np.arange(self.n_bits, dtype=np.int64))
+        codes, uncertain_bits = [], []
+        for table in range(self.n_tables):
+            projections = np.asarray(vectors @ self.planes[table])
+            codes.append((projections > 0) @ powers)
+            uncertain_bits.append(np.argsort(np.abs(projections), axis=1))
+        return np.stack(codes), np.stack(uncertain_bits)
+
+    def candidates(self, vectors) -> Tuple[np.ndarray, np.ndarray]:
+        """Unique (query row, indexed row) pairs that share a bucket in any table"""
+        codes, uncertain_bits = self._codes(vectors)
+        n_queries, n_rows = vectors.shape[0], self.vectors.shape[0]
+        n_probes = min(self.n_probes, self.n_bits)
+
+        keys = []
+        for table in range(self.n_tables):
+            # The query's own bucket plus its nearest neighbouring buckets
+            probes = np.concatenate([
+                codes[table][:, None],
+                codes[table][:, None] ^ np.left_shift(1, uncertain_bits[table][:, :n_probes])
+            ], axis=1)
+            probe_queries = np.repeat(np.arange(n_queries, dtype=np.int64), n_probes + 1)
+            probes = probes.ravel()
+
+            starts = np.searchsorted(self.sorted_codes[table], probes, side='left')
+            ends = np.searchsorted(self.sorted_codes[table], probes, side='right')
+            lengths = np.minimum(ends - starts, self.max_bucket_size)
+
+            # Expand each [start, start + length) range into positions
+            queries = np.repeat(probe_queries, lengths)
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            rows = self.order[table][np.repeat(starts, lengths) + offsets]
+            keys.append(queries * n_rows + rows)
+
+        keys = np.unique(np.concatenate(keys))
+        return keys // n_rows, keys % n_rows
+
+    def query(self, vectors, k: int, exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k cosine neighbours of each row of `vectors`
+
+        Args:
+            vectors: Query rows (queries x items)
+            k: Neighbours per query
+            exclude: Indexed row to skip for each query (e.g. the query itself)
+
+        Returns:
+            (indices, similarities), both (queries x k), best first,
+            padded with -1 / 0.0 when fewer than k candidates overlap
+        """
+        vectors = normalize(sparse.csr_matrix(vectors, dtype=np.float32), norm='l2', axis=1)
+        queries, rows = self.candidates(vectors)
+        if exclude is not None:
+            keep = rows != exclude[queries]
+            queries, rows = queries[keep], rows[keep]
+
+        # Exact cosine for the candidate pairs only
+        similarities = np.asarray(vectors[queries].multiply(self.vectors[rows]).sum(axis=1)).ravel()
+        return top_k_pairs(queries, rows, similarities, vectors.shape[0], k)
+
+
+def top_k_pairs(
+    queries: np.ndarray,
+    rows: np.ndarray,
+    similarities: np.ndarray,
+    n_queries: int,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k positive-similarity rows per query from flat (query, row, similarity) triples"""
+    keep = similarities > 0
+    queries, rows, similarities = queries[keep], rows[keep], similarities[keep]
+
+    order = np.lexsort((-similarities, queries))
+    queries, rows, similarities = queries[order], rows[order], similarities[order]
+    group_starts = np.searchsorted(queries, np.arange(n_queries))
+    rank = np.arange(len(queries)) - group_starts[queries]
+    keep = rank < k
+
+    indices = np.full((n_queries, k), -1, dtype=np.int32)
+    scores = np.zeros((n_queries, k), dtype=np.float32)
+    indices[queries[keep], rank[keep]] = rows[keep]
+    scores[queries[keep], rank[keep]] = similarities[keep]
+    return indices, scores
+
+
+def exact_neighbors(vectors, query_rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-k cosine neighbours of the given rows of `vectors`, excluding themselves"""
+    normalized = normalize(sparse.csr_matrix(vectors, dtype=np.float32), norm='l2', axis=1)
+    block = (normalized[query_rows] @ normalized.T).tocoo()
+    keep = block.col != query_rows[block.row]
+    return top_k_pairs(block.row[keep], block.col[keep], block.data[keep], len(query_rows), k)
+
+
+def evaluate_recall(
+    vectors,
+    k: int = 20,
+    sample_size: int = 1000,
+    seed: int = 0,
+    **lsh_params
+) -> Dict:
+    """
+    Recall@k of the LSH index against exact search for a sample of rows
+
+    Recall is the share of the exact top-k (positive similarity) neighbours
+    matched by the index, counting ties at the k-th similarity as matches.
+    """
+    n_rows = vectors.shape[0]
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))
+
+    start = time.perf_counter()
+    exact, exact_scores = exact_neighbors(vectors, sample, k)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = RandomProjectionLSH(seed=seed, **lsh_params).fit(vectors)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    approximate, approximate_scores = index.query(vectors[sample], k, exclude=sample)
+    query_seconds = time.perf_counter() - start
+
+    # Many rows tie at the k-th similarity, so any returned neighbour at
+    # least as similar as the exact k-th one counts as a hit
+    expected = (exact >= 0).sum(axis=1)
+    kth_score = np.where(
+        expected > 0, exact_scores[np.arange(len(sample)), np.maximum(expected - 1, 0)], np.inf
+    )
+    hits = np.minimum(
+        ((approximate >= 0) & (approximate_scores >= kth_score[:, None] - 1e-6)).sum(axis=1),
+        expected
+    ).sum()
+    total = expected.sum()
+
+    return {
+        'k': k,
+        'sample_size': len(sample),
+        'recall': float(hits / total) if total else 1.0,
+        'exact_seconds': exact_seconds,
+        'build_seconds': build_seconds,
+        'query_seconds': query_seconds,
+        **lsh_params,
+    }
+
+
+def _synthetic_matrix(n_users: int, n_items: int, n_interactions: int, seed: int = 0):
+    """Users x items matrix with power-law item popularity and user activity"""
+    rng = np.random.default_rng(seed)
+    users = np.minimum(rng.zipf(1.6, n_interactions) - 1, n_users - 1)
+    items = np.minimum(rng.zipf(1.3, n_interactions) - 1, n_items - 1)
+    users = rng.permutation(n_users)[users]
+    items = rng.permutation(n_items)[items]
+    matrix = sparse.csr_matrix(
+        (np.ones(n_interactions, dtype=np.float32), (users, items)), shape=(n_users, n_items)
+    )
+    matrix.sum_duplicates()
+    return matrix[np.diff(matrix.indptr) > 0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@K of LSH neighbours against exact cosine search")
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--tables", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--bits", type=int, nargs="+", default=[8, 12, 16])
+    args = parser.parse_args()
+
+    matrix = _synthetic_matrix(args.users, args.items, args.interactions)
+    print(f"{matrix.shape[0]} users x {matrix.shape[1]} items, {matrix.nnz} nonzeros, k={args.k}")
+    print(f"{'tables':>6} {'bits':>5} {'recall':>7} {'build s':>8} {'query s':>8} {'exact s':>8}")
+    for n_tables in args.tables:
+        for n_bits in args.bits:
+            result = evaluate_recall(matrix, k=args.k, sample_size=args.sample, n_tables=n_tables, n_bits=n_bits)
+            print(
+                f"{n_tables:>6} {n_bits:>5} {result['recall']:>7.3f} {result['build_seconds']:>8.2f} "
+                f"{result['query_seconds']:>8.2f} {result['exact_seconds']:>8.2f}"
+            )
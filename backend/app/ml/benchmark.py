@@ -0,0 +1,390 @@
+"""
+Benchmark and offline evaluation for the recommenders.
+
+Generates a synthetic interaction log with power-law student activity and
+item popularity, where students mostly interact with items of their own
+interest group, plus matching skill profiles. The log is split by time;
+each collaborative strategy is trained on the older part and evaluated
+on the newer one. The run reports:
+
+- fit time, model size and peak RSS per strategy (each strategy runs in
+  its own forked process, so its peak doesn't include the ones before it)
+- recommend_items / HybridRecommender.recommend latency percentiles
+- precision@k, recall@k and catalogue coverage on the held-out split
+- TeamMatcher batch and single-team timings
+
+Results are written as JSON; pass a previous file as --baseline to flag
+metrics that got worse by more than --tolerance.
+
+    python -m app.ml.benchmark --users 20000 --output bench.json
+    python -m app.ml.benchmark --output new.json --baseline bench.json
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+from app.ml.inference import HybridRecommender, TeamMatcher
+from app.ml.loader import INTERACTION_TYPES, InteractionArrays
+
+# Share of each interaction type in the synthetic log
+INTERACTION_MIX = {'view': 0.6, 'like': 0.2, 'bookmark': 0.08, 'share': 0.04, 'comment': 0.05, 'join': 0.03}
+
+# Metrics where a larger value is better; every other number is a cost
+HIGHER_IS_BETTER = ('precision', 'recall', 'coverage')
+
+
+def power_law(n: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    """Probabilities proportional to rank^-exponent over a random order of n entries"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(weights / weights.sum())
+
+
+def synthetic_interactions(
+    n_users: int,
+    n_items: int,
+    n_interactions: int,
+    n_groups: int = 50,
+    days: int = 365,
+    seed: int = 0
+) -> Tuple[InteractionArrays, np.ndarray, np.ndarray]:
+    """
+    Interaction log as integer-coded arrays, spread uniformly over `days`
+
+    Returns:
+        (interactions, user_group, item_group): 80% of a user's
+        interactions go to popular items of their own group
+    """
+    rng = np.random.default_rng(seed)
+    users = rng.choice(n_users, n_interactions, p=power_law(n_users, 0.8, rng))
+    user_group = rng.integers(0, n_groups, n_users)
+    item_group = rng.integers(0, n_groups, n_items)
+
+    items = rng.choice(n_items, n_interactions, p=power_law(n_items, 0.9, rng))
+    in_group = rng.random(n_interactions) < 0.8
+    for group in range(n_groups):
+        members = np.flatnonzero(in_group & (user_group[users] == group))
+        candidates = np.flatnonzero(item_group == group)
+        if len(members) and len(candidates):
+            items[members] = rng.choice(candidates, len(members), p=power_law(len(candidates), 0.9, rng))
+
+    type_codes = rng.choice(
+        [INTERACTION_TYPES.index(name) for name in INTERACTION_MIX], n_interactions,
+        p=list(INTERACTION_MIX.values())
+    ).astype(np.int8)
+    end = int(time.time())
+    timestamps = np.sort(rng.integers(end - days * 86400, end, n_interactions))
+
+    data = InteractionArrays(
+        users.astype(np.int32), items.astype(np.int32), type_codes, timestamps,
+        [f'user-{idx}' for idx in range(n_users)], [f'item-{idx}' for idx in range(n_items)]
+    )
+    return data, user_group, item_group
+
+
+def to_records(data: InteractionArrays, rows: Optional[np.ndarray] = None) -> List[Dict]:
+    """The dicts CollaborativeFilter.fit takes, for the given positions (all by default)"""
+    rows = np.arange(len(data)) if rows is None else rows
+    epoch = datetime(1970, 1, 1)
+    return [
+        {
+            'user_id': data.user_ids[user],
+            'target_id': data.item_ids[item],
+            'interaction_type': INTERACTION_TYPES[kind],
+            'created_at': epoch + timedelta(seconds=int(timestamp)),
+        }
+        for user, item, kind, timestamp in zip(
+            data.user_codes[rows].tolist(), data.item_codes[rows].tolist(),
+            data.type_codes[rows].tolist(), data.timestamps[rows].tolist()
+        )
+    ]
+
+
+def synthetic_profiles(
+    user_group: np.ndarray,
+    item_group: np.ndarray,
+    n_skills: int = 300,
+    seed: int = 0
+) -> Tuple[List[Dict], List[Dict]]:
+    """Skill profiles for users and tags/categories for items, correlated with their group"""
+    rng = np.random.default_rng(seed)
+    n_groups = int(max(user_group.max(), item_group.max())) + 1
+    group_skills = [rng.choice(n_skills, size=12, replace=False) for _ in range(n_groups)]
+
+    def skills(group: int, count: int) -> List[str]:
+        # Mostly the group's own skills, one from anywhere
+        picked = rng.choice(group_skills[group], size=count - 1, replace=False).tolist()
+        return [f'skill-{skill}' for skill in picked + [int(rng.integers(n_skills))]]
+
+    users = [
+        {
+            'user_id': f'user-{idx}',
+            'skills': skills(group, int(rng.integers(2, 7))),
+            'interests': [f'category-{group % 20}'],
+        }
+        for idx, group in enumerate(user_group.tolist())
+    ]
+    items = [
+        {'item_id': f'item-{idx}', 'tags': skills(group, int(rng.integers(2, 6))), 'category': f'category-{group % 20}'}
+        for idx, group in enumerate(item_group.tolist())
+    ]
+    return users, items
+
+
+def time_split(data: InteractionArrays, test_fraction: float = 0.2) -> Tuple[np.ndarray, Dict[str, set]]:
+    """
+    Positions of the training interactions (the oldest ones) and, per user
+    seen in training, the new items they interacted with afterwards
+    """
+    cutoff = np.quantile(data.timestamps, 1 - test_fraction)
+    train = np.flatnonzero(data.timestamps < cutoff)
+    test = np.flatnonzero(data.timestamps >= cutoff)
+
+    trained_users = np.zeros(len(data.user_ids), dtype=bool)
+    trained_users[data.user_codes[train]] = True
+    seen = set(zip(data.user_codes[train].tolist(), data.item_codes[train].tolist()))
+
+    held_out: Dict[str, set] = {}
+    for user, item in zip(data.user_codes[test].tolist(), data.item_codes[test].tolist()):
+        if trained_users[user] and (user, item) not in seen:
+            held_out.setdefault(data.user_ids[user], set()).add(data.item_ids[item])
+    return train, held_out
+
+
+def latency(func: Callable, calls: List[tuple]) -> Dict[str, float]:
+    """Per-call latency percentiles in milliseconds"""
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) if timings else (0.0, 0.0, 0.0)
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'mean_ms': float(np.mean(timings or [0]))}
+
+
+def ranking_quality(recommendations: Dict[str, List[str]], held_out: Dict[str, set], k: int, n_items: int) -> Dict[str, float]:
+    """Mean precision@k and recall@k over users, and the share of items ever recommended"""
+    precision, recall, recommended = [], [], set()
+    for user_id, items in recommendations.items():
+        relevant = held_out[user_id]
+        hits = len(relevant.intersection(items[:k]))
+        precision.append(hits / k)
+        recall.append(hits / len(relevant))
+        recommended.update(items[:k])
+    return {
+        'precision_at_k': float(np.mean(precision)) if precision else 0.0,
+        'recall_at_k': float(np.mean(recall)) if recall else 0.0,
+        'coverage': len(recommended) / n_items if n_items else 0.0,
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _model_mb(model) -> float:
+    matrix = model.user_item_matrix
+    arrays = [matrix.data, matrix.indices, matrix.indptr] + [getattr(model, name) for name in model.MODEL_ARRAYS]
+    return sum(array.nbytes for array in arrays) / 1e6
+
+
+def _isolated(func: Callable, *args):
+    """
+    func(*args) in a forked child process, so the peak RSS it reports is
+    its own: ru_maxrss only ever grows within a process, and every child
+    starts from the same parent state. The child inherits the arguments
+    without pickling; only the result is sent back. Runs in-process where
+    fork is unavailable.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return func(*args)
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+
+    def target():
+        try:
+            sender.send((True, func(*args)))
+        except BaseException as exc:
+            sender.send((False, f'{type(exc).__name__}: {exc}'))
+
+    process = context.Process(target=target)
+    process.start()
+    sender.close()
+    try:
+        ok, value = receiver.recv()
+    except EOFError:
+        ok, value = False, 'benchmark process exited without a result'
+    process.join()
+    if not ok:
+        raise RuntimeError(f'{value} (exit code {process.exitcode})')
+    return value
+
+
+def _run_strategy(
+    strategy: str,
+    half_life_days: Optional[float],
+    records: List[Dict],
+    users: List[Dict],
+    items: List[Dict],
+    evaluated: List[str],
+    timed: List[str],
+    candidates: List[str],
+    held_out: Dict[str, set],
+    k: int,
+    n_items: int
+) -> Dict:
+    """Fit, time and evaluate one collaborative strategy"""
+    model = HybridRecommender(strategy=strategy, half_life_days=half_life_days)
+    for user in users:
+        model.add_user_profile(user['user_id'], user['skills'], user['interests'])
+    for item in items:
+        model.add_item_features(item['item_id'], item['tags'], item['category'])
+
+    start = time.perf_counter()
+    model.train_collaborative(records)
+    fit_seconds = time.perf_counter() - start
+    collaborative = model.collaborative_filter
+
+    collaborative_recs = dict(zip(evaluated, collaborative.recommend_items_batch(evaluated, n=k)))
+    hybrid_recs = {user_id: model.recommend(user_id, n=k) for user_id in evaluated}
+
+    return {
+        'fit_seconds': fit_seconds,
+        'model_mb': _model_mb(collaborative),
+        'peak_rss_mb': _peak_rss_mb(),
+        'recommend_items': latency(collaborative.recommend_items, [(user_id, k) for user_id in timed]),
+        'hybrid_recommend': latency(model.recommend, [(user_id, candidates, k) for user_id in timed]),
+        'collaborative_quality': ranking_quality(collaborative_recs, held_out, k, n_items),
+        'hybrid_quality': ranking_quality(hybrid_recs, held_out, k, n_items),
+    }
+
+
+def run(
+    n_users: int = 20000,
+    n_items: int = 5000,
+    n_interactions: int = 300000,
+    strategies: Tuple[str, ...] = ('user', 'item', 'als'),
+    k: int = 10,
+    sample_size: int = 1000,
+    latency_calls: int = 200,
+    n_teams: int = 500,
+    n_candidates: int = 5000,
+    half_life_days: Optional[float] = None,
+    seed: int = 0
+) -> Dict:
+    """Run the whole suite and return the results as a JSON-serializable dict"""
+    data, user_group, item_group = synthetic_interactions(n_users, n_items, n_interactions, seed=seed)
+    train, held_out = time_split(data)
+    records = to_records(data, train)
+    users, items = synthetic_profiles(user_group, item_group, seed=seed)
+
+    rng = np.random.default_rng(seed)
+    evaluated = sorted(held_out)
+    evaluated = [evaluated[idx] for idx in rng.choice(len(evaluated), size=min(sample_size, len(evaluated)), replace=False)]
+    timed = evaluated[:latency_calls]
+    candidates = [f'item-{idx}' for idx in np.argsort(-np.bincount(data.item_codes[train], minlength=n_items))[:500]]
+
+    results = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'dataset': {
+            'users': n_users,
+            'items': n_items,
+            'interactions': n_interactions,
+            'train_interactions': int(len(train)),
+            'evaluated_users': len(evaluated),
+            'k': k,
+            'half_life_days': half_life_days,
+            'seed': seed,
+        },
+        'strategies': {},
+    }
+
+    for strategy in strategies:
+        results['strategies'][strategy] = _isolated(
+            _run_strategy, strategy, half_life_days, records, users, items,
+            evaluated, timed, candidates, held_out, k, n_items
+        )
+        print(f"✅ {strategy}: fit {results['strategies'][strategy]['fit_seconds']:.2f}s", file=sys.stderr)
+
+    matcher = TeamMatcher()
+    team_skills = [user['skills'] for user in synthetic_profiles(user_group[:n_teams], item_group, seed=seed + 1)[0]]
+    pool = users[:n_candidates]
+    start = time.perf_counter()
+    matcher.match_users_to_teams(team_skills, pool, n=k)
+    results['team_matcher'] = {
+        'teams': len(team_skills),
+        'candidates': len(pool),
+        'batch_seconds': time.perf_counter() - start,
+        'single_team': latency(matcher.match_users_to_team, [(skills, pool, k) for skills in team_skills[:20]]),
+    }
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.25, path: str = '') -> List[str]:
+    """Metrics in `current` that are worse than in `baseline` by more than `tolerance` (relative)"""
+    regressions = []
+    for key, value in current.items():
+        name = f'{path}.{key}' if path else key
+        previous = baseline.get(key)
+        if key in ('meta', 'dataset') or previous is None:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            regressions.extend(compare(value, previous, tolerance, name))
+        elif isinstance(value, (int, float)) and isinstance(previous, (int, float)) and previous:
+            change = (value - previous) / abs(previous)
+            worse = -change if key.startswith(HIGHER_IS_BETTER) else change
+            if worse > tolerance:
+                regressions.append(f'{name}: {previous:.4g} -> {value:.4g} ({change:+.0%})')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and evaluate the recommenders on synthetic data")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--interactions", type=int, default=300000)
+    parser.add_argument("--strategies", nargs="+", default=["user", "item", "als"])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=1000, help="Users evaluated for quality")
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--half-life", type=float, help="Interaction decay half-life in days")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    results = run(
+        args.users, args.items, args.interactions, tuple(args.strategies), args.k, args.sample,
+        n_teams=args.teams, n_candidates=args.candidates, half_life_days=args.half_life, seed=args.seed
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != results['dataset']:
+            print("⚠️  Baseline used a different dataset; timings are not comparable", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️  {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
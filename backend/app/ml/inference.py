@@ -1,26 +1,135 @@
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Tuple
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-import pickle
+import json
 import os
+import shutil
+import time
+
+from app.core.config import settings
+from app.ml.ann import RandomProjectionLSH, top_k_pairs
+from app.ml.factorization import ImplicitALS
+from app.ml.vocabulary import load_ids, save_ids
+
+
+# Bumped whenever the on-disk artifact layout changes
+ARTIFACT_FORMAT_VERSION = 3
+MANIFEST_FILE = 'manifest.json'
+# Names the version serving processes should load; replaced atomically
+CURRENT_FILE = 'CURRENT'
+
+# Weight of each interaction type in the user-item matrix
+INTERACTION_WEIGHTS = {
+    'view': 1,
+    'like': 3,
+    'bookmark': 4,
+    'share': 5,
+    'comment': 6,
+    'join': 7
+}
+
+
+class CollaborativeState:
+    """
+    One fitted collaborative model: the user-item matrix, its ID
+    vocabularies and the arrays derived from them (neighbour lists or
+    factors, per MODEL_ARRAYS)
+    
+    A published state is never mutated. Writers build a new one and swap
+    it in with a single assignment, so a reader that takes `filter.state`
+    once sees a matrix, vocabularies and arrays that belong together.
+    """
+    
+    def __init__(
+        self,
+        user_item_matrix: Optional[sparse.csr_matrix] = None,
+        user_ids: Optional[List[str]] = None,
+        item_ids: Optional[List[str]] = None,
+        user_index: Optional[Dict[str, int]] = None,
+        item_index: Optional[Dict[str, int]] = None,
+        reference_time: Optional[float] = None,
+        **arrays: np.ndarray
+    ):
+        self.user_item_matrix = user_item_matrix  # scipy CSR, users x items
+        self.user_ids = user_ids if user_ids is not None else []
+        self.item_ids = item_ids if item_ids is not None else []
+        self.user_index = user_index if user_index is not None else {}  # user_id -> matrix row
+        self.item_index = item_index if item_index is not None else {}  # item_id -> matrix column
+        # Unix time the stored weights are decayed to
+        self.reference_time = reference_time
+        self.__dict__.update(arrays)
+    
+    def replace(self, **changes) -> 'CollaborativeState':
+        """Copy of this state with some attributes replaced"""
+        state = CollaborativeState.__new__(CollaborativeState)
+        state.__dict__.update(self.__dict__, **changes)
+        return state
+
+
+def _state_attribute(name: str) -> property:
+    """Read-only view of an attribute of the current state"""
+    return property(lambda self: getattr(self.state, name, None))
 
 
 class CollaborativeFilter:
     """Collaborative filtering for user-user recommendations"""
     
-    def __init__(self):
-        self.user_item_matrix = None
-        self.user_similarity = None
-        self.user_ids = []
-        
-    def fit(self, interactions: List[Dict]):
+    # Stored in the artifact manifest to pick the class on load
+    STRATEGY = 'user'
+    # Fitted arrays saved as cf_<name>.npy next to the matrix
+    MODEL_ARRAYS = ('neighbor_indices', 'neighbor_scores')
+    
+    user_item_matrix = _state_attribute('user_item_matrix')
+    user_ids = _state_attribute('user_ids')
+    item_ids = _state_attribute('item_ids')
+    user_index = _state_attribute('user_index')
+    item_index = _state_attribute('item_index')
+    reference_time = _state_attribute('reference_time')
+    # Top-K neighbours per user, sorted by similarity; padded with -1 / 0.0
+    neighbor_indices = _state_attribute('neighbor_indices')
+    neighbor_scores = _state_attribute('neighbor_scores')
+    
+    def __init__(
+        self,
+        n_neighbors: int = 20,
+        similarity_chunk_size: int = 1024,
+        neighbor_backend: str = 'exact',
+        ann_params: Optional[Dict] = None,
+        half_life_days: Optional[float] = None,
+        min_weight: float = 0.01
+    ):
+        if neighbor_backend not in ('exact', 'lsh'):
+            raise ValueError(f"Unknown neighbor backend: {neighbor_backend}")
+        self.n_neighbors = n_neighbors
+        self.similarity_chunk_size = similarity_chunk_size
+        # 'lsh' finds fit-time neighbours with RandomProjectionLSH(**ann_params);
+        # measure its recall with app.ml.ann.evaluate_recall first
+        self.neighbor_backend = neighbor_backend
+        self.ann_params = ann_params or {}
+        # Interaction weights halve every half_life_days (None: no decay);
+        # decayed entries below min_weight are dropped from the matrix
+        self.half_life_days = half_life_days
+        self.min_weight = min_weight
+        # Everything fitted; replaced as a whole by fit/partial_fit/compact/decay_to
+        self.state = CollaborativeState()
+        # Interactions folded in by partial_fit since the last full neighbour pass
+        self.updates_since_compaction = 0
+    
+    def fit(self, interactions: List[Dict], now: Optional[float] = None):
         """
         Build user-item interaction matrix
         
+        User and item IDs are integer-encoded and the matrix is kept sparse,
+        so memory grows with the number of interactions rather than
+        users x items. Each user's top-K neighbours are precomputed here so
+        requests never touch the full similarity matrix.
+        
         Args:
             interactions: List of dicts with keys: user_id, target_id, interaction_type, created_at
+            now: Unix time to decay weights to (default: current time)
         """
         if not interactions:
             return
@@ -29,133 +138,1021 @@ class CollaborativeFilter:
         df = pd.DataFrame(interactions)
         
         # Weight different interaction types
-        interaction_weights = {
-            'view': 1,
-            'like': 3,
-            'bookmark': 4,
-            'share': 5,
-            'comment': 6,
-            'join': 7
-        }
+        weights = df['interaction_type'].map(INTERACTION_WEIGHTS).fillna(0).to_numpy(dtype=np.float32)
+        
+        # Integer-encode IDs; the uniques become the row/column vocabularies
+        user_codes, user_ids = pd.factorize(df['user_id'], sort=True)
+        item_codes, item_ids = pd.factorize(df['target_id'], sort=True)
+        self.fit_arrays(
+            user_codes, item_codes, weights, user_ids.tolist(), item_ids.tolist(),
+            timestamps=self._timestamps(df), now=now
+        )
+    
+    def fit_arrays(
+        self,
+        user_codes: np.ndarray,
+        item_codes: np.ndarray,
+        weights: np.ndarray,
+        user_ids: List[str],
+        item_ids: List[str],
+        timestamps: Optional[np.ndarray] = None,
+        now: Optional[float] = None
+    ):
+        """
+        fit() from integer-coded interactions, e.g. an InteractionArrays
+        streamed by app.ml.loader, without building dicts or a DataFrame
+        
+        Args:
+            user_codes: Row of each interaction, indexing user_ids
+            item_codes: Column of each interaction, indexing item_ids
+            weights: Weight of each interaction
+            timestamps: Unix time of each interaction, for decay
+            now: Unix time to decay weights to (default: current time)
+        """
+        if len(user_codes) == 0:
+            return
+        reference_time = time.time() if now is None else now
+        weights = self._decay(weights, timestamps, reference_time)
+        user_ids = list(user_ids)
+        item_ids = list(item_ids)
         
-        df['weight'] = df['interaction_type'].map(interaction_weights)
+        # Create user-item matrix; duplicate (user, item) pairs are summed
+        matrix = sparse.csr_matrix(
+            (weights, (user_codes, item_codes)),
+            shape=(len(user_ids), len(item_ids)),
+            dtype=np.float32
+        )
+        matrix.sum_duplicates()
+        if self.half_life_days is not None:
+            matrix.data[matrix.data < self.min_weight] = 0
+            matrix.eliminate_zeros()
         
-        # Create user-item matrix
-        self.user_item_matrix = df.pivot_table(
-            index='user_id',
-            columns='target_id',
-            values='weight',
-            aggfunc='sum',
-            fill_value=0
+        state = CollaborativeState(
+            matrix, user_ids, item_ids,
+            {user_id: idx for idx, user_id in enumerate(user_ids)},
+            {item_id: idx for idx, item_id in enumerate(item_ids)},
+            reference_time
         )
+        self.state = state.replace(**self._compute_neighbors(state))
+        self.updates_since_compaction = 0
+    
+    def partial_fit(self, interactions: List[Dict], now: Optional[float] = None):
+        """
+        Fold new interactions into the fitted model without a full rebuild
         
-        self.user_ids = self.user_item_matrix.index.tolist()
+        Unseen users and items are appended to the vocabularies. Users with
+        new interactions get an exact neighbour list, and they are merged
+        into the lists of the users they overlap with. Lists of other users
+        can drift (a neighbour may have been pushed out by someone who has
+        since moved), so call compact() periodically.
         
-        # Calculate user similarity matrix
-        self.user_similarity = cosine_similarity(self.user_item_matrix)
+        Vocabularies, matrix and neighbour arrays are built on copies and
+        published together as a new state, so concurrent readers always
+        see a consistent model. Updates themselves must not run
+        concurrently. With decay enabled the stored weights are first aged
+        to `now` (see decay_to).
+        """
+        self.decay_to(now)
+        if not interactions:
+            return
+        state = self.state
+        if state.user_item_matrix is None:
+            self.fit(interactions, now=now)
+            return
         
+        df = pd.DataFrame(interactions)
+        weights = df['interaction_type'].map(INTERACTION_WEIGHTS).fillna(0).to_numpy(dtype=np.float32)
+        weights = self._decay(weights, self._timestamps(df), state.reference_time)
+        user_codes, user_ids, user_index = self._encode(df['user_id'], state.user_ids, state.user_index)
+        item_codes, item_ids, item_index = self._encode(df['target_id'], state.item_ids, state.item_index)
+        shape = (len(user_ids), len(item_ids))
+        
+        # Grow the matrix to the new vocabularies; new rows are empty, so
+        # only indptr needs extending
+        matrix = state.user_item_matrix
+        indptr = np.concatenate([
+            matrix.indptr,
+            np.full(shape[0] - matrix.shape[0], matrix.indptr[-1], dtype=matrix.indptr.dtype)
+        ])
+        matrix = sparse.csr_matrix((matrix.data, matrix.indices, indptr), shape=shape)
+        delta = sparse.csr_matrix((weights, (user_codes, item_codes)), shape=shape, dtype=np.float32)
+        
+        # Still holds the old neighbour arrays, which _refresh_neighbors extends
+        state = state.replace(
+            user_item_matrix=(matrix + delta).tocsr(),
+            user_ids=user_ids, item_ids=item_ids, user_index=user_index, item_index=item_index
+        )
+        touched = np.unique(self._changed_rows(user_codes, item_codes))
+        self.state = state.replace(**self._refresh_neighbors(state, touched))
+        self.updates_since_compaction += len(interactions)
+    
+    def compact(self):
+        """Recompute every neighbour list from the current matrix, discarding drift"""
+        state = self.state
+        self.state = state.replace(**self._compute_neighbors(state))
+        self.updates_since_compaction = 0
+    
+    def _timestamps(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Interaction times for _decay; without decay created_at isn't parsed at all"""
+        if self.half_life_days is None:
+            return None
+        return _timestamps(df)
+    
+    def _decay(self, weights: np.ndarray, timestamps: Optional[np.ndarray], reference_time: float) -> np.ndarray:
+        """Decay interaction weights from their timestamps to reference_time"""
+        if self.half_life_days is None or timestamps is None:
+            return weights
+        age_days = np.maximum(reference_time - np.asarray(timestamps, dtype=np.float64), 0) / 86400
+        factors = np.exp2(-age_days / self.half_life_days)
+        # Interactions without a timestamp are treated as current
+        factors[np.isnan(factors)] = 1.0
+        return (weights * factors).astype(np.float32)
+    
+    def decay_to(self, now: Optional[float] = None):
+        """
+        Age the stored weights to `now` without re-reading history
+        
+        Exponential decay from one reference time to the next is the same
+        factor for every interaction, so the whole matrix is rescaled in one
+        pass. Cosine neighbours are scale-invariant; what changes is the
+        weight of older interactions relative to ones added afterwards.
+        Entries that fall below min_weight are dropped; the neighbour lists
+        of their users drift until the next compact().
+        """
+        state = self.state
+        if self.half_life_days is None or state.user_item_matrix is None:
+            return
+        now = time.time() if now is None else now
+        if state.reference_time is None:
+            self.state = state.replace(reference_time=now)
+            return
+        elapsed = now - state.reference_time
+        if elapsed <= 0:
+            return
+        
+        matrix = state.user_item_matrix
+        data = matrix.data * np.float32(np.exp2(-elapsed / 86400 / self.half_life_days))
+        keep = data >= self.min_weight
+        if keep.all():
+            matrix = sparse.csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape)
+        else:
+            # Build new arrays; the old matrix may still be in use by readers
+            rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+            row_counts = np.bincount(rows[keep], minlength=matrix.shape[0])
+            indptr = np.concatenate([[0], np.cumsum(row_counts)]).astype(matrix.indptr.dtype)
+            matrix = sparse.csr_matrix((data[keep], matrix.indices[keep], indptr), shape=matrix.shape)
+            self.updates_since_compaction += int((~keep).sum())
+        self.state = state.replace(user_item_matrix=matrix, reference_time=now)
+    
+    def save(self, directory: str) -> Dict:
+        """Write the model and its vocabularies as .npy arrays; returns its manifest entry"""
+        state = self.state
+        arrays = {
+            'cf_matrix_data': state.user_item_matrix.data,
+            'cf_matrix_indices': state.user_item_matrix.indices,
+            'cf_matrix_indptr': state.user_item_matrix.indptr,
+            **{f'cf_{name}': getattr(state, name) for name in self.MODEL_ARRAYS},
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+        save_ids(directory, 'cf_user_ids', state.user_ids)
+        save_ids(directory, 'cf_item_ids', state.item_ids)
+        
+        return {
+            'strategy': self.STRATEGY,
+            'shape': list(state.user_item_matrix.shape),
+            'nnz': int(state.user_item_matrix.nnz),
+            'n_neighbors': self.n_neighbors,
+            'similarity_chunk_size': self.similarity_chunk_size,
+            'neighbor_backend': self.neighbor_backend,
+            'ann_params': self.ann_params,
+            'half_life_days': self.half_life_days,
+            'min_weight': self.min_weight,
+            'reference_time': state.reference_time,
+            'params': self._strategy_params(),
+        }
+    
+    def _strategy_params(self) -> Dict:
+        """Constructor arguments specific to a subclass, restored by load()"""
+        return {}
+    
+    @classmethod
+    def load(cls, directory: str, manifest: Dict, mmap_mode: Optional[str] = 'r') -> 'CollaborativeFilter':
+        """
+        Open a saved model. With mmap_mode the arrays and ID vocabularies
+        are mapped rather than read, so loading is near-instant and
+        processes share the pages.
+        """
+        model = cls(
+            n_neighbors=manifest['n_neighbors'],
+            similarity_chunk_size=manifest['similarity_chunk_size'],
+            neighbor_backend=manifest.get('neighbor_backend', 'exact'),
+            ann_params=manifest.get('ann_params'),
+            half_life_days=manifest.get('half_life_days'),
+            min_weight=manifest.get('min_weight', 0.01),
+            **manifest.get('params', {})
+        )
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ('cf_matrix_data', 'cf_matrix_indices', 'cf_matrix_indptr',
+                         *(f'cf_{name}' for name in cls.MODEL_ARRAYS))
+        }
+        matrix = sparse.csr_matrix(
+            (arrays['cf_matrix_data'], arrays['cf_matrix_indices'], arrays['cf_matrix_indptr']),
+            shape=tuple(manifest['shape']),
+            copy=False
+        )
+        user_ids, user_index = load_ids(directory, 'cf_user_ids', mmap_mode)
+        item_ids, item_index = load_ids(directory, 'cf_item_ids', mmap_mode)
+        model.state = CollaborativeState(
+            matrix, user_ids, item_ids, user_index, item_index, manifest.get('reference_time'),
+            **{name: arrays[f'cf_{name}'] for name in cls.MODEL_ARRAYS}
+        )
+        return model
+    
+    @staticmethod
+    def _encode(ids: pd.Series, vocabulary: List[str], index: Dict[str, int]) -> Tuple[np.ndarray, List[str], Dict[str, int]]:
+        """
+        Map IDs to integer codes. Unseen IDs are appended to a copy of the
+        vocabulary, never to the published one; returns (codes, vocabulary, index).
+        """
+        codes = np.empty(len(ids), dtype=np.int64)
+        copied = False
+        for position, value in enumerate(ids):
+            code = index.get(value)
+            if code is None:
+                if not copied:
+                    vocabulary, index, copied = vocabulary.copy(), index.copy(), True
+                code = index[value] = len(vocabulary)
+                vocabulary.append(value)
+            codes[position] = code
+        return codes, vocabulary, index
+    
+    @staticmethod
+    def _neighbor_source(state: CollaborativeState) -> sparse.csr_matrix:
+        """Matrix whose rows get neighbour lists: users here"""
+        return state.user_item_matrix
+    
+    @staticmethod
+    def _changed_rows(user_codes: np.ndarray, item_codes: np.ndarray) -> np.ndarray:
+        """Rows of _neighbor_source() touched by new interactions"""
+        return user_codes
+    
+    def _neighbor_count(self, n_rows: int) -> int:
+        return max(min(self.n_neighbors, n_rows - 1), 0)
+    
+    @staticmethod
+    def _top_k(cols: np.ndarray, sims: np.ndarray, exclude: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best k (column, similarity) pairs of one similarity row, sorted descending"""
+        # Drop self and users with nothing in common
+        keep = (cols != exclude) & (sims > 0)
+        cols, sims = cols[keep], sims[keep]
+        
+        if len(sims) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            cols, sims = cols[top], sims[top]
+        order = np.argsort(-sims, kind='stable')
+        return cols[order], sims[order]
+    
+    def _compute_neighbors(self, state: CollaborativeState) -> Dict[str, np.ndarray]:
+        """Each row's top-K cosine neighbours in `state`, computed a chunk of rows at a time"""
+        normalized = normalize(self._neighbor_source(state), norm='l2', axis=1).tocsr()
+        n_users = normalized.shape[0]
+        k = self._neighbor_count(n_users)
+        
+        neighbor_indices = np.full((n_users, k), -1, dtype=np.int32)
+        neighbor_scores = np.zeros((n_users, k), dtype=np.float32)
+        
+        if k > 0 and self.neighbor_backend == 'lsh':
+            index = RandomProjectionLSH(**self.ann_params).fit(normalized)
+            for start in range(0, n_users, self.similarity_chunk_size):
+                stop = min(start + self.similarity_chunk_size, n_users)
+                neighbor_indices[start:stop], neighbor_scores[start:stop] = index.query(
+                    normalized[start:stop], k, exclude=np.arange(start, stop)
+                )
+        elif k > 0:
+            transposed = normalized.T.tocsc()
+            for start in range(0, n_users, self.similarity_chunk_size):
+                stop = min(start + self.similarity_chunk_size, n_users)
+                block = (normalized[start:stop] @ transposed).tocsr()
+                
+                for row in range(stop - start):
+                    lo, hi = block.indptr[row], block.indptr[row + 1]
+                    cols, sims = self._top_k(block.indices[lo:hi], block.data[lo:hi], start + row, k)
+                    neighbor_indices[start + row, :len(cols)] = cols
+                    neighbor_scores[start + row, :len(cols)] = sims
+        
+        return {'neighbor_indices': neighbor_indices, 'neighbor_scores': neighbor_scores}
+    
+    def _refresh_neighbors(self, state: CollaborativeState, touched: np.ndarray) -> Dict[str, np.ndarray]:
+        """Neighbour lists for `state` (new matrix, previous lists) after the rows in `touched` changed"""
+        normalized = normalize(self._neighbor_source(state), norm='l2', axis=1).tocsr()
+        n_users = normalized.shape[0]
+        k = self._neighbor_count(n_users)
+        
+        # Pad for new users (rows) and for k growing on small models (columns)
+        old_users, old_k = state.neighbor_indices.shape
+        neighbor_indices = np.full((n_users, k), -1, dtype=np.int32)
+        neighbor_scores = np.zeros((n_users, k), dtype=np.float32)
+        neighbor_indices[:old_users, :old_k] = state.neighbor_indices[:, :k]
+        neighbor_scores[:old_users, :old_k] = state.neighbor_scores[:, :k]
+        
+        if k > 0:
+            is_touched = np.zeros(n_users, dtype=bool)
+            is_touched[touched] = True
+            transposed = normalized.T.tocsc()
+            
+            for start in range(0, len(touched), self.similarity_chunk_size):
+                rows = touched[start:start + self.similarity_chunk_size]
+                block = (normalized[rows] @ transposed).tocsr()
+                
+                for row, user_idx in enumerate(rows):
+                    lo, hi = block.indptr[row], block.indptr[row + 1]
+                    cols, sims = block.indices[lo:hi], block.data[lo:hi]
+                    
+                    # Exact list for the user whose row changed
+                    top_cols, top_sims = self._top_k(cols, sims, user_idx, k)
+                    neighbor_indices[user_idx] = -1
+                    neighbor_scores[user_idx] = 0
+                    neighbor_indices[user_idx, :len(top_cols)] = top_cols
+                    neighbor_scores[user_idx, :len(top_cols)] = top_sims
+                    
+                    # Similarity is symmetric: fold this user into the lists
+                    # of untouched users it overlaps with
+                    keep = ~is_touched[cols] & (sims > 0)
+                    self._merge_neighbor(neighbor_indices, neighbor_scores, user_idx, cols[keep], sims[keep])
+        
+        return {'neighbor_indices': neighbor_indices, 'neighbor_scores': neighbor_scores}
+    
+    @staticmethod
+    def _merge_neighbor(neighbor_indices, neighbor_scores, user_idx: int, rows: np.ndarray, sims: np.ndarray):
+        """Set `user_idx` as a neighbour of each of `rows` with the given similarity, keeping lists sorted"""
+        if len(rows) == 0:
+            return
+        position = neighbor_indices[rows] == user_idx
+        present = position.any(axis=1)
+        
+        # Already a neighbour: refresh the score in place
+        neighbor_scores[rows[present], position[present].argmax(axis=1)] = sims[present]
+        
+        # Otherwise it replaces the weakest entry if it beats it
+        better = ~present & (sims > neighbor_scores[rows, -1])
+        neighbor_indices[rows[better], -1] = user_idx
+        neighbor_scores[rows[better], -1] = sims[better]
+        
+        changed = rows[present | better]
+        order = np.argsort(-neighbor_scores[changed], axis=1, kind='stable')
+        neighbor_indices[changed] = np.take_along_axis(neighbor_indices[changed], order, axis=1)
+        neighbor_scores[changed] = np.take_along_axis(neighbor_scores[changed], order, axis=1)
+    
     def get_similar_users(self, user_id: str, n: int = 10) -> List[Tuple[str, float]]:
-        """Get N most similar users"""
-        if user_id not in self.user_ids:
+        """Get N most similar users (at most n_neighbors)"""
+        state = self.state
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
             return []
         
-        user_idx = self.user_ids.index(user_id)
-        similarities = self.user_similarity[user_idx]
+        indices = state.neighbor_indices[user_idx, :n]
+        similarities = state.neighbor_scores[user_idx, :n]
+        valid = indices >= 0
         
-        # Get indices of most similar users (excluding self)
-        similar_indices = np.argsort(similarities)[::-1][1:n+1]
+        return [(state.user_ids[idx], float(sim)) for idx, sim in zip(indices[valid], similarities[valid])]
+    
+    def get_similar_items(self, item_id: str, n: int = 10) -> List[Tuple[str, float]]:
+        """
+        Items most similar to `item_id` by cosine over the users who
+        interacted with them. Computed per call here; ItemBasedFilter
+        precomputes these lists.
+        """
+        state = self.state
+        item_idx = state.item_index.get(item_id)
+        if item_idx is None or state.user_item_matrix is None:
+            return []
         
-        return [(self.user_ids[idx], similarities[idx]) for idx in similar_indices]
+        items = state.user_item_matrix.T.tocsr()
+        similarities = np.asarray((items @ items[item_idx].T).todense()).ravel()
+        norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+        similarities = np.divide(
+            similarities, norms * norms[item_idx], out=np.zeros_like(similarities), where=norms > 0
+        )
+        similarities[item_idx] = 0
+        candidates = np.flatnonzero(similarities > 0)
+        top = candidates[_top_n_indices(similarities[candidates], n)]
+        return [(state.item_ids[idx], float(similarities[idx])) for idx in top]
     
     def recommend_items(self, user_id: str, n: int = 10) -> List[str]:
         """Recommend items based on similar users"""
-        if user_id not in self.user_ids:
+        state = self.state
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
+            return []
+        
+        neighbors = state.neighbor_indices[user_idx]
+        similarities = state.neighbor_scores[user_idx]
+        valid = neighbors >= 0
+        neighbors, similarities = neighbors[valid], similarities[valid]
+        if len(neighbors) == 0:
             return []
         
-        similar_users = self.get_similar_users(user_id, n=20)
+        # Score every item the neighbours touched: sum(weight * similarity)
+        matrix = state.user_item_matrix
+        neighbor_rows = matrix[neighbors]
+        row_similarity = np.repeat(similarities, np.diff(neighbor_rows.indptr))
+        candidates, inverse = np.unique(neighbor_rows.indices, return_inverse=True)
+        scores = np.bincount(inverse, weights=neighbor_rows.data * row_similarity)
         
         # Get items interacted by similar users but not by target user
-        user_idx = self.user_ids.index(user_id)
-        user_items = set(self.user_item_matrix.iloc[user_idx][self.user_item_matrix.iloc[user_idx] > 0].index)
+        user_items = matrix.indices[matrix.indptr[user_idx]:matrix.indptr[user_idx + 1]]
+        unseen = ~np.isin(candidates, user_items)
+        candidates, scores = candidates[unseen], scores[unseen]
         
-        recommendations = {}
-        for similar_user_id, similarity in similar_users:
-            similar_user_idx = self.user_ids.index(similar_user_id)
-            similar_user_items = self.user_item_matrix.iloc[similar_user_idx]
-            
-            for item_id, score in similar_user_items[similar_user_items > 0].items():
-                if item_id not in user_items:
-                    recommendations[item_id] = recommendations.get(item_id, 0) + (score * similarity)
+        return [state.item_ids[idx] for idx in candidates[_top_n_indices(scores, n)]]
+    
+    @staticmethod
+    def _rows(state: CollaborativeState, user_ids: List[str]) -> np.ndarray:
+        """Matrix row of each user, -1 for unknown users"""
+        return np.fromiter((state.user_index.get(user_id, -1) for user_id in user_ids),
+                           dtype=np.int64, count=len(user_ids))
+    
+    def recommend_item_indices(
+        self,
+        user_ids: List[str],
+        n: int = 10,
+        state: Optional[CollaborativeState] = None
+    ) -> np.ndarray:
+        """
+        recommend_items for many users at once, as item columns
+        
+        Args:
+            state: Model to score with (default: the current one); pass the
+                state the caller maps columns with
+        
+        Returns:
+            (users x n) matrix columns, best first, padded with -1
+        """
+        state = state or self.state
+        rows = self._rows(state, user_ids)
+        result = np.full((len(user_ids), n), -1, dtype=np.int32)
+        known = np.flatnonzero(rows >= 0)
+        if len(known) == 0 or n <= 0:
+            return result
+        
+        # Sparse (users x users) similarity weights, one row per requested user
+        neighbors = state.neighbor_indices[rows[known]]
+        valid = neighbors >= 0
+        weights = sparse.csr_matrix(
+            (state.neighbor_scores[rows[known]][valid], (np.nonzero(valid)[0], neighbors[valid])),
+            shape=(len(known), len(state.user_ids))
+        )
+        
+        # Score items by sum(weight * similarity), dropping what users already have
+        scores = (weights @ state.user_item_matrix).tocsr()
+        seen = state.user_item_matrix[rows[known]]
+        scores = (scores - scores.multiply(seen > 0)).tocoo()
+        
+        indices, _ = top_k_pairs(scores.row, scores.col, scores.data, len(known), n)
+        result[known] = indices
+        return result
+    
+    def recommend_items_batch(self, user_ids: List[str], n: int = 10) -> List[List[str]]:
+        """recommend_items for many users with sparse matrix products instead of a loop"""
+        state = self.state
+        return [
+            [state.item_ids[idx] for idx in row if idx >= 0]
+            for row in self.recommend_item_indices(user_ids, n, state=state).tolist()
+        ]
+    
+    def similar_users_batch(self, user_ids: List[str], n: int = 10) -> List[List[str]]:
+        """get_similar_users for many users, IDs only"""
+        state = self.state
+        rows = self._rows(state, user_ids)
+        neighbors = np.where(rows[:, None] >= 0, state.neighbor_indices[np.maximum(rows, 0), :n], -1)
+        return [[state.user_ids[idx] for idx in row if idx >= 0] for row in neighbors.tolist()]
+
+
+class ItemBasedFilter(CollaborativeFilter):
+    """
+    Item-item collaborative filtering
+    
+    Fits the same user-item matrix, but the precomputed top-K neighbour
+    lists belong to items, so their cost grows with the catalogue rather
+    than the number of users. "People who liked this also liked" is one
+    row lookup, and a user's recommendations sum the neighbour lists of
+    the items they interacted with, weighted by interaction strength.
+    Similar-user lookups are not available in this mode.
+    """
+    
+    STRATEGY = 'item'
+    
+    @staticmethod
+    def _neighbor_source(state: CollaborativeState) -> sparse.csr_matrix:
+        return state.user_item_matrix.T.tocsr()
+    
+    @staticmethod
+    def _changed_rows(user_codes: np.ndarray, item_codes: np.ndarray) -> np.ndarray:
+        return item_codes
+    
+    def get_similar_users(self, user_id: str, n: int = 10) -> List[Tuple[str, float]]:
+        return []
+    
+    def similar_users_batch(self, user_ids: List[str], n: int = 10) -> List[List[str]]:
+        return [[] for _ in user_ids]
+    
+    def get_similar_items(self, item_id: str, n: int = 10) -> List[Tuple[str, float]]:
+        """Get N most similar items (at most n_neighbors)"""
+        state = self.state
+        item_idx = state.item_index.get(item_id)
+        if item_idx is None:
+            return []
+        
+        indices = state.neighbor_indices[item_idx, :n]
+        similarities = state.neighbor_scores[item_idx, :n]
+        valid = indices >= 0
+        
+        return [(state.item_ids[idx], float(sim)) for idx, sim in zip(indices[valid], similarities[valid])]
+    
+    @staticmethod
+    def _item_similarity_matrix(state: CollaborativeState) -> sparse.csr_matrix:
+        """Neighbour lists as a sparse (items x items) matrix"""
+        valid = state.neighbor_indices >= 0
+        n_items = state.neighbor_indices.shape[0]
+        return sparse.csr_matrix(
+            (state.neighbor_scores[valid], (np.nonzero(valid)[0], state.neighbor_indices[valid])),
+            shape=(n_items, n_items)
+        )
+    
+    def recommend_items(self, user_id: str, n: int = 10) -> List[str]:
+        """Recommend items similar to the ones the user interacted with"""
+        state = self.state
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
+            return []
+        
+        matrix = state.user_item_matrix
+        lo, hi = matrix.indptr[user_idx], matrix.indptr[user_idx + 1]
+        user_items = matrix.indices[lo:hi]
+        user_weights = matrix.data[lo:hi]
+        
+        # Score every neighbour of the user's items: sum(weight * similarity)
+        neighbors = state.neighbor_indices[user_items]
+        valid = neighbors >= 0
+        row_weight = np.broadcast_to(user_weights[:, None], neighbors.shape)
+        candidates, inverse = np.unique(neighbors[valid], return_inverse=True)
+        scores = np.bincount(inverse, weights=row_weight[valid] * state.neighbor_scores[user_items][valid])
+        
+        unseen = ~np.isin(candidates, user_items)
+        candidates, scores = candidates[unseen], scores[unseen]
+        
+        return [state.item_ids[idx] for idx in candidates[_top_n_indices(scores, n)]]
+    
+    def recommend_item_indices(
+        self,
+        user_ids: List[str],
+        n: int = 10,
+        state: Optional[CollaborativeState] = None
+    ) -> np.ndarray:
+        """recommend_items for many users at once, as item columns padded with -1"""
+        state = state or self.state
+        rows = self._rows(state, user_ids)
+        result = np.full((len(user_ids), n), -1, dtype=np.int32)
+        known = np.flatnonzero(rows >= 0)
+        if len(known) == 0 or n <= 0:
+            return result
+        
+        seen = state.user_item_matrix[rows[known]]
+        scores = (seen @ self._item_similarity_matrix(state)).tocsr()
+        scores = (scores - scores.multiply(seen > 0)).tocoo()
         
-        # Sort by score and return top N
-        sorted_recommendations = sorted(recommendations.items(), key=lambda x: x[1], reverse=True)
-        return [item_id for item_id, _ in sorted_recommendations[:n]]
+        indices, _ = top_k_pairs(scores.row, scores.col, scores.data, len(known), n)
+        result[known] = indices
+        return result
+
+
+class FactorizationFilter(CollaborativeFilter):
+    """
+    Collaborative filtering by implicit matrix factorization
+    
+    Fits the same (optionally decayed) user-item matrix, but instead of
+    neighbour lists it keeps a small factor vector per user and per item
+    (app.ml.factorization.ImplicitALS); scores are dot products. compact()
+    refits all factors, partial_fit() re-solves the changed users against
+    the current item factors, and new items score 0 until the next
+    compact().
+    """
+    
+    STRATEGY = 'als'
+    MODEL_ARRAYS = ('user_factors', 'item_factors')
+    
+    user_factors = _state_attribute('user_factors')  # float32, users x factors
+    item_factors = _state_attribute('item_factors')  # float32, items x factors
+    
+    def __init__(
+        self,
+        factors: int = 32,
+        regularization: float = 0.1,
+        alpha: float = 2.0,
+        iterations: int = 10,
+        n_jobs: int = 1,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        # Threads used to solve batches of least-squares problems
+        self.n_jobs = n_jobs
+    
+    def _strategy_params(self) -> Dict:
+        return {
+            'factors': self.factors,
+            'regularization': self.regularization,
+            'alpha': self.alpha,
+            'iterations': self.iterations,
+            'n_jobs': self.n_jobs,
+        }
+    
+    def _engine(self) -> ImplicitALS:
+        return ImplicitALS(
+            factors=self.factors,
+            regularization=self.regularization,
+            alpha=self.alpha,
+            iterations=self.iterations,
+            n_jobs=self.n_jobs
+        )
+    
+    def _compute_neighbors(self, state: CollaborativeState) -> Dict[str, np.ndarray]:
+        """Fit user and item factors from the matrix in `state`"""
+        engine = self._engine().fit(state.user_item_matrix)
+        return {'user_factors': engine.user_factors, 'item_factors': engine.item_factors}
+    
+    def _refresh_neighbors(self, state: CollaborativeState, touched: np.ndarray) -> Dict[str, np.ndarray]:
+        """Re-solve the factors of users in `touched` with item factors held fixed"""
+        n_users, n_items = state.user_item_matrix.shape
+        user_factors = np.zeros((n_users, self.factors), dtype=np.float32)
+        item_factors = np.zeros((n_items, self.factors), dtype=np.float32)
+        user_factors[:len(state.user_factors)] = state.user_factors
+        item_factors[:len(state.item_factors)] = state.item_factors
+        user_factors[touched] = self._engine().solve(state.user_item_matrix, item_factors, rows=touched)
+        return {'user_factors': user_factors, 'item_factors': item_factors}
+    
+    @staticmethod
+    def _cosine_neighbors(factors: np.ndarray, row: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        norms = np.linalg.norm(factors, axis=1)
+        similarities = factors @ factors[row]
+        similarities = np.divide(
+            similarities, norms * norms[row], out=np.zeros_like(similarities), where=norms > 0
+        )
+        similarities[row] = 0
+        candidates = np.flatnonzero(similarities > 0)
+        top = candidates[_top_n_indices(similarities[candidates], n)]
+        return top, similarities[top]
+    
+    def get_similar_users(self, user_id: str, n: int = 10) -> List[Tuple[str, float]]:
+        """Users whose factors point the same way (cosine)"""
+        state = self.state
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
+            return []
+        top, similarities = self._cosine_neighbors(state.user_factors, user_idx, n)
+        return [(state.user_ids[idx], float(sim)) for idx, sim in zip(top, similarities)]
+    
+    def similar_users_batch(self, user_ids: List[str], n: int = 10) -> List[List[str]]:
+        return [[user_id for user_id, _ in self.get_similar_users(user_id, n)] for user_id in user_ids]
+    
+    def get_similar_items(self, item_id: str, n: int = 10) -> List[Tuple[str, float]]:
+        """Items whose factors point the same way (cosine)"""
+        state = self.state
+        item_idx = state.item_index.get(item_id)
+        if item_idx is None:
+            return []
+        top, similarities = self._cosine_neighbors(state.item_factors, item_idx, n)
+        return [(state.item_ids[idx], float(sim)) for idx, sim in zip(top, similarities)]
+    
+    def recommend_items(self, user_id: str, n: int = 10) -> List[str]:
+        """Items with the highest predicted preference the user hasn't interacted with"""
+        state = self.state
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
+            return []
+        
+        scores = state.item_factors @ state.user_factors[user_idx]
+        matrix = state.user_item_matrix
+        lo, hi = matrix.indptr[user_idx], matrix.indptr[user_idx + 1]
+        scores[matrix.indices[lo:hi]] = -np.inf
+        top = _top_n_indices(scores, n)
+        return [state.item_ids[idx] for idx in top[np.isfinite(scores[top])]]
+    
+    def recommend_item_indices(
+        self,
+        user_ids: List[str],
+        n: int = 10,
+        state: Optional[CollaborativeState] = None
+    ) -> np.ndarray:
+        """recommend_items for many users at once, as item columns padded with -1"""
+        state = state or self.state
+        rows = self._rows(state, user_ids)
+        result = np.full((len(user_ids), n), -1, dtype=np.int32)
+        known = np.flatnonzero(rows >= 0)
+        if len(known) == 0 or n <= 0:
+            return result
+        
+        scores = state.user_factors[rows[known]] @ state.item_factors.T
+        seen = state.user_item_matrix[rows[known]].tocoo()
+        scores[seen.row, seen.col] = -np.inf
+        top = _top_n_rows(scores, n)
+        result[known, :top.shape[1]] = np.where(np.isfinite(np.take_along_axis(scores, top, axis=1)), top, -1)
+        return result
+
+
+# Collaborative filter class per HybridRecommender strategy
+COLLABORATIVE_STRATEGIES = {
+    CollaborativeFilter.STRATEGY: CollaborativeFilter,
+    ItemBasedFilter.STRATEGY: ItemBasedFilter,
+    FactorizationFilter.STRATEGY: FactorizationFilter,
+}
 
 
 class ContentBasedFilter:
     """Content-based filtering using user profiles and item features"""
     
+    # Score = SKILL_WEIGHT * jaccard(skills, tags) + CATEGORY_WEIGHT * (category in interests)
+    SKILL_WEIGHT = 0.7
+    CATEGORY_WEIGHT = 0.3
+    
     def __init__(self):
-        self.user_profiles = {}
-        self.item_features = {}
+        # Shared vocabularies: skills and tags, interests and categories
+        self.feature_ids = []
+        self.feature_index = {}
+        self.category_ids = []
+        self.category_index = {}
+        
+        self.user_ids = []
+        self.user_index = {}
+        self.item_ids = []
+        self.item_index = {}
+        
+        # Multi-hot CSR matrices (rows x vocabulary), rebuilt lazily from
+        # the pending profile/feature updates below
+        self.user_features = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.user_interests = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.item_features = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.item_categories = np.zeros(0, dtype=np.int32)  # -1 when unknown
+        self._pending_users = {}
+        self._pending_items = {}
         
     def build_user_profile(self, user_id: str, skills: List[str], interests: List[str]):
         """Build user profile vector"""
-        self.user_profiles[user_id] = {
-            'skills': set(skills),
-            'interests': set(interests)
-        }
+        row = self._intern(user_id, self.user_ids, self.user_index)
+        self._pending_users[row] = (
+            self._intern_all(skills, self.feature_ids, self.feature_index),
+            self._intern_all(interests, self.category_ids, self.category_index)
+        )
     
     def add_item_features(self, item_id: str, tags: List[str], category: str):
         """Add item features"""
-        self.item_features[item_id] = {
-            'tags': set(tags),
-            'category': category
-        }
+        row = self._intern(item_id, self.item_ids, self.item_index)
+        category_code = -1 if category is None else self._intern(category, self.category_ids, self.category_index)
+        self._pending_items[row] = (
+            self._intern_all(tags, self.feature_ids, self.feature_index),
+            category_code
+        )
     
-    def calculate_similarity(self, user_id: str, item_id: str) -> float:
-        """Calculate similarity between user and item"""
-        if user_id not in self.user_profiles or item_id not in self.item_features:
-            return 0.0
+    @staticmethod
+    def _intern(value: str, vocabulary: List[str], index: Dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(vocabulary)
+            vocabulary.append(value)
+        return code
+    
+    @classmethod
+    def _intern_all(cls, values: List[str], vocabulary: List[str], index: Dict[str, int]) -> np.ndarray:
+        return np.unique(np.array(
+            [cls._intern(value, vocabulary, index) for value in values], dtype=np.int32
+        ))
+    
+    @staticmethod
+    def _merge_rows(matrix, shape: Tuple[int, int], rows: Dict[int, np.ndarray]):
+        """Return `matrix` grown to `shape` with the given rows replaced by multi-hot codes"""
+        existing = matrix.tocoo()
+        keep = ~np.isin(existing.row, np.fromiter(rows, dtype=np.int64, count=len(rows)))
+        new_rows = np.concatenate(
+            [existing.row[keep]] + [np.full(len(codes), row) for row, codes in rows.items()]
+        ).astype(np.int64)
+        new_cols = np.concatenate([existing.col[keep]] + list(rows.values())).astype(np.int64)
+        return sparse.csr_matrix(
+            (np.ones(len(new_rows), dtype=np.float32), (new_rows, new_cols)),
+            shape=shape
+        )
+    
+    def _build(self):
+        """Fold pending updates into the matrices"""
+        n_features, n_categories = len(self.feature_ids), len(self.category_ids)
         
-        user_profile = self.user_profiles[user_id]
-        item_features = self.item_features[item_id]
+        if self._pending_users or self.user_features.shape != (len(self.user_ids), n_features):
+            pending, self._pending_users = self._pending_users, {}
+            self.user_features = self._merge_rows(
+                self.user_features, (len(self.user_ids), n_features),
+                {row: skills for row, (skills, _) in pending.items()}
+            )
+            self.user_interests = self._merge_rows(
+                self.user_interests, (len(self.user_ids), n_categories),
+                {row: interests for row, (_, interests) in pending.items()}
+            )
         
-        # Calculate Jaccard similarity for skills/tags
-        skills_tags_union = user_profile['skills'] | item_features['tags']
-        skills_tags_intersection = user_profile['skills'] & item_features['tags']
+        if self._pending_items or self.item_features.shape != (len(self.item_ids), n_features):
+            pending, self._pending_items = self._pending_items, {}
+            self.item_features = self._merge_rows(
+                self.item_features, (len(self.item_ids), n_features),
+                {row: tags for row, (tags, _) in pending.items()}
+            )
+            categories = np.full(len(self.item_ids), -1, dtype=np.int32)
+            categories[:len(self.item_categories)] = self.item_categories
+            for row, (_, category) in pending.items():
+                categories[row] = category
+            self.item_categories = categories
+    
+    def score_items(self, user_id: str, item_ids: List[str]) -> np.ndarray:
+        """Similarity between a user and each item, computed for all items at once"""
+        self._build()
+        scores = np.zeros(len(item_ids), dtype=np.float32)
+        user_idx = self.user_index.get(user_id)
+        if user_idx is None or len(item_ids) == 0:
+            return scores
         
-        if len(skills_tags_union) == 0:
-            skill_similarity = 0
-        else:
-            skill_similarity = len(skills_tags_intersection) / len(skills_tags_union)
+        rows = np.fromiter((self.item_index.get(item_id, -1) for item_id in item_ids),
+                           dtype=np.int64, count=len(item_ids))
+        known = rows >= 0
+        rows = rows[known]
+        items = self.item_features[rows]
+        
+        user_skills = self.user_features.indices[
+            self.user_features.indptr[user_idx]:self.user_features.indptr[user_idx + 1]
+        ]
+        user_interests = self.user_interests.indices[
+            self.user_interests.indptr[user_idx]:self.user_interests.indptr[user_idx + 1]
+        ]
+        
+        # Jaccard similarity for skills/tags: |A & B| / (|A| + |B| - |A & B|)
+        indicator = np.zeros(items.shape[1], dtype=np.float32)
+        indicator[user_skills] = 1
+        intersection = items @ indicator
+        union = len(user_skills) + np.diff(items.indptr) - intersection
+        skill_similarity = np.divide(
+            intersection, union, out=np.zeros_like(intersection), where=union > 0
+        )
         
         # Check interest-category match
-        category_match = 1.0 if item_features['category'] in user_profile['interests'] else 0.0
+        category_match = np.isin(self.item_categories[rows], user_interests)
         
         # Weighted combination
-        return 0.7 * skill_similarity + 0.3 * category_match
+        scores[known] = self.SKILL_WEIGHT * skill_similarity + self.CATEGORY_WEIGHT * category_match
+        return scores
+    
+    def score_matrix(self, user_ids: List[str], item_ids: List[str]) -> np.ndarray:
+        """score_items for many users at once: a (users x items) matrix"""
+        self._build()
+        scores = np.zeros((len(user_ids), len(item_ids)), dtype=np.float32)
+        user_rows = np.fromiter((self.user_index.get(user_id, -1) for user_id in user_ids),
+                                dtype=np.int64, count=len(user_ids))
+        item_rows = np.fromiter((self.item_index.get(item_id, -1) for item_id in item_ids),
+                                dtype=np.int64, count=len(item_ids))
+        known_users, known_items = np.flatnonzero(user_rows >= 0), np.flatnonzero(item_rows >= 0)
+        if len(known_users) == 0 or len(known_items) == 0:
+            return scores
+        
+        users = self.user_features[user_rows[known_users]]
+        items = self.item_features[item_rows[known_items]]
+        
+        # Jaccard similarity for every (user, item) pair
+        intersection = (users @ items.T).toarray()
+        union = np.diff(users.indptr)[:, None] + np.diff(items.indptr)[None, :] - intersection
+        skill_similarity = np.divide(
+            intersection, union, out=np.zeros_like(intersection), where=union > 0
+        )
+        
+        # Interest-category match: look up each item's category column
+        categories = self.item_categories[item_rows[known_items]]
+        has_category = categories >= 0
+        category_match = np.zeros_like(skill_similarity)
+        category_match[:, has_category] = self.user_interests[user_rows[known_users]][:, categories[has_category]].toarray()
+        
+        scores[np.ix_(known_users, known_items)] = (
+            self.SKILL_WEIGHT * skill_similarity + self.CATEGORY_WEIGHT * category_match
+        )
+        return scores
+    
+    def calculate_similarity(self, user_id: str, item_id: str) -> float:
+        """Calculate similarity between user and item"""
+        return float(self.score_items(user_id, [item_id])[0])
     
     def recommend_items(self, user_id: str, candidate_items: List[str], n: int = 10) -> List[str]:
         """Recommend items based on content similarity"""
-        scores = [(item_id, self.calculate_similarity(user_id, item_id)) for item_id in candidate_items]
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return [item_id for item_id, _ in scores[:n]]
+        scores = self.score_items(user_id, candidate_items)
+        return [candidate_items[idx] for idx in _top_n_indices(scores, n)]
+    
+    def save(self, directory: str) -> Dict:
+        """Write the profile/feature matrices and vocabularies as .npy arrays"""
+        self._build()
+        arrays = {
+            'content_user_features_indices': self.user_features.indices,
+            'content_user_features_indptr': self.user_features.indptr,
+            'content_user_interests_indices': self.user_interests.indices,
+            'content_user_interests_indptr': self.user_interests.indptr,
+            'content_item_features_indices': self.item_features.indices,
+            'content_item_features_indptr': self.item_features.indptr,
+            'content_item_categories': self.item_categories,
+            # Shared data for all three multi-hot matrices, so loading
+            # doesn't allocate a ones array per process
+            'content_ones': np.ones(max(
+                self.user_features.nnz, self.user_interests.nnz, self.item_features.nnz
+            ), dtype=np.float32),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+        for attribute in ('feature', 'category', 'user', 'item'):
+            save_ids(directory, f'content_{attribute}_ids', getattr(self, f'{attribute}_ids'))
+        return {
+            'n_users': len(self.user_ids),
+            'n_items': len(self.item_ids),
+            'n_features': len(self.feature_ids),
+            'n_categories': len(self.category_ids),
+        }
+    
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'ContentBasedFilter':
+        """Open a saved content model, memory-mapping its arrays"""
+        model = cls()
+        for attribute in ('feature', 'category', 'user', 'item'):
+            ids, index = load_ids(directory, f'content_{attribute}_ids', mmap_mode)
+            setattr(model, f'{attribute}_ids', ids)
+            setattr(model, f'{attribute}_index', index)
+        
+        ones = np.load(os.path.join(directory, 'content_ones.npy'), mmap_mode=mmap_mode)
+        
+        def multi_hot(name: str, n_rows: int, n_cols: int):
+            indices = np.load(os.path.join(directory, f'{name}_indices.npy'), mmap_mode=mmap_mode)
+            indptr = np.load(os.path.join(directory, f'{name}_indptr.npy'), mmap_mode=mmap_mode)
+            data = ones[:len(indices)]
+            return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_cols), copy=False)
+        
+        n_users, n_items = len(model.user_ids), len(model.item_ids)
+        model.user_features = multi_hot('content_user_features', n_users, len(model.feature_ids))
+        model.user_interests = multi_hot('content_user_interests', n_users, len(model.category_ids))
+        model.item_features = multi_hot('content_item_features', n_items, len(model.feature_ids))
+        model.item_categories = np.load(
+            os.path.join(directory, 'content_item_categories.npy'), mmap_mode=mmap_mode
+        )
+        return model
 
 
 class HybridRecommender:
     """Hybrid recommendation system combining collaborative and content-based filtering"""
     
-    def __init__(self, collaborative_weight: float = 0.6, content_weight: float = 0.4):
-        self.collaborative_filter = CollaborativeFilter()
+    def __init__(
+        self,
+        collaborative_weight: float = 0.6,
+        content_weight: float = 0.4,
+        compaction_interval: int = 10000,
+        half_life_days: Optional[float] = None,
+        strategy: str = 'user',
+        collaborative_params: Optional[Dict] = None
+    ):
+        if strategy not in COLLABORATIVE_STRATEGIES:
+            raise ValueError(f"Unknown collaborative strategy: {strategy}")
+        # 'user': user-user neighbours, 'item': item-item neighbours,
+        # 'als': implicit matrix factorization
+        self.collaborative_filter = COLLABORATIVE_STRATEGIES[strategy](
+            half_life_days=half_life_days, **(collaborative_params or {})
+        )
         self.content_filter = ContentBasedFilter()
         self.collaborative_weight = collaborative_weight
         self.content_weight = content_weight
+        # Incremental interactions allowed before neighbour lists are rebuilt
+        self.compaction_interval = compaction_interval
         
     def train_collaborative(self, interactions: List[Dict]):
         """Train collaborative filtering model"""
         self.collaborative_filter.fit(interactions)
     
+    def train_collaborative_arrays(self, data):
+        """Train collaborative filtering from an app.ml.loader.InteractionArrays"""
+        self.collaborative_filter.fit_arrays(
+            data.user_codes, data.item_codes, data.weights(), data.user_ids, data.item_ids,
+            timestamps=data.timestamps
+        )
+    
+    def update(self, interactions: List[Dict]):
+        """
+        Fold new interactions (e.g. UserInteraction rows since the last
+        update) into the collaborative model, compacting once enough have
+        accumulated. With decay enabled, update([]) just ages the weights.
+        """
+        self.collaborative_filter.partial_fit(interactions)
+        if self.collaborative_filter.updates_since_compaction >= self.compaction_interval:
+            self.collaborative_filter.compact()
+    
     def add_user_profile(self, user_id: str, skills: List[str], interests: List[str]):
         """Add user profile for content-based filtering"""
         self.content_filter.build_user_profile(user_id, skills, interests)
@@ -173,46 +1170,187 @@ class HybridRecommender:
         # If no candidate items provided, use collaborative recommendations
         if candidate_items is None:
             candidate_items = collab_recs
+        candidate_items = list(candidate_items)
         
         # Get content-based scores for candidates
-        content_scores = {
-            item_id: self.content_filter.calculate_similarity(user_id, item_id)
-            for item_id in candidate_items
-        }
+        content_scores = self.content_filter.score_items(user_id, candidate_items)
         
         # Combine scores
-        final_scores = {}
-        for item_id in candidate_items:
-            collab_score = 1.0 if item_id in collab_recs else 0.0
-            content_score = content_scores.get(item_id, 0.0)
+        collab_set = set(collab_recs)
+        collab_scores = np.fromiter(
+            (item_id in collab_set for item_id in candidate_items),
+            dtype=np.float32, count=len(candidate_items)
+        )
+        final_scores = self.collaborative_weight * collab_scores + self.content_weight * content_scores
+        
+        # Return top N
+        return [candidate_items[idx] for idx in _top_n_indices(final_scores, n)]
+    
+    def recommend_batch(self, user_ids: List[str], candidate_items: List[str], n: int = 10) -> List[List[str]]:
+        """
+        recommend() for many users over a shared candidate list, scored
+        as (users x candidates) matrices instead of one user at a time
+        """
+        candidate_items = list(candidate_items)
+        collab = self.collaborative_filter
+        # One state for both the column mapping and the scoring
+        state = collab.state
+        collab_scores = np.zeros((len(user_ids), len(candidate_items)), dtype=np.float32)
+        
+        if state.user_item_matrix is not None:
+            # Map each item column to its candidate position (-1 if not a candidate)
+            column_to_candidate = np.full(len(state.item_ids), -1, dtype=np.int64)
+            for position, item_id in enumerate(candidate_items):
+                column = state.item_index.get(item_id)
+                if column is not None:
+                    column_to_candidate[column] = position
             
-            final_scores[item_id] = (
-                self.collaborative_weight * collab_score +
-                self.content_weight * content_score
-            )
+            # Candidates among each user's collaborative top 2N score 1
+            columns = collab.recommend_item_indices(user_ids, n=n * 2, state=state)
+            positions = np.where(columns >= 0, column_to_candidate[np.maximum(columns, 0)], -1)
+            rows, slots = np.nonzero(positions >= 0)
+            collab_scores[rows, positions[rows, slots]] = 1.0
+        
+        content_scores = self.content_filter.score_matrix(user_ids, candidate_items)
+        final_scores = self.collaborative_weight * collab_scores + self.content_weight * content_scores
+        
+        return [
+            [candidate_items[idx] for idx in row]
+            for row in _top_n_rows(final_scores, n).tolist()
+        ]
+    
+    def save_model(self, path: str) -> str:
+        """
+        Save model to a new version directory under `path` (ML_MODEL_PATH)
+        
+        The version is written to a temporary directory and renamed into
+        place with the manifest already inside, so readers never see a
+        partial artifact. Returns the version name.
+        """
+        os.makedirs(path, exist_ok=True)
+        version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        staging = os.path.join(path, f'.{version}.tmp')
+        os.makedirs(staging)
+        
+        try:
+            manifest = {
+                'format_version': ARTIFACT_FORMAT_VERSION,
+                'version': version,
+                'created_at': datetime.utcnow().isoformat(),
+                'collaborative_weight': self.collaborative_weight,
+                'content_weight': self.content_weight,
+                'compaction_interval': self.compaction_interval,
+                'collaborative': None,
+                'content': None,
+            }
+            if self.collaborative_filter.user_item_matrix is not None:
+                manifest['collaborative'] = self.collaborative_filter.save(staging)
+            manifest['content'] = self.content_filter.save(staging)
+            _write_json(os.path.join(staging, MANIFEST_FILE), manifest)
+            os.rename(staging, os.path.join(path, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
         
-        # Sort and return top N
-        sorted_items = sorted(final_scores.items(), key=lambda x: x[1], reverse=True)
-        return [item_id for item_id, _ in sorted_items[:n]]
+        return version
+    
+    @staticmethod
+    def list_versions(path: str) -> List[str]:
+        """Complete model versions under `path`, oldest first"""
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            name for name in os.listdir(path)
+            if not name.startswith('.') and os.path.isfile(os.path.join(path, name, MANIFEST_FILE))
+        )
     
-    def save_model(self, path: str):
-        """Save model to disk"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, 'wb') as f:
-            pickle.dump(self, f)
+    @staticmethod
+    def publish_version(path: str, version: str):
+        """
+        Point CURRENT at `version`. The pointer is swapped with a rename,
+        so readers see either the old version or the new one.
+        """
+        if not os.path.isfile(os.path.join(path, version, MANIFEST_FILE)):
+            raise FileNotFoundError(f"Model {version} not found in {path}")
+        target = os.path.join(path, CURRENT_FILE)
+        with open(target + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(target + '.tmp', target)
+    
+    @staticmethod
+    def current_version(path: str) -> Optional[str]:
+        """The published version, else the newest complete one, else None"""
+        try:
+            with open(os.path.join(path, CURRENT_FILE)) as f:
+                version = f.read().strip()
+            if os.path.isfile(os.path.join(path, version, MANIFEST_FILE)):
+                return version
+        except OSError:
+            pass
+        versions = HybridRecommender.list_versions(path)
+        return versions[-1] if versions else None
+    
+    @staticmethod
+    def prune_versions(path: str, keep: int = 3) -> List[str]:
+        """
+        Delete all but the newest `keep` versions, never the published one.
+        Processes still serving a deleted version keep their mapped pages
+        until they swap. Returns the deleted versions.
+        """
+        current = HybridRecommender.current_version(path)
+        versions = HybridRecommender.list_versions(path)
+        removed = [version for version in versions[:max(len(versions) - keep, 0)] if version != current]
+        for version in removed:
+            shutil.rmtree(os.path.join(path, version), ignore_errors=True)
+        return removed
     
     @staticmethod
-    def load_model(path: str):
-        """Load model from disk"""
-        with open(path, 'rb') as f:
-            return pickle.load(f)
+    def load_model(path: str, version: Optional[str] = None, mmap_mode: Optional[str] = 'r'):
+        """Load a model version from `path` (the published one by default)"""
+        if version is None:
+            version = HybridRecommender.current_version(path)
+            if version is None:
+                raise FileNotFoundError(f"No model artifacts found in {path}")
+        
+        directory = os.path.join(path, version)
+        manifest = _read_json(os.path.join(directory, MANIFEST_FILE))
+        if manifest['format_version'] != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(
+                f"Model {version} has artifact format {manifest['format_version']}, "
+                f"expected {ARTIFACT_FORMAT_VERSION}"
+            )
+        
+        model = HybridRecommender(
+            collaborative_weight=manifest['collaborative_weight'],
+            content_weight=manifest['content_weight'],
+            compaction_interval=manifest['compaction_interval']
+        )
+        if manifest['collaborative'] is not None:
+            strategy = manifest['collaborative'].get('strategy', CollaborativeFilter.STRATEGY)
+            model.collaborative_filter = COLLABORATIVE_STRATEGIES[strategy].load(
+                directory, manifest['collaborative'], mmap_mode=mmap_mode
+            )
+        model.content_filter = ContentBasedFilter.load(directory, mmap_mode=mmap_mode)
+        
+        return model
 
 
 class TeamMatcher:
     """Match users for hackathon teams based on skills and preferences"""
     
-    def __init__(self):
-        pass
+    # Score for teams that list no required skills
+    NEUTRAL_SCORE = 0.5
+    
+    def __init__(self, team_chunk_size: int = 256):
+        self.team_chunk_size = team_chunk_size
+    
+    @staticmethod
+    def encode_skills(skill_lists: List[List[str]], skill_index: Dict[str, int]) -> np.ndarray:
+        """Encode skill lists as a boolean (rows x skill_index) matrix; other skills are ignored"""
+        matrix = np.zeros((len(skill_lists), len(skill_index)), dtype=bool)
+        for row, skills in enumerate(skill_lists):
+            matrix[row, [skill_index[skill] for skill in skills if skill in skill_index]] = True
+        return matrix
     
     def calculate_skill_complementarity(
         self,
@@ -221,7 +1359,7 @@ class TeamMatcher:
     ) -> float:
         """Calculate how well user's skills match team requirements"""
         if not team_required_skills:
-            return 0.5  # Neutral score if no requirements
+            return self.NEUTRAL_SCORE  # Neutral score if no requirements
         
         required_set = set(team_required_skills)
         user_set = set(user_skills)
@@ -246,18 +1384,102 @@ class TeamMatcher:
         Returns:
             List of (user_id, match_score) tuples
         """
-        scores = []
-        for user in candidate_users:
-            score = self.calculate_skill_complementarity(
-                team_required_skills,
-                user.get('skills', [])
-            )
-            scores.append((user['user_id'], score))
+        return self.match_users_to_teams([team_required_skills], candidate_users, n=n)[0]
+    
+    def match_users_to_teams(
+        self,
+        teams_required_skills: List[List[str]],
+        candidate_users: List[Dict],
+        n: int = 10
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Match one candidate pool against many teams at once
+        
+        Candidates are encoded once; each chunk of teams is scored against
+        the whole pool with a single matrix product.
+        
+        Returns:
+            One list of (user_id, match_score) tuples per team, best first
+        """
+        # Only required skills affect scores, so the vocabulary is just
+        # those, built per call; candidates' other skills are left out
+        skill_index = {}
+        for skills in teams_required_skills:
+            for skill in skills:
+                skill_index.setdefault(skill, len(skill_index))
+        
+        user_ids = [user['user_id'] for user in candidate_users]
+        users = self.encode_skills([user.get('skills', []) for user in candidate_users], skill_index)
+        required = self.encode_skills(teams_required_skills, skill_index)
         
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores[:n]
+        users_t = users.T.astype(np.float32)
+        required_counts = required.sum(axis=1)
+        
+        matches = []
+        for start in range(0, len(required), self.team_chunk_size):
+            chunk = required[start:start + self.team_chunk_size]
+            counts = required_counts[start:start + self.team_chunk_size]
+            
+            matched = chunk.astype(np.float32) @ users_t
+            scores = np.divide(
+                matched, counts[:, None],
+                out=np.full(matched.shape, self.NEUTRAL_SCORE, dtype=np.float32),
+                where=counts[:, None] > 0
+            )
+            
+            # Top n per team, selected for the whole chunk at once
+            top = _top_n_rows(scores, n)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            
+            for team_top, team_scores in zip(top.tolist(), top_scores.tolist()):
+                matches.append([(user_ids[idx], score) for idx, score in zip(team_top, team_scores)])
+        return matches
+
+
+def _top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n highest scores, best first, without sorting everything"""
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if len(scores) > n:
+        top = np.argpartition(-scores, n - 1)[:n]
+        return top[np.argsort(-scores[top], kind='stable')]
+    return np.argsort(-scores, kind='stable')
+
+
+def _timestamps(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Unix time of each interaction from a created_at column, NaN if missing; naive values are UTC"""
+    if 'created_at' not in df:
+        return None
+    created_at = pd.to_datetime(df['created_at'], utc=True, format='ISO8601')
+    return ((created_at - pd.Timestamp(0, tz='UTC')).dt.total_seconds()).to_numpy()
+
+
+def _top_n_rows(scores: np.ndarray, n: int) -> np.ndarray:
+    """Row-wise _top_n_indices for a 2-D score matrix"""
+    n = min(n, scores.shape[1])
+    if n <= 0:
+        return np.zeros((len(scores), 0), dtype=np.int64)
+    if n < scores.shape[1]:
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    else:
+        top = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _write_json(path: str, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
 
 
 # Global recommender instance
-recommender = HybridRecommender()
+recommender = HybridRecommender(
+    half_life_days=settings.ML_DECAY_HALF_LIFE_DAYS,
+    strategy=settings.ML_CF_STRATEGY
+)
 team_matcher = TeamMatcher()
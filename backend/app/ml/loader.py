@@ -0,0 +1,174 @@
+"""
+Streaming loader for collaborative-filtering training data.
+
+Reads `user_interactions` through a server-side cursor, one partition of
+rows at a time, and encodes each partition straight into integer arrays:
+user and item codes indexing growing ID vocabularies, an interaction-type
+code and a Unix timestamp. Only the current partition is ever held as
+Python objects, so memory is bounded by the arrays (about 17 bytes per
+interaction) plus the vocabularies.
+
+    data = await stream_interactions(db, since=datetime.utcnow() - timedelta(days=365))
+    recommender.train_collaborative_arrays(data)
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.ml.inference import INTERACTION_WEIGHTS
+from app.models.mysql.models import UserInteraction
+
+# Interaction-type code -> name; codes index this list, -1 is unknown
+INTERACTION_TYPES = list(INTERACTION_WEIGHTS)
+
+
+class InteractionArrays:
+    """Integer-coded interactions: parallel arrays plus ID vocabularies"""
+
+    def __init__(
+        self,
+        user_codes: np.ndarray,
+        item_codes: np.ndarray,
+        type_codes: np.ndarray,
+        timestamps: np.ndarray,
+        user_ids: List[str],
+        item_ids: List[str]
+    ):
+        self.user_codes = user_codes  # int32, indexes user_ids
+        self.item_codes = item_codes  # int32, indexes item_ids
+        self.type_codes = type_codes  # int8, indexes INTERACTION_TYPES
+        self.timestamps = timestamps  # int64 Unix seconds of created_at
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+
+    def __len__(self) -> int:
+        return len(self.user_codes)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.user_codes, self.item_codes, self.type_codes, self.timestamps))
+
+    def weights(self, interaction_weights: Dict[str, float] = INTERACTION_WEIGHTS) -> np.ndarray:
+        """Weight of each interaction by type; unknown types weigh 0"""
+        # The trailing 0 is picked up by code -1
+        table = np.array([interaction_weights.get(name, 0) for name in INTERACTION_TYPES] + [0], dtype=np.float32)
+        return table[self.type_codes]
+
+
+class _Vocabulary:
+    """Append-only ID -> code mapping"""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        # Look up each distinct value once rather than every row
+        codes, uniques = pd.factorize(values)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for position, value in enumerate(uniques):
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.ids)
+                self.ids.append(value)
+            mapping[position] = code
+        return mapping[codes]
+
+
+_TYPE_CODES = {name: code for code, name in enumerate(INTERACTION_TYPES)}
+
+
+def _unix_seconds(created_at, missing: int) -> np.ndarray:
+    """
+    created_at values as int64 Unix seconds. NULLs become `missing` (the
+    load time): the in-memory fit() path treats an interaction without a
+    timestamp as current, and NaT cast to int64 would instead be the
+    minimum int64, which decay weights to zero.
+    """
+    timestamps = pd.to_datetime(pd.Series(created_at)).to_numpy('datetime64[s]')
+    return np.where(np.isnat(timestamps), missing, timestamps.astype(np.int64))
+
+
+async def stream_interactions(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    target_types: Optional[List[str]] = None,
+    chunk_size: int = 50000
+) -> InteractionArrays:
+    """
+    Load interactions into integer-coded arrays with bounded memory
+
+    Args:
+        since: Only interactions created at or after this time
+        until: Only interactions created before this time
+        target_types: Only these target types (e.g. ["post", "hackathon"])
+        chunk_size: Rows fetched from the cursor and encoded at a time
+    """
+    query = select(
+        UserInteraction.user_id,
+        UserInteraction.target_id,
+        UserInteraction.interaction_type,
+        UserInteraction.created_at
+    )
+    if since is not None:
+        query = query.where(UserInteraction.created_at >= since)
+    if until is not None:
+        query = query.where(UserInteraction.created_at < until)
+    if target_types:
+        query = query.where(UserInteraction.target_type.in_(target_types))
+
+    users, items = _Vocabulary(), _Vocabulary()
+    chunks = []
+    loaded_at = int(time.time())
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions(chunk_size):
+        user_ids, target_ids, interaction_types, created_at = zip(*rows)
+        type_codes, type_names = pd.factorize(np.array(interaction_types, dtype=object))
+        type_mapping = np.array([_TYPE_CODES.get(name, -1) for name in type_names], dtype=np.int8)
+        chunks.append((
+            users.encode(np.array(user_ids, dtype=object)),
+            items.encode(np.array(target_ids, dtype=object)),
+            type_mapping[type_codes],
+            _unix_seconds(created_at, loaded_at),
+        ))
+
+    if chunks:
+        user_codes, item_codes, type_codes, timestamps = (np.concatenate(column) for column in zip(*chunks))
+    else:
+        user_codes = item_codes = np.zeros(0, dtype=np.int32)
+        type_codes, timestamps = np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int64)
+    return InteractionArrays(user_codes, item_codes, type_codes, timestamps, users.ids, items.ids)
+
+
+async def _main(args):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        data = await stream_interactions(
+            db,
+            since=datetime.fromisoformat(args.since) if args.since else None,
+            until=datetime.fromisoformat(args.until) if args.until else None,
+            target_types=args.target_type,
+            chunk_size=args.chunk_size
+        )
+    print(
+        f"📊 {len(data)} interactions, {len(data.user_ids)} users, {len(data.item_ids)} items "
+        f"({data.nbytes / 1e6:.1f} MB of arrays) in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream user_interactions into training arrays")
+    parser.add_argument("--since", help="ISO datetime, inclusive")
+    parser.add_argument("--until", help="ISO datetime, exclusive")
+    parser.add_argument("--target-type", nargs="+")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,186 @@
+"""
+Offline precompute of recommendations.
+
+Walks all active users in ID order, one chunk at a time, scores each
+chunk against the popular candidate pool with matrix operations
+(HybridRecommender.recommend_batch) and writes the top N IDs per user to
+`precomputed_recommendations`, where the API reads them with a single
+primary-key lookup.
+
+After every chunk the last user ID is saved to a checkpoint file next to
+the model artifacts, so an interrupted run resumes where it stopped as
+long as the model version hasn't changed.
+
+Run `python -m app.ml.precompute --kind projects events users`.
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.ml.inference import HybridRecommender
+from app.ml.serving import POPULAR_LOADERS
+from app.models.mysql.models import User
+from app.models.mysql.enhanced_models import PrecomputedRecommendation
+
+KINDS = list(POPULAR_LOADERS)
+
+
+def checkpoint_path(kind: str, path: str = settings.ML_MODEL_PATH) -> str:
+    return os.path.join(path, f"precompute_{kind}.json")
+
+
+def read_checkpoint(kind: str, path: str = settings.ML_MODEL_PATH) -> Optional[Dict]:
+    try:
+        with open(checkpoint_path(kind, path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(kind: str, checkpoint: Dict, path: str = settings.ML_MODEL_PATH):
+    """Write via a temporary file so a crash never leaves a truncated checkpoint"""
+    target = checkpoint_path(kind, path)
+    with open(target + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(target + ".tmp", target)
+
+
+def recommend_chunk(
+    model: HybridRecommender,
+    kind: str,
+    user_ids: List[str],
+    candidates: List[str],
+    n: int
+) -> List[List[str]]:
+    """Top-n IDs for every user in the chunk"""
+    if kind == "users":
+        # Similar users first, topped up with popular users
+        similar = model.collaborative_filter.similar_users_batch(user_ids, n=n)
+        result = []
+        for user_id, ids in zip(user_ids, similar):
+            seen = set(ids)
+            seen.add(user_id)
+            result.append((ids + [item_id for item_id in candidates if item_id not in seen])[:n])
+        return result
+    return model.recommend_batch(user_ids, candidates, n=n)
+
+
+async def _active_user_count(db: AsyncSession, after: Optional[str]) -> int:
+    query = select(func.count()).select_from(User).where(User.is_active == True)
+    if after is not None:
+        query = query.where(User.id > after)
+    return await db.scalar(query)
+
+
+async def precompute(
+    kind: str,
+    model: HybridRecommender,
+    model_version: str,
+    chunk_size: int = settings.ML_PRECOMPUTE_CHUNK_SIZE,
+    top_n: int = settings.ML_PRECOMPUTE_TOP_N,
+    restart: bool = False,
+    path: str = settings.ML_MODEL_PATH
+) -> Dict:
+    """
+    Precompute `kind` recommendations for all active users
+
+    Returns:
+        The final checkpoint: users processed and timing
+    """
+    checkpoint = None if restart else read_checkpoint(kind, path)
+    if checkpoint is not None and checkpoint.get("model_version") != model_version:
+        print(f"🔄 {kind}: checkpoint is for model {checkpoint.get('model_version')}, starting over")
+        checkpoint = None
+    if checkpoint is not None and checkpoint.get("completed"):
+        print(f"✅ {kind}: already precomputed for model {model_version}")
+        return checkpoint
+    if checkpoint is None:
+        checkpoint = {
+            "kind": kind,
+            "model_version": model_version,
+            "last_user_id": None,
+            "processed": 0,
+            "seconds": 0.0,
+            "completed": False,
+        }
+    else:
+        print(f"⏯️  {kind}: resuming after user {checkpoint['last_user_id']} ({checkpoint['processed']} done)")
+
+    async with AsyncSessionLocal() as db:
+        candidates = await POPULAR_LOADERS[kind](db)
+        remaining = await _active_user_count(db, checkpoint["last_user_id"])
+        total = checkpoint["processed"] + remaining
+        start = time.perf_counter()
+        previous_seconds = checkpoint["seconds"]
+        done_this_run = 0
+
+        while True:
+            query = select(User.id).where(User.is_active == True).order_by(User.id).limit(chunk_size)
+            if checkpoint["last_user_id"] is not None:
+                query = query.where(User.id > checkpoint["last_user_id"])
+            user_ids = list((await db.scalars(query)).all())
+            if not user_ids:
+                break
+
+            recommendations = recommend_chunk(model, kind, user_ids, candidates, top_n)
+
+            # Replace the chunk's rows in one transaction
+            await db.execute(
+                delete(PrecomputedRecommendation)
+                .where(PrecomputedRecommendation.user_id.in_(user_ids), PrecomputedRecommendation.kind == kind)
+            )
+            await db.execute(insert(PrecomputedRecommendation), [
+                {"user_id": user_id, "kind": kind, "item_ids": ids, "model_version": model_version}
+                for user_id, ids in zip(user_ids, recommendations)
+            ])
+            await db.commit()
+
+            done_this_run += len(user_ids)
+            elapsed = time.perf_counter() - start
+            checkpoint["last_user_id"] = user_ids[-1]
+            checkpoint["processed"] += len(user_ids)
+            checkpoint["seconds"] = previous_seconds + elapsed
+            write_checkpoint(kind, checkpoint, path)
+
+            rate = done_this_run / elapsed if elapsed > 0 else 0.0
+            eta = (total - checkpoint["processed"]) / rate if rate > 0 else 0.0
+            percent = 100.0 * checkpoint["processed"] / total if total else 100.0
+            print(
+                f"📊 {kind}: {checkpoint['processed']}/{total} users ({percent:.1f}%), "
+                f"{rate:.0f} users/s, ETA {eta:.0f}s"
+            )
+
+    checkpoint["completed"] = True
+    write_checkpoint(kind, checkpoint, path)
+    print(f"✅ {kind}: {checkpoint['processed']} users precomputed in {checkpoint['seconds']:.1f}s")
+    return checkpoint
+
+
+async def main(kinds: List[str], chunk_size: int, top_n: int, restart: bool, path: str):
+    version = HybridRecommender.current_version(path)
+    if version is None:
+        print(f"❌ No model artifacts under {path}")
+        return
+    model = HybridRecommender.load_model(path, version)
+    print(f"📦 Loaded model {version}")
+    for kind in kinds:
+        await precompute(kind, model, version, chunk_size, top_n, restart, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute recommendations for all active users")
+    parser.add_argument("--kind", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--chunk-size", type=int, default=settings.ML_PRECOMPUTE_CHUNK_SIZE)
+    parser.add_argument("--top-n", type=int, default=settings.ML_PRECOMPUTE_TOP_N)
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start from the first user")
+    parser.add_argument("--model-path", default=settings.ML_MODEL_PATH)
+    args = parser.parse_args()
+    asyncio.run(main(args.kind, args.chunk_size, args.top_n, args.restart, args.model_path))
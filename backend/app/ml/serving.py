@@ -0,0 +1,271 @@
+"""
+Online serving helpers for the recommendation endpoints: the current
+model, a per-user result cache, popular-item pools used as candidates
+and fallback, a latency-budgeted executor and serving metrics.
+"""
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.ml.inference import HybridRecommender, recommender
+from app.models.mysql.models import User, UserInteraction
+from app.models.mysql.enhanced_models import Project, Event
+
+
+class ModelHolder:
+    """
+    Holds the recommender currently being served.
+
+    Serving processes don't train: a separate trainer (app.ml.train)
+    publishes model versions under ML_MODEL_PATH, and each worker maps the
+    published version read-only and polls for a newer one. Mapped pages
+    are shared through the page cache, so memory stays flat as workers
+    are added.
+
+    The model and its version are held as one pair, replaced in a single
+    assignment, so `get_versioned` never pairs a model with the version of
+    the one before or after it.
+    """
+
+    def __init__(self, model: HybridRecommender, path: str = settings.ML_MODEL_PATH):
+        self._served: Tuple[HybridRecommender, Optional[str]] = (model, None)
+        self.path = path
+        self._task = None
+
+    def get(self) -> HybridRecommender:
+        return self._served[0]
+
+    def get_versioned(self) -> Tuple[HybridRecommender, Optional[str]]:
+        """The served model together with its version"""
+        return self._served
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._served[1]
+
+    def swap(self, model: HybridRecommender, version: Optional[str] = None):
+        """Replace the served model; requests already running keep the old one"""
+        self._served = (model, version)
+
+    def load_latest(self, path: Optional[str] = None) -> bool:
+        """Load the published artifact under `path`, if there is one"""
+        path = path or self.path
+        version = HybridRecommender.current_version(path)
+        if version is None:
+            return False
+        self.swap(HybridRecommender.load_model(path, version), version)
+        return True
+
+    def refresh(self) -> bool:
+        """Swap to the published version if it differs from the served one"""
+        version = HybridRecommender.current_version(self.path)
+        if version is None or version == self.version:
+            return False
+        self.swap(HybridRecommender.load_model(self.path, version), version)
+        return True
+
+    async def _run(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await loop.run_in_executor(None, self.refresh):
+                    print(f"🔄 Switched to recommendation model {self.version}")
+            except Exception as exc:
+                # Keep serving the current version and retry next time
+                print(f"⚠️  Could not load recommendation model: {exc}")
+
+    def start(self, interval: float = settings.ML_MODEL_POLL_INTERVAL):
+        """Start polling for newly published versions on the running event loop"""
+        if self._task is None and interval > 0:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_ready(self, model: Optional[HybridRecommender] = None) -> bool:
+        """Whether `model` (by default the served one) has been trained or loaded"""
+        if model is None:
+            model = self.get()
+        return model.collaborative_filter.user_item_matrix is not None
+
+
+class ResultCache:
+    """Bounded LRU of recommendation results (lists of IDs) with a TTL"""
+
+    def __init__(self, max_size: int = 50000, ttl: int = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[List[str], float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Tuple) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            ids, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return ids
+
+    def set(self, key: Tuple, ids: List[str]):
+        with self._lock:
+            self._entries[key] = (ids, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PopularPool:
+    """
+    Popular item IDs per kind, refreshed at most every `ttl` seconds.
+
+    Concurrent requests that find a pool stale share a single refresh.
+    """
+
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self._pools: Dict[str, Tuple[List[str], float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def get(self, kind: str, loader: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        pool = self._pools.get(kind)
+        if pool is not None and pool[1] > time.time():
+            return pool[0]
+        async with self._locks[kind]:
+            pool = self._pools.get(kind)
+            if pool is not None and pool[1] > time.time():
+                return pool[0]
+            ids = await loader()
+            self._pools[kind] = (ids, time.time() + self.ttl)
+            return ids
+
+    def clear(self):
+        self._pools.clear()
+
+
+class ServingMetrics:
+    """Request counts, cache hit rate and latency percentiles per kind"""
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = Lock()
+
+    def record(self, kind: str, source: str, seconds: float):
+        """Record one request served from `source` (cache, precomputed, model or popular)"""
+        with self._lock:
+            self._counts[kind]['requests'] += 1
+            self._counts[kind][source] += 1
+            self._latencies[kind].append(seconds * 1000)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            result = {}
+            for kind, counts in self._counts.items():
+                latencies = np.array(self._latencies[kind])
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+                result[kind] = {
+                    'requests': counts['requests'],
+                    'cache_hits': counts['cache'],
+                    'cache_hit_rate': counts['cache'] / counts['requests'],
+                    'precomputed': counts['precomputed'],
+                    'model': counts['model'],
+                    'popular_fallbacks': counts['popular'],
+                    'latency_ms': {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)},
+                }
+            return result
+
+
+async def popular_projects(db: AsyncSession) -> List[str]:
+    query = (
+        select(Project.id)
+        .where(Project.is_active == True)
+        .order_by(Project.likes.desc(), Project.views.desc(), Project.created_at.desc())
+        .limit(settings.ML_CANDIDATE_POOL_SIZE)
+    )
+    return list((await db.scalars(query)).all())
+
+
+async def popular_events(db: AsyncSession) -> List[str]:
+    query = (
+        select(Event.id)
+        .where(Event.is_active == True, Event.start_time >= datetime.utcnow())
+        .order_by(Event.current_attendees.desc(), Event.start_time.asc())
+        .limit(settings.ML_CANDIDATE_POOL_SIZE)
+    )
+    return list((await db.scalars(query)).all())
+
+
+async def popular_users(db: AsyncSession) -> List[str]:
+    interactions = (
+        select(UserInteraction.target_id, func.count().label("interactions"))
+        .where(UserInteraction.target_type == "user")
+        .group_by(UserInteraction.target_id)
+        .subquery()
+    )
+    query = (
+        select(User.id)
+        .outerjoin(interactions, interactions.c.target_id == User.id)
+        .where(User.is_active == True)
+        .order_by(func.coalesce(interactions.c.interactions, 0).desc(), User.created_at.desc())
+        .limit(settings.ML_CANDIDATE_POOL_SIZE)
+    )
+    return list((await db.scalars(query)).all())
+
+
+# Candidate pool loaders per recommendation kind
+POPULAR_LOADERS: Dict[str, Callable[[AsyncSession], Awaitable[List[str]]]] = {
+    "projects": popular_projects,
+    "events": popular_events,
+    "users": popular_users,
+}
+
+
+# Model work runs here rather than on the event loop; a full pool makes
+# requests miss their budget and fall back, which is the intended
+# back-pressure.
+_inference_executor = ThreadPoolExecutor(
+    max_workers=settings.ML_INFERENCE_WORKERS,
+    thread_name_prefix="ml-inference"
+)
+
+
+async def run_with_budget(func, *args, budget_ms: int = settings.ML_LATENCY_BUDGET_MS):
+    """
+    Run a model call in the inference pool, raising asyncio.TimeoutError
+    once `budget_ms` has passed. The call itself cannot be interrupted and
+    finishes in the background.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_inference_executor, func, *args)
+    return await asyncio.wait_for(future, timeout=budget_ms / 1000)
+
+
+model_holder = ModelHolder(recommender)
+result_cache = ResultCache(max_size=settings.ML_CACHE_SIZE, ttl=settings.ML_CACHE_TTL)
+popular_pool = PopularPool(ttl=settings.ML_POPULAR_TTL)
+serving_metrics = ServingMetrics()
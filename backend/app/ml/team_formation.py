@@ -0,0 +1,323 @@
+"""
+Team formation for hackathons.
+
+Splits a pool of unmatched registrants into teams of
+min_team_size..max_team_size members, maximizing the total number of
+distinct skills covered per team. A greedy pass seeds and fills teams
+round-robin by marginal skill gain, then a local search of member swaps
+and moves between random pairs of teams improves the result.
+
+Run `python -m app.ml.team_formation` for a benchmark on synthetic pools.
+"""
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+import argparse
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.mysql.models import (
+    Hackathon, Team, TeamMember, UserInteraction, UserSkill, Skill
+)
+
+
+class TeamFormer:
+    """Assemble complete teams from a pool of registrants"""
+
+    def __init__(self, local_search_iterations: Optional[int] = None, time_budget: float = 5.0, seed: int = 0):
+        # Pairs of teams tried by the local search (default: 20 per team)
+        self.local_search_iterations = local_search_iterations
+        # Wall-clock cap on the local search, in seconds
+        self.time_budget = time_budget
+        self.seed = seed
+
+    @staticmethod
+    def team_count(n_participants: int, min_team_size: int, max_team_size: int) -> int:
+        """Fewest teams that fit everyone, or as many full-minimum teams as possible"""
+        if n_participants < min_team_size:
+            return 0
+        n_teams = -(-n_participants // max_team_size)
+        if n_teams * min_team_size > n_participants:
+            n_teams = n_participants // min_team_size
+        return n_teams
+
+    @staticmethod
+    def coverage_upper_bound(skills: np.ndarray, n_teams: int) -> int:
+        """A skill can be covered by at most min(n_teams, holders) teams"""
+        return int(np.minimum(skills.sum(axis=0), n_teams).sum())
+
+    def form_teams(
+        self,
+        participants: List[Dict],
+        min_team_size: int = 1,
+        max_team_size: int = 4
+    ) -> Dict:
+        """
+        Propose teams for a registrant pool
+
+        Args:
+            participants: List of dicts with keys: user_id, skills (list of skill names)
+            min_team_size: Smallest allowed team
+            max_team_size: Largest allowed team
+
+        Returns:
+            Dict with `teams` (list of dicts with members, skills, coverage),
+            `unassigned` (user IDs that could not be placed) and
+            `upper_bound` (no split can cover more skills in total)
+        """
+        if min_team_size < 1 or max_team_size < min_team_size:
+            raise ValueError("Team sizes must satisfy 1 <= min_team_size <= max_team_size")
+
+        user_ids = [participant['user_id'] for participant in participants]
+        skill_names, skills = self._encode(participants)
+        n_teams = self.team_count(len(participants), min_team_size, max_team_size)
+        if n_teams == 0:
+            return {'teams': [], 'unassigned': user_ids, 'upper_bound': 0}
+
+        upper_bound = self.coverage_upper_bound(skills, n_teams)
+        assignment, counts = self._greedy(skills, n_teams, max_team_size)
+        if (counts > 0).sum() < upper_bound:
+            self._local_search(skills, assignment, counts, min_team_size, max_team_size, upper_bound)
+
+        teams = []
+        for team in range(n_teams):
+            members = np.flatnonzero(assignment == team)
+            covered = np.flatnonzero(counts[team] > 0)
+            teams.append({
+                'members': [user_ids[idx] for idx in members],
+                'skills': [skill_names[idx] for idx in covered],
+                'coverage': len(covered),
+            })
+        unassigned = [user_ids[idx] for idx in np.flatnonzero(assignment < 0)]
+        return {'teams': teams, 'unassigned': unassigned, 'upper_bound': upper_bound}
+
+    @staticmethod
+    def _encode(participants: List[Dict]) -> Tuple[List[str], np.ndarray]:
+        """Intern skills and return (skill names, participants x skills boolean matrix)"""
+        skill_index = {}
+        codes = []
+        for participant in participants:
+            codes.append([skill_index.setdefault(skill, len(skill_index)) for skill in participant.get('skills', [])])
+        skills = np.zeros((len(participants), len(skill_index)), dtype=bool)
+        for row, row_codes in enumerate(codes):
+            skills[row, row_codes] = True
+        return list(skill_index), skills
+
+    @staticmethod
+    def _greedy(skills: np.ndarray, n_teams: int, max_team_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Seed each team with one of the broadest participants, then fill
+        round-robin: in each round every non-full team (least covered
+        first) takes the unassigned participant adding the most new skills.
+        Round-robin keeps team sizes within one of each other.
+        """
+        n_participants = len(skills)
+        assignment = np.full(n_participants, -1, dtype=np.int32)
+        counts = np.zeros((n_teams, skills.shape[1]), dtype=np.int32)
+        sizes = np.zeros(n_teams, dtype=np.int32)
+
+        seeds = np.argsort(-skills.sum(axis=1), kind='stable')[:n_teams]
+        assignment[seeds] = np.arange(n_teams)
+        counts += skills[seeds]
+        sizes += 1
+
+        skills_f = skills.astype(np.float32)
+        while True:
+            unassigned = np.flatnonzero(assignment < 0)
+            open_teams = np.flatnonzero(sizes < max_team_size)
+            if len(unassigned) == 0 or len(open_teams) == 0:
+                break
+
+            # New skills each unassigned participant would bring to each open team
+            missing = (counts[open_teams] == 0).astype(np.float32)
+            gains = skills_f[unassigned] @ missing.T
+            taken = np.zeros(len(unassigned), dtype=bool)
+
+            for column in np.argsort(counts[open_teams].astype(bool).sum(axis=1), kind='stable'):
+                if taken.all():
+                    break
+                column_gains = np.where(taken, -1.0, gains[:, column])
+                pick = int(np.argmax(column_gains))
+                taken[pick] = True
+                team = open_teams[column]
+                participant = unassigned[pick]
+                assignment[participant] = team
+                counts[team] += skills[participant]
+                sizes[team] += 1
+
+        return assignment, counts
+
+    def _local_search(
+        self,
+        skills: np.ndarray,
+        assignment: np.ndarray,
+        counts: np.ndarray,
+        min_team_size: int,
+        max_team_size: int,
+        upper_bound: int
+    ):
+        """Improve coverage in place with best-improvement swaps/moves between random team pairs"""
+        n_teams = len(counts)
+        if n_teams < 2:
+            return
+        rng = np.random.default_rng(self.seed)
+        iterations = self.local_search_iterations
+        if iterations is None:
+            iterations = 20 * n_teams
+        deadline = time.perf_counter() + self.time_budget
+
+        members = [list(np.flatnonzero(assignment == team)) for team in range(n_teams)]
+        skills_i = skills.astype(np.int32)
+        total = int((counts > 0).sum())
+
+        for iteration in range(iterations):
+            if total >= upper_bound or (iteration % 64 == 0 and time.perf_counter() > deadline):
+                break
+            a, b = rng.choice(n_teams, size=2, replace=False)
+            ma, mb = np.array(members[a]), np.array(members[b])
+            before = (counts[a] > 0).sum() + (counts[b] > 0).sum()
+
+            # Swap every member of a with every member of b: (|a|, |b|, skills)
+            swapped_a = counts[a] - skills_i[ma][:, None, :] + skills_i[mb][None, :, :]
+            swapped_b = counts[b] + skills_i[ma][:, None, :] - skills_i[mb][None, :, :]
+            swap_gain = (swapped_a > 0).sum(axis=2) + (swapped_b > 0).sum(axis=2) - before
+            x, y = np.unravel_index(np.argmax(swap_gain), swap_gain.shape)
+            best_gain = swap_gain[x, y]
+            best = ('swap', a, b, ma[x], mb[y])
+
+            # Moving one member from the larger team to the smaller, if sizes allow
+            src, dst, msrc, mdst = (a, b, ma, mb) if len(ma) >= len(mb) else (b, a, mb, ma)
+            if len(msrc) > min_team_size and len(mdst) < max_team_size:
+                moved_src = counts[src] - skills_i[msrc]
+                moved_dst = counts[dst] + skills_i[msrc]
+                move_gain = (moved_src > 0).sum(axis=1) + (moved_dst > 0).sum(axis=1) - before
+                pick = int(np.argmax(move_gain))
+                if move_gain[pick] > best_gain:
+                    best_gain = move_gain[pick]
+                    best = ('move', src, dst, msrc[pick], None)
+
+            if best_gain <= 0:
+                continue
+            total += int(best_gain)
+            kind, ta, tb, pa, pb = best
+            counts[ta] -= skills_i[pa]
+            counts[tb] += skills_i[pa]
+            assignment[pa] = tb
+            members[ta].remove(pa)
+            members[tb].append(pa)
+            if kind == 'swap':
+                counts[tb] -= skills_i[pb]
+                counts[ta] += skills_i[pb]
+                assignment[pb] = ta
+                members[tb].remove(pb)
+                members[ta].append(pb)
+
+
+async def load_unmatched_registrants(db: AsyncSession, hackathon_id: str) -> List[Dict]:
+    """
+    Registrants of a hackathon (users with a `join` interaction on it)
+    who are not yet on one of its teams, with their skill names
+    """
+    on_team = (
+        select(TeamMember.user_id)
+        .join(Team, Team.id == TeamMember.team_id)
+        .where(Team.hackathon_id == hackathon_id)
+    )
+    registrants = (
+        select(UserInteraction.user_id)
+        .where(
+            UserInteraction.target_type == "hackathon",
+            UserInteraction.target_id == hackathon_id,
+            UserInteraction.interaction_type == "join",
+            UserInteraction.user_id.not_in(on_team)
+        )
+        .distinct()
+    )
+    user_ids = (await db.scalars(registrants)).all()
+
+    skills = {user_id: [] for user_id in user_ids}
+    if user_ids:
+        rows = await db.execute(
+            select(UserSkill.user_id, Skill.name)
+            .join(Skill, Skill.id == UserSkill.skill_id)
+            .where(UserSkill.user_id.in_(user_ids))
+        )
+        for user_id, name in rows.all():
+            skills[user_id].append(name)
+
+    return [{'user_id': user_id, 'skills': names} for user_id, names in skills.items()]
+
+
+async def propose_hackathon_teams(db: AsyncSession, hackathon_id: str, former: Optional[TeamFormer] = None) -> Dict:
+    """Propose teams for a hackathon's unmatched registrants using its team size limits"""
+    hackathon = await db.scalar(select(Hackathon).where(Hackathon.id == hackathon_id))
+    if not hackathon:
+        raise ValueError(f"Hackathon {hackathon_id} not found")
+
+    participants = await load_unmatched_registrants(db, hackathon_id)
+    return (former or TeamFormer()).form_teams(
+        participants,
+        min_team_size=hackathon.min_team_size or 1,
+        max_team_size=hackathon.max_team_size or 4
+    )
+
+
+def synthetic_participants(n: int, n_skills: int = 200, max_skills: int = 8, seed: int = 0) -> List[Dict]:
+    """Registrant pool with Zipf-distributed skill popularity"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_skills + 1)
+    popularity /= popularity.sum()
+    return [
+        {
+            'user_id': f'user-{idx}',
+            'skills': [f'skill-{skill}' for skill in rng.choice(
+                n_skills, size=rng.integers(1, max_skills + 1), replace=False, p=popularity
+            )],
+        }
+        for idx in range(n)
+    ]
+
+
+def random_baseline(participants: List[Dict], min_team_size: int, max_team_size: int, seed: int = 0) -> float:
+    """Mean coverage of a random split into the same number of teams"""
+    n_teams = TeamFormer.team_count(len(participants), min_team_size, max_team_size)
+    order = np.random.default_rng(seed).permutation(len(participants))
+    coverage = [
+        len({skill for idx in order[team::n_teams] for skill in participants[idx]['skills']})
+        for team in range(n_teams)
+    ]
+    return float(np.mean(coverage))
+
+
+def benchmark(sizes: List[int], min_team_size: int = 2, max_team_size: int = 4, n_skills: int = 200):
+    """
+    Time team formation on synthetic pools and compare mean skills covered
+    per team with the upper bound and with a random split
+    """
+    print(
+        f"{'participants':>12} {'teams':>6} {'seconds':>8} {'coverage':>9} "
+        f"{'bound':>7} {'random':>7} {'unassigned':>10}"
+    )
+    for size in sizes:
+        participants = synthetic_participants(size, n_skills=n_skills)
+        start = time.perf_counter()
+        result = TeamFormer().form_teams(participants, min_team_size, max_team_size)
+        elapsed = time.perf_counter() - start
+        n_teams = max(len(result['teams']), 1)
+        coverage = sum(team['coverage'] for team in result['teams']) / n_teams
+        print(
+            f"{size:>12} {len(result['teams']):>6} {elapsed:>8.2f} {coverage:>9.2f} "
+            f"{result['upper_bound'] / n_teams:>7.2f} "
+            f"{random_baseline(participants, min_team_size, max_team_size):>7.2f} {len(result['unassigned']):>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hackathon team formation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--min-team-size", type=int, default=2)
+    parser.add_argument("--max-team-size", type=int, default=4)
+    parser.add_argument("--skills", type=int, default=200)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.min_team_size, args.max_team_size, args.skills)
@@ -0,0 +1,109 @@
+"""
+Model trainer for multi-worker serving.
+
+Trains the hybrid recommender once from the database, saves it as a new
+version under ML_MODEL_PATH, publishes it through the CURRENT pointer and
+prunes old versions. API workers never train: they map the published
+arrays read-only (ModelHolder) and swap to each new version when it
+appears, so N workers share one copy of the model in the page cache.
+
+Run `python -m app.ml.train` once, or `python -m app.ml.train --every 3600`
+to retrain hourly from a single long-running process.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.ml.inference import HybridRecommender
+from app.ml.loader import stream_interactions
+from app.models.mysql.models import Interest, Skill, UserInterest, UserSkill
+from app.models.mysql.enhanced_models import Event, Project
+
+
+async def add_content_profiles(db: AsyncSession, model: HybridRecommender):
+    """Skill/interest profiles for users and tag/category features for projects and events"""
+    skills, interests = defaultdict(list), defaultdict(list)
+    rows = await db.execute(select(UserSkill.user_id, Skill.name).join(Skill, Skill.id == UserSkill.skill_id))
+    for user_id, name in rows:
+        skills[user_id].append(name)
+    rows = await db.execute(
+        select(UserInterest.user_id, Interest.name, Interest.category)
+        .join(Interest, Interest.id == UserInterest.interest_id)
+    )
+    for user_id, name, category in rows:
+        interests[user_id].append(name)
+        if category:
+            interests[user_id].append(category)
+    for user_id in skills.keys() | interests.keys():
+        model.add_user_profile(user_id, skills[user_id], interests[user_id])
+
+    rows = await db.execute(
+        select(Project.id, Project.tags, Project.tech_stack, Project.category).where(Project.is_active == True)
+    )
+    for project_id, tags, tech_stack, category in rows:
+        model.add_item_features(project_id, (tags or []) + (tech_stack or []), category)
+    rows = await db.execute(select(Event.id, Event.tags, Event.event_type).where(Event.is_active == True))
+    for event_id, tags, event_type in rows:
+        model.add_item_features(event_id, tags or [], event_type.value if event_type else None)
+
+
+async def train(window_days: int = settings.ML_TRAINING_WINDOW_DAYS) -> HybridRecommender:
+    """Train a recommender on the last `window_days` of interactions"""
+    model = HybridRecommender(half_life_days=settings.ML_DECAY_HALF_LIFE_DAYS, strategy=settings.ML_CF_STRATEGY)
+    async with AsyncSessionLocal() as db:
+        data = await stream_interactions(db, since=datetime.utcnow() - timedelta(days=window_days))
+        print(f"📊 {len(data)} interactions, {len(data.user_ids)} users, {len(data.item_ids)} items")
+        if len(data):
+            model.train_collaborative_arrays(data)
+        await add_content_profiles(db, model)
+    return model
+
+
+async def train_and_publish(
+    path: str = settings.ML_MODEL_PATH,
+    window_days: int = settings.ML_TRAINING_WINDOW_DAYS,
+    keep: int = settings.ML_MODEL_KEEP_VERSIONS
+) -> Optional[str]:
+    """Train, save and publish a new version; returns it"""
+    start = time.perf_counter()
+    model = await train(window_days)
+    version = model.save_model(path)
+    HybridRecommender.publish_version(path, version)
+    removed = HybridRecommender.prune_versions(path, keep)
+    print(
+        f"✅ Published model {version} in {time.perf_counter() - start:.1f}s"
+        + (f", removed {len(removed)} old versions" if removed else "")
+    )
+    return version
+
+
+async def main(path: str, window_days: int, keep: int, every: Optional[float]):
+    while True:
+        try:
+            await train_and_publish(path, window_days, keep)
+        except Exception as exc:
+            if not every:
+                raise
+            # Workers keep serving the last published version
+            print(f"⚠️  Training failed: {exc}")
+        if not every:
+            return
+        await asyncio.sleep(every)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and publish the recommendation model")
+    parser.add_argument("--model-path", default=settings.ML_MODEL_PATH)
+    parser.add_argument("--window-days", type=int, default=settings.ML_TRAINING_WINDOW_DAYS)
+    parser.add_argument("--keep", type=int, default=settings.ML_MODEL_KEEP_VERSIONS, help="Versions kept on disk")
+    parser.add_argument("--every", type=float, help="Retrain every N seconds instead of once")
+    args = parser.parse_args()
+    asyncio.run(main(args.model_path, args.window_days, args.keep, args.every))
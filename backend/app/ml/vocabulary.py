@@ -0,0 +1,125 @@
+"""
+ID vocabularies stored as memory-mappable arrays.
+
+A vocabulary (matrix row -> ID, ID -> row) is saved as two .npy files:
+the UTF-8 encoded IDs in code order and the permutation that sorts them.
+Loaded with mmap_mode, MappedIds and MappedIndex answer lookups straight
+from the mapped pages (binary search through the sort order), so every
+worker process that opens the same model version shares one copy instead
+of building its own Python list and dict.
+
+IDs added after loading (online updates) go to a small per-process
+overlay, so a mapped vocabulary can still grow like a list/dict pair;
+copy() shares the mapped arrays and copies only the overlay.
+"""
+import os
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+class MappedIds:
+    """Code -> ID lookup over an encoded ID array, list-like"""
+
+    def __init__(self, values: np.ndarray):
+        self._values = values
+        self._extra: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._extra)
+
+    def __getitem__(self, code: int) -> str:
+        code = int(code)
+        if code < 0:
+            code += len(self)
+        if code < len(self._values):
+            return self._values[code].decode('utf-8')
+        return self._extra[code - len(self._values)]
+
+    def __iter__(self):
+        for value in self._values:
+            yield value.decode('utf-8')
+        yield from self._extra
+
+    def append(self, value: str):
+        self._extra.append(value)
+
+    def copy(self) -> 'MappedIds':
+        """Copy sharing the mapped array; appends to it don't affect this one"""
+        ids = MappedIds(self._values)
+        ids._extra = list(self._extra)
+        return ids
+
+
+class MappedIndex:
+    """ID -> code lookup by binary search over an encoded ID array, dict-like"""
+
+    def __init__(self, values: np.ndarray, order: np.ndarray):
+        self._values = values
+        self._order = order
+        self._extra: Dict[str, int] = {}
+
+    def get(self, value: str, default: Optional[int] = None) -> Optional[int]:
+        code = self._extra.get(value)
+        if code is not None:
+            return code
+        if not isinstance(value, str) or not len(self._values):
+            return default
+        key = value.encode('utf-8')
+        position = int(np.searchsorted(self._values, key, sorter=self._order))
+        if position < len(self._order):
+            code = int(self._order[position])
+            if self._values[code] == key:
+                return code
+        return default
+
+    def __getitem__(self, value: str) -> int:
+        code = self.get(value)
+        if code is None:
+            raise KeyError(value)
+        return code
+
+    def __setitem__(self, value: str, code: int):
+        self._extra[value] = code
+
+    def __contains__(self, value: str) -> bool:
+        return self.get(value) is not None
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._extra)
+
+    def copy(self) -> 'MappedIndex':
+        """Copy sharing the mapped arrays; additions to it don't affect this one"""
+        index = MappedIndex(self._values, self._order)
+        index._extra = dict(self._extra)
+        return index
+
+
+def save_ids(directory: str, name: str, ids: Union[List[str], MappedIds]):
+    """Write `ids` as `<name>.npy` plus its sort order `<name>_order.npy`"""
+    if isinstance(ids, MappedIds) and not ids._extra:
+        values = np.asarray(ids._values)
+    else:
+        values = np.array([value.encode('utf-8') for value in ids], dtype=np.bytes_)
+    if not len(values):
+        values = np.zeros(0, dtype='S1')
+    order = np.argsort(values, kind='stable').astype(np.int64)
+    np.save(os.path.join(directory, f'{name}.npy'), values)
+    np.save(os.path.join(directory, f'{name}_order.npy'), order)
+
+
+def load_ids(
+    directory: str,
+    name: str,
+    mmap_mode: Optional[str] = 'r'
+) -> Tuple[Union[List[str], MappedIds], Union[Dict[str, int], MappedIndex]]:
+    """
+    Open a saved vocabulary as (ids, index). Without mmap_mode it is read
+    into a plain list and dict, which is faster to update in bulk.
+    """
+    values = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+    if mmap_mode is None:
+        ids = [value.decode('utf-8') for value in values]
+        return ids, {value: code for code, value in enumerate(ids)}
+    order = np.load(os.path.join(directory, f'{name}_order.npy'), mmap_mode=mmap_mode)
+    return MappedIds(values), MappedIndex(values, order)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Integer, Text, Enum, TIMESTAMP, ForeignKey, Float, JSON
+from sqlalchemy import Column, String, Boolean, Integer, Text, Enum, TIMESTAMP, ForeignKey, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -36,16 +36,24 @@ class Resource(Base):
     semester = Column(Integer, index=True)
     university = Column(String(200), index=True)
     tags = Column(JSON)  # Array of tags
-    upvotes = Column(Integer, default=0)
+    upvotes = Column(Integer, nullable=False, default=0, server_default="0")
     downvotes = Column(Integer, default=0)
-    downloads = Column(Integer, default=0)
-    views = Column(Integer, default=0)
+    downloads = Column(Integer, nullable=False, default=0, server_default="0")
+    views = Column(Integer, nullable=False, default=0, server_default="0")
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     is_verified = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    # Keyset pagination seeks on (sort column, id) for every sort_by option
+    __table_args__ = (
+        Index("ix_resources_created_at_id", "created_at", "id"),
+        Index("ix_resources_upvotes_id", "upvotes", "id"),
+        Index("ix_resources_downloads_id", "downloads", "id"),
+        Index("ix_resources_views_id", "views", "id"),
+    )
+    
     # Relationships
     votes = relationship("ResourceVote", back_populates="resource", cascade="all, delete-orphan")
 
@@ -107,13 +115,20 @@ class JobPosting(Base):
     experience_max = Column(Integer)
     application_url = Column(String(500))
     posted_by = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    views = Column(Integer, default=0)
-    applications_count = Column(Integer, default=0)
+    views = Column(Integer, nullable=False, default=0, server_default="0")
+    applications_count = Column(Integer, nullable=False, default=0, server_default="0")
     is_active = Column(Boolean, default=True, index=True)
     expires_at = Column(TIMESTAMP, index=True)
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    # Keyset pagination seeks on (sort column, id) for every sort_by option
+    __table_args__ = (
+        Index("ix_job_postings_created_at_id", "created_at", "id"),
+        Index("ix_job_postings_views_id", "views", "id"),
+        Index("ix_job_postings_applications_count_id", "applications_count", "id"),
+    )
+    
     # Relationships
     applications = relationship("JobApplication", back_populates="job", cascade="all, delete-orphan")
 
@@ -164,15 +179,22 @@ class Project(Base):
     category = Column(String(100), index=True)
     tags = Column(JSON)  # Array of tags
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    likes = Column(Integer, default=0)
-    views = Column(Integer, default=0)
+    likes = Column(Integer, nullable=False, default=0, server_default="0")
+    views = Column(Integer, nullable=False, default=0, server_default="0")
     github_stars = Column(Integer, default=0)
     github_forks = Column(Integer, default=0)
     is_featured = Column(Boolean, default=False, index=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    # Keyset pagination seeks on (sort column, id) for every sort_by option
+    __table_args__ = (
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_likes_id", "likes", "id"),
+        Index("ix_projects_views_id", "views", "id"),
+    )
+    
     # Relationships
     collaborators = relationship("ProjectCollaborator", back_populates="project", cascade="all, delete-orphan")
     comments = relationship("ProjectComment", back_populates="project", cascade="all, delete-orphan")
@@ -305,6 +327,7 @@ class RSVPStatus(str, enum.Enum):
     GOING = "going"
     MAYBE = "maybe"
     NOT_GOING = "not_going"
+    WAITLISTED = "waitlisted"  # Asked for GOING while the event was full
 
 
 class Event(Base):
@@ -314,7 +337,7 @@ class Event(Base):
     title = Column(String(200), nullable=False, index=True)
     description = Column(Text, nullable=False)
     event_type = Column(Enum(EventType), nullable=False, index=True)
-    start_time = Column(TIMESTAMP, nullable=False, index=True)
+    start_time = Column(TIMESTAMP, nullable=False)
     end_time = Column(TIMESTAMP, nullable=False)
     location = Column(String(200))
     is_virtual = Column(Boolean, default=False)
@@ -322,12 +345,20 @@ class Event(Base):
     banner_url = Column(String(500))
     organizer_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     max_attendees = Column(Integer)
-    current_attendees = Column(Integer, default=0)
+    current_attendees = Column(Integer, nullable=False, default=0, server_default="0")
+    waitlist_sequence = Column(Integer, default=0)  # Last waitlist position handed out
     tags = Column(JSON)
     is_active = Column(Boolean, default=True)
-    created_at = Column(TIMESTAMP, server_default=func.now())
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    # Keyset pagination seeks on (sort column, id) for every sort_by option
+    __table_args__ = (
+        Index("ix_events_start_time_id", "start_time", "id"),
+        Index("ix_events_created_at_id", "created_at", "id"),
+        Index("ix_events_current_attendees_id", "current_attendees", "id"),
+    )
+    
     # Relationships
     attendees = relationship("EventAttendee", back_populates="event", cascade="all, delete-orphan")
 
@@ -338,10 +369,17 @@ class EventAttendee(Base):
     event_id = Column(String(36), ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     rsvp_status = Column(Enum(RSVPStatus), default=RSVPStatus.GOING)
+    waitlist_position = Column(Integer)  # FIFO order while WAITLISTED
     attended = Column(Boolean, default=False)
-    created_at = Column(TIMESTAMP, server_default=func.now())
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_event_attendees_waitlist", "event_id", "waitlist_position"),
+        # Attendee list pages, in RSVP order
+        Index("ix_event_attendees_created_at", "event_id", "created_at", "user_id"),
+    )
+    
     # Relationships
     event = relationship("Event", back_populates="attendees")
 
@@ -421,3 +459,15 @@ class Leaderboard(Base):
     weekly_points = Column(Integer, default=0)
     monthly_points = Column(Integer, default=0)
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+# ==================== RECOMMENDATIONS ====================
+
+class PrecomputedRecommendation(Base):
+    __tablename__ = "precomputed_recommendations"
+    
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String(20), primary_key=True)  # projects, events or users
+    item_ids = Column(JSON, nullable=False)  # Ranked IDs, best first
+    model_version = Column(String(50))
+    computed_at = Column(TIMESTAMP, server_default=func.now())
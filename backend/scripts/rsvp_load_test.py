@@ -0,0 +1,184 @@
+"""
+Load test for event RSVPs: no overbooking and FIFO waitlist promotion.
+
+Creates a capped event and N users directly in the configured database,
+then fires N concurrent GOING RSVPs and checks that exactly `capacity`
+people got a seat, that the attendee count matches the GOING rows and
+that everyone else is waitlisted in a single queue. Everyone then
+repeats their RSVP, which must change nothing. A last wave cancels
+some seats while other users keep RSVPing and checks that the seats
+went to the head of the waitlist, in order.
+
+Runs in-process against the app by default:
+
+    cd backend
+    python -m scripts.rsvp_load_test --requests 1000 --capacity 100
+
+With --url it targets a running server instead, which must share this
+process's DATABASE_URL and SECRET_KEY (tokens are minted locally).
+"""
+from datetime import datetime, timedelta
+from typing import List
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+import httpx
+import numpy as np
+from sqlalchemy import delete, event, select
+
+from app.core.database import SessionLocal, async_engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models.mysql.models import User
+from app.models.mysql.enhanced_models import Event, EventAttendee, EventType, RSVPStatus
+
+
+def create_fixtures(n_users: int, capacity: int):
+    run = uuid.uuid4().hex[:8]
+    user_ids = [f"rsvp-load-{run}-{i}" for i in range(n_users)]
+    with SessionLocal() as db:
+        db.add_all(
+            User(id=user_id, email=f"{user_id}@example.com", username=user_id, password_hash="!", full_name="Load test")
+            for user_id in user_ids
+        )
+        load_event = Event(
+            title=f"RSVP load test {run}",
+            description="Capacity and waitlist load test",
+            event_type=EventType.WORKSHOP,
+            start_time=datetime.utcnow() + timedelta(days=7),
+            end_time=datetime.utcnow() + timedelta(days=7, hours=2),
+            organizer_id=user_ids[0],
+            max_attendees=capacity,
+            current_attendees=0,
+            waitlist_sequence=0,
+        )
+        db.add(load_event)
+        db.commit()
+        return load_event.id, user_ids
+
+
+def remove_fixtures(event_id: str, user_ids: List[str]):
+    with SessionLocal() as db:
+        db.execute(delete(EventAttendee).where(EventAttendee.event_id == event_id))
+        db.execute(delete(Event).where(Event.id == event_id))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+
+def snapshot(event_id: str):
+    with SessionLocal() as db:
+        current = db.scalar(select(Event.current_attendees).where(Event.id == event_id))
+        rows = db.execute(
+            select(EventAttendee.user_id, EventAttendee.rsvp_status, EventAttendee.waitlist_position)
+            .where(EventAttendee.event_id == event_id)
+        ).all()
+    return current, rows
+
+
+async def rsvp_all(client: httpx.AsyncClient, event_id: str, user_ids: List[str], rsvp_status: str):
+    async def one(user_id: str):
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+        start = time.perf_counter()
+        response = await client.post(
+            f"/api/v1/events/{event_id}/rsvp", json={"rsvp_status": rsvp_status}, headers=headers
+        )
+        return response, time.perf_counter() - start
+
+    return await asyncio.gather(*(one(user_id) for user_id in user_ids))
+
+
+def report(name: str, results) -> List[str]:
+    latencies = np.array([seconds for _, seconds in results]) * 1000
+    errors = [f"{response.status_code} {response.text[:200]}" for response, _ in results if response.status_code != 200]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"📊 {name}: {len(results)} requests, {len(errors)} errors, p50 {p50:.0f}ms p95 {p95:.0f}ms p99 {p99:.0f}ms")
+    return errors
+
+
+def check(condition: bool, message: str, failures: List[str]):
+    print(("✅ " if condition else "❌ ") + message)
+    if not condition:
+        failures.append(message)
+
+
+async def main(args) -> bool:
+    if async_engine.dialect.name == "sqlite":
+        # SQLite serializes writers; wait for the lock like InnoDB waits
+        # for row locks instead of failing after the default 5s
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _busy_timeout(connection, _):
+            connection.execute("PRAGMA busy_timeout = 60000")
+
+    event_id, user_ids = create_fixtures(args.requests + args.late, args.capacity)
+    first_wave, late_wave = user_ids[:args.requests], user_ids[args.requests:]
+    failures: List[str] = []
+    transport = None if args.url else httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=args.requests)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url=args.url or "http://loadtest", timeout=120, limits=limits
+        ) as client:
+            errors = report("GOING wave", await rsvp_all(client, event_id, first_wave, "going"))
+            check(not errors, f"no failed RSVPs {errors[:3]}", failures)
+
+            current, rows = snapshot(event_id)
+            going = [user_id for user_id, rsvp_status, _ in rows if rsvp_status == RSVPStatus.GOING]
+            waitlist = sorted(
+                (position, user_id) for user_id, rsvp_status, position in rows
+                if rsvp_status == RSVPStatus.WAITLISTED
+            )
+            check(len(going) == min(args.capacity, args.requests), f"{len(going)} GOING for {args.capacity} seats", failures)
+            check(current == len(going), f"current_attendees {current} matches GOING rows", failures)
+            check(len(going) + len(waitlist) == args.requests, f"{len(waitlist)} waitlisted, nobody lost", failures)
+            check(
+                len({position for position, _ in waitlist}) == len(waitlist),
+                "waitlist positions are unique", failures
+            )
+
+            # Repeating a GOING RSVP keeps the seat or queue place it has
+            # and frees nothing, so the next newcomer can't take a seat
+            errors = report("repeat GOING wave", await rsvp_all(client, event_id, first_wave, "going"))
+            check(not errors, f"no failed RSVPs {errors[:3]}", failures)
+            repeat_current, repeat_rows = snapshot(event_id)
+            check(sorted(repeat_rows) == sorted(rows), "repeated RSVPs changed nobody's seat or position", failures)
+            check(repeat_current == current, f"current_attendees still {repeat_current}", failures)
+
+            # Cancellations race with late GOING RSVPs; the freed seats must
+            # go to the head of the waitlist, not to the late arrivals
+            cancelled = going[:args.cancel]
+            expected = {user_id for _, user_id in waitlist[:len(cancelled)]}
+            results = await asyncio.gather(
+                rsvp_all(client, event_id, cancelled, "not_going"),
+                rsvp_all(client, event_id, late_wave, "going"),
+            )
+            errors = report("cancel + late wave", results[0] + results[1])
+            check(not errors, f"no failed RSVPs {errors[:3]}", failures)
+
+            current, rows = snapshot(event_id)
+            now_going = {user_id for user_id, rsvp_status, _ in rows if rsvp_status == RSVPStatus.GOING}
+            promoted = now_going - set(going)
+            check(len(now_going) == min(args.capacity, len(going)), f"still {len(now_going)} GOING after cancellations", failures)
+            check(current == len(now_going), f"current_attendees {current} matches GOING rows", failures)
+            check(promoted == expected, f"{len(promoted)} promoted, all from the head of the waitlist", failures)
+            check(not promoted & set(late_wave), "late arrivals were waitlisted, not seated", failures)
+    finally:
+        if not args.keep:
+            remove_fixtures(event_id, user_ids)
+
+    print("✅ No overbooking" if not failures else f"❌ {len(failures)} checks failed")
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent RSVP load test")
+    parser.add_argument("--requests", type=int, default=1000, help="Concurrent GOING RSVPs in the first wave")
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--cancel", type=int, default=25, help="Seats cancelled in the second wave")
+    parser.add_argument("--late", type=int, default=100, help="New GOING RSVPs racing the cancellations")
+    parser.add_argument("--url", help="Base URL of a running server instead of the in-process app")
+    parser.add_argument("--keep", action="store_true", help="Leave the test event and users in the database")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args)) else 1)